@@ -0,0 +1,84 @@
+"""
+Benchmark de Arranque de VESPY
+==============================
+
+Mide el tiempo de importación de los módulos de cálculo (lo que carga un
+proceso de trabajo o un script por lotes) y verifica que no se cargan
+dependencias pesadas de la interfaz.
+
+Uso:
+    python benchmarks/bench_startup.py [--umbral 1.0] [--repeticiones 5]
+
+Devuelve código de salida 1 si se supera el umbral o si se importa algún
+módulo prohibido.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Módulos que un proceso sin interfaz importa
+MODULES = ['calculos', 'inversion', 'cli']
+# Dependencias que no deben cargarse al importarlos
+FORBIDDEN = ['PyQt5', 'seaborn', 'pygimli', 'matplotlib']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {modules}
+elapsed = time.perf_counter() - start
+from inversion.inversion import VESInverter
+VESInverter()
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({forbidden!r}))
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+"""
+
+
+def measure_startup():
+    """
+    Importar los módulos de cálculo en un intérprete nuevo.
+
+    Returns:
+        dict: seconds (tiempo de importación), loaded (módulos prohibidos cargados)
+    """
+    code = PROBE.format(modules=', '.join(MODULES), forbidden=FORBIDDEN)
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de los módulos de cálculo')
+    parser.add_argument('--umbral', type=float, default=1.0, help='Tiempo máximo en segundos')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Número de mediciones')
+    args = parser.parse_args(argv)
+
+    runs = [measure_startup() for _ in range(args.repeticiones)]
+    best = min(run['seconds'] for run in runs)
+    loaded = sorted({name for run in runs for name in run['loaded']})
+
+    print(f"import {', '.join(MODULES)}: {best * 1000:.0f} ms (mejor de {len(runs)})")
+    ok = True
+    if best > args.umbral:
+        print(f"❌ Supera el umbral de {args.umbral:.2f} s")
+        ok = False
+    if loaded:
+        print(f"❌ Dependencias pesadas cargadas: {', '.join(loaded)}")
+        ok = False
+    if ok:
+        print("✅ Arranque dentro del presupuesto")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
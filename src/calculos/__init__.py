@@ -5,17 +5,25 @@ Paquete de cálculos para VESPY
 Contiene funciones de cálculo y procesamiento de datos SEV.
 """
 
-from .empalme import realizar_empalme, detectar_segmentos
-from .suavizado import apply_smoothing, moving_average, exponential_smoothing, remove_outliers
+from .empalme import realizar_empalme, empalmar_segmentos, factores_segmentos, detectar_segmentos
+from .suavizado import (apply_smoothing, moving_average, exponential_smoothing, smooth_log_resampled,
+                        remove_outliers, outlier_mask)
+from .pipeline import Pipeline, STAGES
 from .estadisticas import calcular_estadisticas, detectar_anomalias, calcular_tendencia, calcular_rango_investigacion
 
 __all__ = [
     'realizar_empalme',
+    'empalmar_segmentos',
+    'factores_segmentos',
     'detectar_segmentos',
     'apply_smoothing',
     'moving_average',
     'exponential_smoothing',
+    'smooth_log_resampled',
     'remove_outliers',
+    'outlier_mask',
+    'Pipeline',
+    'STAGES',
     'calcular_estadisticas',
     'detectar_anomalias',
     'calcular_tendencia',
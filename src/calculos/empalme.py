@@ -10,7 +10,6 @@ Email: josemariagarciamarquez2.72@gmail.com
 
 import numpy as np
 import pandas as pd
-from scipy.interpolate import interp1d
 
 
 def realizar_empalme(data, ab2_col, rhoa_col):
@@ -53,6 +52,103 @@ def realizar_empalme(data, ab2_col, rhoa_col):
         raise Exception(f"Error en empalme: {str(e)}")
 
 
+def factores_segmentos(data, ab2_col, rhoa_col, mn2_col='MN/2', sounding_col=None):
+    """
+    Factores de corrección multiplicativos de cada segmento MN/2.
+    
+    Cada valor de MN/2 de un sondeo define un segmento (ordenados por
+    MN/2; el primero es la referencia). El salto entre segmentos
+    consecutivos se estima como la media de log(ρa) anterior - log(ρa)
+    actual en las lecturas de AB/2 repetidas en ambos; sin solape el
+    salto es 0. El factor de cada segmento es el producto acumulado de
+    los saltos. Todos los sondeos de una tabla larga se procesan en una
+    sola pasada agrupada.
+    
+    Args:
+        data: DataFrame con los datos (uno o varios sondeos)
+        ab2_col: Nombre de la columna AB/2
+        rhoa_col: Nombre de la columna de resistividad aparente
+        mn2_col: Nombre de la columna MN/2
+        sounding_col: Columna que identifica el sondeo (None = un solo sondeo)
+    
+    Returns:
+        DataFrame con sounding_col (si se indica), mn2_col, 'segmento',
+        'n_solape' (lecturas comunes con el segmento anterior) y 'factor'
+    """
+    keys = [sounding_col] if sounding_col else []
+    df_work = data[keys + [ab2_col, mn2_col, rhoa_col]].copy()
+    for col in (ab2_col, mn2_col, rhoa_col):
+        df_work[col] = pd.to_numeric(df_work[col], errors='coerce')
+    df_work = df_work.dropna()
+    df_work = df_work[df_work[rhoa_col] > 0]
+    if len(df_work) == 0:
+        raise Exception("No hay datos válidos para empalmar")
+    
+    group = df_work.groupby(keys)[mn2_col] if keys else df_work[mn2_col]
+    df_work['segmento'] = group.rank(method='dense').astype(int) - 1
+    df_work['log_rhoa'] = np.log(df_work[rhoa_col])
+    
+    # log(ρa) medio por segmento y AB/2; el segmento anterior se une desplazando el índice
+    level = df_work.groupby(keys + ['segmento', ab2_col], as_index=False)['log_rhoa'].mean()
+    previous = level.assign(segmento=level['segmento'] + 1)
+    overlap = level.merge(previous, on=keys + ['segmento', ab2_col], suffixes=('', '_anterior'))
+    overlap['salto'] = overlap['log_rhoa_anterior'] - overlap['log_rhoa']
+    jumps = overlap.groupby(keys + ['segmento'])['salto'].agg(['mean', 'size'])
+    
+    segments = df_work.groupby(keys + ['segmento'], as_index=False)[mn2_col].first()
+    segments = segments.join(jumps, on=keys + ['segmento'])
+    segments['n_solape'] = segments['size'].fillna(0).astype(int)
+    segments['salto'] = segments['mean'].fillna(0.0)
+    
+    # Producto acumulado de los factores = suma acumulada de los saltos en log
+    cumulative = segments.groupby(keys)['salto'].cumsum() if keys else segments['salto'].cumsum()
+    segments['factor'] = np.exp(cumulative)
+    return segments[keys + [mn2_col, 'segmento', 'n_solape', 'factor']]
+
+
+def empalmar_segmentos(data, ab2_col, rhoa_col, mn2_col='MN/2', sounding_col=None):
+    """
+    Empalme por segmentos MN/2 con corrección de los saltos de nivel.
+    
+    Multiplica cada segmento por su factor (factores_segmentos) y promedia
+    las lecturas repetidas de AB/2 como realizar_empalme. Sin columna
+    MN/2 equivale a realizar_empalme.
+    
+    Args:
+        data: DataFrame con los datos (uno o varios sondeos en formato largo)
+        ab2_col: Nombre de la columna AB/2
+        rhoa_col: Nombre de la columna de resistividad aparente
+        mn2_col: Nombre de la columna MN/2
+        sounding_col: Columna que identifica el sondeo (None = un solo sondeo)
+    
+    Returns:
+        DataFrame con sounding_col (si se indica), AB/2 y resistividad
+        empalmada, ordenado por sondeo y AB/2
+    """
+    try:
+        if mn2_col not in data.columns:
+            if sounding_col is None:
+                return realizar_empalme(data, ab2_col, rhoa_col)
+            data = data.assign(**{mn2_col: 0.0})
+        
+        keys = [sounding_col] if sounding_col else []
+        factors = factores_segmentos(data, ab2_col, rhoa_col, mn2_col, sounding_col)
+        
+        df_work = data[keys + [ab2_col, mn2_col, rhoa_col]].copy()
+        for col in (ab2_col, mn2_col, rhoa_col):
+            df_work[col] = pd.to_numeric(df_work[col], errors='coerce')
+        df_work = df_work.dropna()
+        df_work = df_work[df_work[rhoa_col] > 0]
+        df_work = df_work.merge(factors[keys + [mn2_col, 'factor']], on=keys + [mn2_col], how='inner')
+        df_work[rhoa_col] = df_work[rhoa_col] * df_work['factor']
+        
+        result = df_work.groupby(keys + [ab2_col])[rhoa_col].mean().reset_index()
+        return result.sort_values(by=keys + [ab2_col]).reset_index(drop=True)
+        
+    except Exception as e:
+        raise Exception(f"Error en empalme: {str(e)}")
+
+
 def detectar_segmentos(ab2, rhoa, threshold=2.0):
     """
     Detectar segmentos en una curva de resistividad.
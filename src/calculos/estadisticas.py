@@ -10,7 +10,6 @@ Email: josemariagarciamarquez2.72@gmail.com
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 
 
 def calcular_estadisticas(data, ab2_col, rhoa_col):
@@ -65,6 +64,8 @@ def detectar_anomalias(rhoa, threshold=3.0):
     Returns:
         Array de índices con anomalías
     """
+    from scipy import stats
+    
     log_rhoa = np.log10(rhoa)
     z_scores = np.abs(stats.zscore(log_rhoa))
     
@@ -84,6 +85,8 @@ def calcular_tendencia(ab2, rhoa):
     Returns:
         dict con pendiente, intercepto y R²
     """
+    from scipy import stats
+    
     log_ab2 = np.log10(ab2)
     log_rhoa = np.log10(rhoa)
     
@@ -0,0 +1,214 @@
+"""
+Pipeline de Preprocesamiento para VESPY
+=======================================
+
+Cadena ordenada de etapas de preprocesamiento de un sondeo:
+
+    clean → empalme → outliers → smoothing → resample
+
+Cada etapa activa guarda su salida en caché con una clave formada por el
+hash del DataFrame de entrada y sus parámetros. Al cambiar un parámetro
+solo cambia la clave de esa etapa: las anteriores se reutilizan y las
+posteriores se recalculan porque reciben otra entrada (si la salida no
+cambia, también se reutilizan). Lo comparten SEVApp y la CLI.
+
+MN/2 se conserva mientras las filas son las lecturas originales (clean,
+outliers y el suavizado por muestra); el empalme, el suavizado en
+dominio log y el remuestreo generan una curva nueva sin MN/2.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .empalme import empalmar_segmentos
+from .suavizado import apply_smoothing, filter_curves, outlier_mask
+
+
+# Orden fijo de las etapas
+STAGES = ('clean', 'empalme', 'outliers', 'smoothing', 'resample')
+# Salidas conservadas por etapa (permite alternar parámetros sin recalcular)
+STAGE_CACHE_SIZE = 8
+
+
+def frame_hash(data):
+    """
+    Hash del contenido de un DataFrame (valores, índice y columnas).
+
+    Args:
+        data: DataFrame
+
+    Returns:
+        str: Resumen hexadecimal SHA-256
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _clean(data, columns):
+    """Columnas numéricas, sin NaN ni valores no positivos, ordenado por AB/2."""
+    ab2_col, rhoa_col, mn2_col = columns
+    keep = [col for col in (ab2_col, mn2_col, rhoa_col) if col in data.columns]
+    result = data[keep].apply(pd.to_numeric, errors='coerce').dropna()
+    result = result[(result[ab2_col] > 0) & (result[rhoa_col] > 0)]
+    return result.sort_values(by=ab2_col, kind='stable').reset_index(drop=True)
+
+
+def _empalme(data, columns):
+    """Empalme por segmentos MN/2 (promedio por AB/2 sin columna MN/2)."""
+    ab2_col, rhoa_col, mn2_col = columns
+    return empalmar_segmentos(data, ab2_col, rhoa_col, mn2_col)
+
+
+def _outliers(data, columns, threshold=3.0):
+    """Eliminar lecturas a más de `threshold` desviaciones en log10(ρa) (conserva todas las columnas)."""
+    _, rhoa_col, _ = columns
+    keep = outlier_mask(data[rhoa_col].values, threshold)
+    return data[keep].reset_index(drop=True)
+
+
+def _smoothing(data, columns, method='moving_average', window_size=5, poly_order=2, log_domain=False):
+    """Suavizado con apply_smoothing (por muestra conserva las demás columnas, p. ej. MN/2)."""
+    ab2_col, rhoa_col, _ = columns
+    if log_domain:
+        return apply_smoothing(data, ab2_col, rhoa_col, method=method, window_size=window_size,
+                               poly_order=poly_order, log_domain=True)
+    ordered = data.dropna(subset=[ab2_col, rhoa_col]).sort_values(by=ab2_col, kind='stable')
+    smoothed = filter_curves(ordered[rhoa_col].to_numpy(dtype=float), method, window_size, poly_order)
+    return ordered.assign(**{rhoa_col: smoothed}).reset_index(drop=True)
+
+
+def _resample(data, columns, points_per_decade=10):
+    """Remuestrear la curva a una malla uniforme en log10(AB/2) (interpolación log-log)."""
+    ab2_col, rhoa_col, _ = columns
+    log_ab2 = np.log10(data[ab2_col].values)
+    n_points = max(2, int(round((log_ab2[-1] - log_ab2[0]) * points_per_decade)) + 1)
+    grid = np.linspace(log_ab2[0], log_ab2[-1], n_points)
+    log_rhoa = np.interp(grid, log_ab2, np.log10(data[rhoa_col].values))
+    return pd.DataFrame({ab2_col: 10 ** grid, rhoa_col: 10 ** log_rhoa})
+
+
+# Etapa → (función, parámetros por defecto, activa por defecto)
+STAGE_DEFINITIONS = {
+    'clean': (_clean, {}, True),
+    'empalme': (_empalme, {}, False),
+    'outliers': (_outliers, {'threshold': 3.0}, False),
+    'smoothing': (_smoothing, {'method': 'moving_average', 'window_size': 5, 'poly_order': 2,
+                               'log_domain': False}, False),
+    'resample': (_resample, {'points_per_decade': 10}, False)
+}
+
+
+class Pipeline:
+    """
+    Preprocesamiento por etapas con caché de salidas por etapa.
+
+    Args:
+        ab2_col: Nombre de la columna AB/2
+        rhoa_col: Nombre de la columna de resistividad aparente
+        mn2_col: Nombre de la columna MN/2 (usada por el empalme si existe)
+    """
+
+    def __init__(self, ab2_col='AB/2', rhoa_col='pa (Ω*m)', mn2_col='MN/2'):
+        self.columns = (ab2_col, rhoa_col, mn2_col)
+        self._enabled = {name: STAGE_DEFINITIONS[name][2] for name in STAGES}
+        self._params = {name: dict(STAGE_DEFINITIONS[name][1]) for name in STAGES}
+        self._cache = {name: OrderedDict() for name in STAGES}
+        self._outputs = {}
+        self.computed = []
+
+    def configure(self, stage, enabled=None, **params):
+        """
+        Activar/desactivar una etapa o cambiar sus parámetros.
+
+        Args:
+            stage: Nombre de la etapa (STAGES)
+            enabled: True/False (None = sin cambios)
+            **params: Parámetros de la etapa
+
+        Raises:
+            ValueError: Etapa o parámetro desconocido
+        """
+        if stage not in STAGE_DEFINITIONS:
+            raise ValueError(f"Etapa desconocida: {stage}")
+        unknown = set(params) - set(STAGE_DEFINITIONS[stage][1])
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos para '{stage}': {', '.join(sorted(unknown))}")
+        if enabled is not None:
+            self._enabled[stage] = bool(enabled)
+        self._params[stage].update(params)
+        return self
+
+    def enabled(self, stage):
+        """True si la etapa está activa."""
+        return self._enabled[stage]
+
+    def params(self, stage):
+        """Parámetros actuales de la etapa."""
+        return dict(self._params[stage])
+
+    def run(self, data, until=None):
+        """
+        Ejecutar las etapas activas, reutilizando las salidas en caché.
+
+        Args:
+            data: DataFrame con los datos originales
+            until: Última etapa a ejecutar (None = todas)
+
+        Returns:
+            DataFrame procesado (copia)
+        """
+        if until is not None and until not in STAGE_DEFINITIONS:
+            raise ValueError(f"Etapa desconocida: {until}")
+        current, current_hash = data, frame_hash(data)
+        self._outputs = {}
+        self.computed = []
+
+        for name in STAGES:
+            if self._enabled[name]:
+                params = self._params[name]
+                key = hashlib.sha256(json.dumps([name, current_hash, params], sort_keys=True,
+                                                default=str).encode()).hexdigest()
+                cache = self._cache[name]
+                if key in cache:
+                    cache.move_to_end(key)
+                else:
+                    output = STAGE_DEFINITIONS[name][0](current, self.columns, **params)
+                    cache[key] = (output, frame_hash(output))
+                    if len(cache) > STAGE_CACHE_SIZE:
+                        cache.popitem(last=False)
+                    self.computed.append(name)
+                current, current_hash = cache[key]
+                self._outputs[name] = current
+            if name == until:
+                break
+
+        return current.copy()
+
+    def output(self, stage):
+        """
+        Salida de una etapa en la última ejecución.
+
+        Returns:
+            DataFrame (copia) o None si la etapa no estaba activa
+        """
+        output = self._outputs.get(stage)
+        return None if output is None else output.copy()
+
+    def last_stage(self):
+        """Última etapa activa de la última ejecución (None si no se ha ejecutado)."""
+        return next(reversed(self._outputs), None)
+
+    def clear_cache(self, stage=None):
+        """Vaciar la caché de una etapa y las posteriores (None = todas)."""
+        start = 0 if stage is None else STAGES.index(stage)
+        for name in STAGES[start:]:
+            self._cache[name].clear()
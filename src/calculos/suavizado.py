@@ -10,10 +10,11 @@ Email: josemariagarciamarquez2.72@gmail.com
 
 import numpy as np
 import pandas as pd
-from scipy.signal import savgol_filter
+from numpy.lib.stride_tricks import sliding_window_view
 
 
-def apply_smoothing(data, ab2_col, rhoa_col, method='moving_average', window_size=3, poly_order=2):
+def apply_smoothing(data, ab2_col, rhoa_col, method='moving_average', window_size=3, poly_order=2,
+                    log_domain=False):
     """
     Aplicar suavizado a la curva de resistividad.
     
@@ -24,6 +25,8 @@ def apply_smoothing(data, ab2_col, rhoa_col, method='moving_average', window_siz
         method: Método de suavizado ('moving_average', 'savgol', 'exponential')
         window_size: Tamaño de ventana para suavizado
         poly_order: Orden polinomial (para Savitzky-Golay)
+        log_domain: Filtrar log10(ρa) sobre una malla uniforme en log10(AB/2)
+            (ver smooth_log_resampled) en lugar de ρa por posición de muestra
     
     Returns:
         DataFrame con datos suavizados
@@ -44,18 +47,10 @@ def apply_smoothing(data, ab2_col, rhoa_col, method='moving_average', window_siz
         rhoa = rhoa[sort_idx]
         
         # Aplicar suavizado
-        if method == 'moving_average':
-            smoothed = moving_average(rhoa, window_size)
-        elif method == 'savgol':
-            if len(rhoa) < window_size:
-                window_size = len(rhoa) if len(rhoa) % 2 == 1 else len(rhoa) - 1
-            if window_size < poly_order + 2:
-                poly_order = window_size - 2 if window_size > 2 else 1
-            smoothed = savgol_filter(rhoa, window_size, poly_order)
-        elif method == 'exponential':
-            smoothed = exponential_smoothing(rhoa, alpha=2.0/(window_size + 1))
+        if log_domain:
+            smoothed = smooth_log_resampled(ab2, rhoa, method, window_size, poly_order)
         else:
-            smoothed = rhoa
+            smoothed = filter_curves(rhoa, method, window_size, poly_order)
         
         result = pd.DataFrame({
             ab2_col: ab2,
@@ -68,12 +63,122 @@ def apply_smoothing(data, ab2_col, rhoa_col, method='moving_average', window_siz
         raise Exception(f"Error en suavizado: {str(e)}")
 
 
+def filter_curves(values, method='moving_average', window_size=3, poly_order=2):
+    """
+    Filtrar una curva o una matriz de curvas (una por fila) por posición de muestra.
+    
+    Args:
+        values: Array (N,) o (curvas, N)
+        method: 'moving_average', 'savgol' o 'exponential' (otro = sin filtrar)
+        window_size: Tamaño de ventana
+        poly_order: Orden polinomial (para Savitzky-Golay)
+    
+    Returns:
+        Array filtrado con la forma de values
+    """
+    if method == 'moving_average':
+        return moving_average(values, window_size)
+    if method == 'savgol':
+        from scipy.signal import savgol_filter
+        n = np.shape(values)[-1]
+        if n < window_size:
+            window_size = n if n % 2 == 1 else n - 1
+        if window_size < poly_order + 2:
+            poly_order = window_size - 2 if window_size > 2 else 1
+        return savgol_filter(values, window_size, poly_order, axis=-1)
+    if method == 'exponential':
+        return exponential_smoothing(values, alpha=2.0/(window_size + 1))
+    return values
+
+
+def _interp_rows(x_new, x, y):
+    """
+    Interpolación lineal fila a fila sin bucles (equivalente a np.interp por fila).
+    
+    Args:
+        x_new: Abscisas de evaluación (filas, K)
+        x: Abscisas crecientes por fila (filas, N)
+        y: Ordenadas (filas, N)
+    
+    Returns:
+        Array (filas, K)
+    """
+    n_rows, n = x.shape
+    # Desplazar cada fila por encima de la anterior para buscar en un solo array ordenado
+    span = np.max(x[:, -1] - x[:, 0]) + 1.0
+    shift = (np.arange(n_rows) * span)[:, None]
+    x_new = np.clip(x_new, x[:, :1], x[:, -1:])
+    right = np.searchsorted((x - x[:, :1] + shift).ravel(), (x_new - x[:, :1] + shift).ravel())
+    right = np.clip(right.reshape(x_new.shape) - np.arange(n_rows)[:, None] * n, 1, n - 1)
+    left = right - 1
+    
+    x0 = np.take_along_axis(x, left, axis=1)
+    x1 = np.take_along_axis(x, right, axis=1)
+    y0 = np.take_along_axis(y, left, axis=1)
+    y1 = np.take_along_axis(y, right, axis=1)
+    dx = x1 - x0
+    weight = np.divide(x_new - x0, dx, out=np.zeros_like(dx), where=dx > 0)
+    return y0 + weight * (y1 - y0)
+
+
+def smooth_log_resampled(ab2, rhoa, method='moving_average', window_size=3, poly_order=2, n_points=None):
+    """
+    Suavizado en dominio logarítmico sobre una malla uniforme en log10(AB/2).
+    
+    Cada curva se remuestrea a n_points valores equiespaciados en
+    log10(AB/2) entre su AB/2 mínimo y máximo, se filtra log10(ρa) con
+    filter_curves y el resultado se interpola de vuelta a los AB/2
+    originales. Con matrices se procesan todas las curvas en una llamada.
+    
+    Args:
+        ab2: Array (N,) de AB/2 creciente, común a todas las curvas, o (curvas, N)
+        rhoa: Array (N,) o (curvas, N) de resistividades aparentes
+        method: 'moving_average', 'savgol' o 'exponential'
+        window_size: Tamaño de ventana (en puntos de la malla)
+        poly_order: Orden polinomial (para Savitzky-Golay)
+        n_points: Puntos de la malla (None = N)
+    
+    Returns:
+        Array de ρa suavizada en los AB/2 originales, con la forma de rhoa
+    """
+    rhoa = np.asarray(rhoa, dtype=float)
+    log_ab2 = np.log10(np.broadcast_to(np.asarray(ab2, dtype=float), rhoa.shape))
+    log_rhoa = np.log10(rhoa)
+    if rhoa.shape[-1] < 2:
+        return rhoa
+    
+    log_ab2 = log_ab2.reshape(-1, rhoa.shape[-1])
+    log_rhoa = log_rhoa.reshape(log_ab2.shape)
+    n_points = n_points or rhoa.shape[-1]
+    
+    # Malla uniforme por curva en coordenada normalizada u ∈ [0, 1]
+    start = log_ab2[:, :1]
+    width = log_ab2[:, -1:] - start
+    grid = start + width * np.linspace(0.0, 1.0, n_points)
+    filtered = filter_curves(_interp_rows(grid, log_ab2, log_rhoa), method, window_size, poly_order)
+    
+    # Vuelta a los AB/2 originales: la malla es uniforme, el índice es aritmético
+    position = np.divide(log_ab2 - start, width, out=np.zeros_like(log_ab2), where=width > 0) * (n_points - 1)
+    left = np.clip(np.floor(position).astype(int), 0, n_points - 2)
+    weight = position - left
+    y0 = np.take_along_axis(filtered, left, axis=1)
+    y1 = np.take_along_axis(filtered, left + 1, axis=1)
+    return (10 ** (y0 + weight * (y1 - y0))).reshape(rhoa.shape)
+
+
 def moving_average(data, window_size):
     """
-    Suavizado por media móvil.
+    Suavizado por media móvil centrada (la ventana se recorta en los extremos).
+    
+    Las ventanas completas se promedian de una vez sobre una vista
+    deslizante (sliding_window_view); solo las ventanas recortadas de los
+    extremos (a lo sumo window_size) se recorren una a una. Cada ventana
+    se promedia por separado, así que un NaN solo afecta a las ventanas
+    que lo contienen. Con un array 2-D suaviza cada fila (p. ej. varios
+    sondeos remuestreados a una malla común).
     
     Args:
-        data: Array de datos
+        data: Array de datos (N,) o (sondeos, N)
         window_size: Tamaño de ventana
     
     Returns:
@@ -82,48 +187,55 @@ def moving_average(data, window_size):
     if window_size < 1:
         return data
     
-    result = np.zeros_like(data)
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
     half_window = window_size // 2
+    width = 2 * half_window + 1
+    result = np.empty_like(data)
     
-    for i in range(len(data)):
-        start = max(0, i - half_window)
-        end = min(len(data), i + half_window + 1)
-        result[i] = np.mean(data[start:end])
-    
+    if n >= width:
+        result[..., half_window:n - half_window] = sliding_window_view(data, width, axis=-1).mean(axis=-1)
+    edges = sorted(set(range(min(half_window, n))) | set(range(max(n - half_window, 0), n)))
+    for i in edges:
+        result[..., i] = data[..., max(0, i - half_window):i + half_window + 1].mean(axis=-1)
     return result
 
 
 def exponential_smoothing(data, alpha=0.3):
     """
-    Suavizado exponencial.
+    Suavizado exponencial: y[0] = x[0], y[i] = α·x[i] + (1-α)·y[i-1].
+    
+    La recurrencia se evalúa con scipy.signal.lfilter; con un array 2-D
+    suaviza cada fila.
     
     Args:
-        data: Array de datos
+        data: Array de datos (N,) o (sondeos, N)
         alpha: Factor de suavizado (0-1)
     
     Returns:
         Array suavizado
     """
-    result = np.zeros_like(data)
-    result[0] = data[0]
-    
-    for i in range(1, len(data)):
-        result[i] = alpha * data[i] + (1 - alpha) * result[i-1]
+    from scipy.signal import lfilter
     
+    data = np.asarray(data, dtype=float)
+    result = np.empty_like(data)
+    result[..., 0] = data[..., 0]
+    # Estado inicial: la contribución (1-α)·y[0] al primer valor filtrado
+    initial = (1 - alpha) * data[..., :1]
+    result[..., 1:], _ = lfilter([alpha], [1.0, -(1 - alpha)], data[..., 1:], axis=-1, zi=initial)
     return result
 
 
-def remove_outliers(ab2, rhoa, threshold=3.0):
+def outlier_mask(rhoa, threshold=3.0):
     """
-    Eliminar outliers de la curva de resistividad.
+    Máscara de lecturas válidas (a menos de `threshold` desviaciones en log10(ρa)).
     
     Args:
-        ab2: Array de espaciamientos
         rhoa: Array de resistividades
         threshold: Umbral en desviaciones estándar
     
     Returns:
-        Tupla (ab2_clean, rhoa_clean)
+        Array booleano (True = se conserva)
     """
     log_rhoa = np.log10(rhoa)
     
@@ -132,6 +244,20 @@ def remove_outliers(ab2, rhoa, threshold=3.0):
     
     # Identificar outliers
     z_scores = np.abs((log_rhoa - mean) / std)
-    mask = z_scores < threshold
+    return z_scores < threshold
+
+
+def remove_outliers(ab2, rhoa, threshold=3.0):
+    """
+    Eliminar outliers de la curva de resistividad.
     
+    Args:
+        ab2: Array de espaciamientos
+        rhoa: Array de resistividades
+        threshold: Umbral en desviaciones estándar
+    
+    Returns:
+        Tupla (ab2_clean, rhoa_clean)
+    """
+    mask = outlier_mask(rhoa, threshold)
     return ab2[mask], rhoa[mask]
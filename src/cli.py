@@ -0,0 +1,285 @@
+"""
+Procesamiento por Lotes de VESPY (sin interfaz gráfica)
+=======================================================
+
+Ejecuta la cadena completa sobre un directorio o patrón de archivos:
+
+    carga → empalme → suavizado → inversión → exportación
+
+Uso:
+    python -m vespy datos/*.xlsx --salida resultados --capas 4 --workers 8
+    python -m vespy campaña/ --suavizado moving_average --ventana 5
+
+No importa PyQt5: puede ejecutarse en nodos de cálculo sin pantalla.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from calculos.pipeline import Pipeline
+from inversion.inversion import VESInverter
+
+
+EXTENSIONS = ('.xlsx', '.xls', '.csv', '.txt')
+# Encabezados reconocidos por columna estándar (en minúsculas, palabras completas)
+COLUMN_PATTERNS = {
+    'AB/2': r'^ab\s*(/\s*2|2)?\b',
+    'MN/2': r'^mn\s*(/\s*2|2)?\b',
+    'pa (Ω*m)': r'^pa\b|\brhoa\b|\bρa\b|\bohm|resistividad|ω'
+}
+# Columnas sin las que no se puede invertir
+REQUIRED_COLUMNS = ('AB/2', 'pa (Ω*m)')
+
+
+def find_input_files(inputs):
+    """
+    Expandir directorios y patrones glob a una lista ordenada de archivos.
+
+    Args:
+        inputs: Lista de rutas, directorios o patrones
+
+    Returns:
+        list: Rutas de archivos con extensión soportada
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item)
+        files.extend(path for path in candidates
+                     if os.path.isfile(path) and path.lower().endswith(EXTENSIONS))
+    return sorted(set(files))
+
+
+def detect_columns(columns):
+    """
+    Detectar columnas AB/2, MN/2 y resistividad aparente por su nombre.
+
+    Cada encabezado se compara por palabras completas con COLUMN_PATTERNS
+    (p. ej. 'Pasos' o 'Spacing' no son ρa). Sin diálogo de mapeo no se
+    adivina: falta de candidatos o varios candidatos para una columna es
+    un error.
+
+    Args:
+        columns: Lista de nombres de columnas
+
+    Returns:
+        dict: Mapeo {columna original: nombre estándar}
+
+    Raises:
+        ValueError: Falta AB/2 o ρa, o hay varias columnas candidatas
+    """
+    candidates = {name: [] for name in COLUMN_PATTERNS}
+    for col in columns:
+        col_lower = str(col).lower().strip()
+        for name, pattern in COLUMN_PATTERNS.items():
+            if re.search(pattern, col_lower):
+                candidates[name].append(col)
+                break
+
+    mapping = {}
+    for name, found in candidates.items():
+        if len(found) > 1:
+            raise ValueError(f"Varias columnas candidatas para {name}: {', '.join(map(str, found))}")
+        if found:
+            mapping[found[0]] = name
+        elif name in REQUIRED_COLUMNS:
+            raise ValueError(f"No se encontró la columna {name}")
+    return mapping
+
+
+def load_sounding(file_path, column_map=None):
+    """
+    Cargar un archivo SEV y normalizar sus columnas.
+
+    Args:
+        file_path: Ruta del archivo (.xlsx, .xls, .csv, .txt)
+        column_map: Mapeo explícito de columnas (opcional)
+
+    Returns:
+        DataFrame con columnas 'AB/2', 'pa (Ω*m)' y opcionalmente 'MN/2'
+    """
+    if file_path.lower().endswith(('.xlsx', '.xls')):
+        data = pd.read_excel(file_path)
+    elif file_path.lower().endswith('.csv'):
+        data = pd.read_csv(file_path)
+    else:
+        data = pd.read_csv(file_path, sep='\t')
+
+    data.columns = data.columns.astype(str).str.strip()
+    data = data.dropna()
+    data = data.rename(columns=column_map or detect_columns(data.columns))
+
+    if 'AB/2' not in data.columns or 'pa (Ω*m)' not in data.columns:
+        raise ValueError(f"No se encontraron las columnas AB/2 y resistividad en {file_path}")
+
+    return data
+
+
+def preprocess(data, empalme=True, smoothing=None, window_size=5, log_domain=False):
+    """
+    Aplicar empalme y suavizado con el pipeline de preprocesamiento.
+
+    Args:
+        data: DataFrame normalizado
+        empalme: Realizar empalme (corrección de segmentos MN/2 y promedio por AB/2)
+        smoothing: Método de suavizado (None = sin suavizado)
+        window_size: Tamaño de ventana del suavizado
+        log_domain: Suavizar log10(ρa) sobre una malla uniforme en log10(AB/2)
+
+    Returns:
+        DataFrame listo para inversión
+    """
+    pipeline = Pipeline().configure('empalme', enabled=empalme)
+    if smoothing:
+        pipeline.configure('smoothing', enabled=True, method=smoothing, window_size=window_size,
+                           log_domain=log_domain)
+    return pipeline.run(data)
+
+
+def export_result(name, data, result, output_dir):
+    """
+    Escribir tabla del modelo y curva ajustada en CSV.
+
+    Args:
+        name: Nombre base del sondeo
+        data: DataFrame invertido
+        result: Resultado de VESInverter.invert
+        output_dir: Directorio de salida
+
+    Returns:
+        tuple: (ruta de la tabla, ruta de la curva)
+    """
+    resistivities = np.asarray(result['resistivities'], dtype=float)
+    thicknesses = np.asarray(result['thicknesses'], dtype=float)[:len(resistivities) - 1]
+    depths = np.cumsum(thicknesses)
+
+    table = pd.DataFrame({
+        'Espesor (m)': [f"{h:.2f}" for h in thicknesses] + ["∞"],
+        'Profundidad (m)': [f"{d:.2f}" for d in depths] + ["∞"],
+        'Resistividad (Ω*m)': [f"{r:.2f}" for r in resistivities]
+    })
+    table_path = os.path.join(output_dir, f"{name}_modelo.csv")
+    table.to_csv(table_path, index=False)
+
+    curve = pd.DataFrame({
+        'AB/2 (m)': result['ab2_model'],
+        'Resistividad Modelo (Ω*m)': result['rho_model']
+    })
+    curve_path = os.path.join(output_dir, f"{name}_curva.csv")
+    curve.to_csv(curve_path, index=False)
+
+    data.to_csv(os.path.join(output_dir, f"{name}_datos.csv"), index=False)
+
+    return table_path, curve_path
+
+
+def build_parser():
+    """Construir el parser de argumentos de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        prog='vespy',
+        description='Procesamiento por lotes de SEV: empalme, suavizado, inversión y exportación.'
+    )
+    parser.add_argument('inputs', nargs='+', help='Archivos, directorios o patrones (*.xlsx, *.csv)')
+    parser.add_argument('-o', '--salida', default='resultados_vespy', help='Directorio de salida')
+    parser.add_argument('--capas', type=int, default=3, help='Número de capas del modelo')
+    parser.add_argument('--lam', type=float, default=20, help='Lambda de regularización (PyGIMLi)')
+    parser.add_argument('--lam-factor', type=float, default=0.8, help='Factor lambda (PyGIMLi)')
+    parser.add_argument('--metodo', default='auto',
+                        choices=['auto', 'pygimli', 'simple', 'gauss_newton'],
+                        help='Método de inversión')
+    parser.add_argument('--sin-empalme', action='store_true', help='No realizar empalme')
+    parser.add_argument('--suavizado', default=None,
+                        choices=['moving_average', 'savgol', 'exponential'],
+                        help='Método de suavizado (por defecto ninguno)')
+    parser.add_argument('--ventana', type=int, default=5, help='Tamaño de ventana del suavizado')
+    parser.add_argument('--suavizado-log', action='store_true',
+                        help='Suavizar en dominio logarítmico (malla uniforme en log AB/2)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos de inversión (por defecto todos los núcleos)')
+    parser.add_argument('--chunk-size', type=int, default=1,
+                        help='Sondeos enviados a cada proceso por tarea')
+    parser.add_argument('--sin-cache', action='store_true',
+                        help='No leer ni guardar resultados en la caché de disco (~/.cache/vespy)')
+    return parser
+
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos.
+
+    Returns:
+        int: Código de salida (0 = todos los sondeos invertidos)
+    """
+    args = build_parser().parse_args(argv)
+    if args.sin_cache:
+        # Los procesos de inversión heredan la variable de entorno
+        os.environ['VESPY_CACHE_DIR'] = ''
+
+    files = find_input_files(args.inputs)
+    if not files:
+        print("❌ No se encontraron archivos de entrada")
+        return 1
+
+    os.makedirs(args.salida, exist_ok=True)
+    print(f"📂 {len(files)} archivos encontrados")
+
+    names, soundings, summary = [], [], []
+    for file_path in files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        try:
+            data = load_sounding(file_path)
+            data = preprocess(data, empalme=not args.sin_empalme,
+                              smoothing=args.suavizado, window_size=args.ventana,
+                              log_domain=args.suavizado_log)
+            names.append(name)
+            soundings.append(data)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            summary.append({'sondeo': name, 'exito': False, 'error': str(e)})
+
+    print(f"⚡ Invirtiendo {len(soundings)} sondeos...")
+    results = VESInverter().invert_many(
+        soundings,
+        workers=args.workers,
+        chunksize=args.chunk_size,
+        num_layers=args.capas,
+        lam=args.lam,
+        lam_factor=args.lam_factor,
+        method=args.metodo
+    )
+
+    for name, data, result in zip(names, soundings, results):
+        if not result.get('success'):
+            print(f"❌ {name}: {result.get('error')}")
+            summary.append({'sondeo': name, 'exito': False, 'error': result.get('error')})
+            continue
+        export_result(name, data, result, args.salida)
+        summary.append({
+            'sondeo': name,
+            'exito': True,
+            'metodo': result.get('method'),
+            'rms': result.get('rms_error'),
+            'chi2': result.get('chi2')
+        })
+        print(f"✅ {name}: {result.get('method')}")
+
+    pd.DataFrame(summary).to_csv(os.path.join(args.salida, 'resumen.csv'), index=False)
+    failed = sum(1 for row in summary if not row['exito'])
+    print(f"💾 Resultados en {args.salida} ({len(summary) - failed} correctos, {failed} con error)")
+
+    return 0 if failed == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,6 @@ Fecha: 2025
 """
 
 import pandas as pd
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
 class DataLoader:
     """Cargador de datos SEV"""
@@ -28,6 +27,8 @@ class DataLoader:
         Returns:
             pandas.DataFrame: Datos cargados o None si hay error
         """
+        from PyQt5.QtWidgets import QFileDialog, QMessageBox
+        
         try:
             # Abrir diálogo de archivo
             file_path, _ = QFileDialog.getOpenFileName(
@@ -40,28 +41,40 @@ class DataLoader:
             if not file_path:
                 return None
             
-            self.file_path = file_path
-            
-            # Cargar según extensión
-            if file_path.lower().endswith(('.xlsx', '.xls')):
-                self.data = self._load_excel(file_path)
-            elif file_path.lower().endswith('.csv'):
-                self.data = self._load_csv(file_path)
-            elif file_path.lower().endswith('.txt'):
-                self.data = self._load_txt(file_path)
-            else:
-                raise ValueError("Formato de archivo no soportado")
-            
-            # Validar datos
-            self._validate_data()
-            
-            return self.data
+            return self.load_path(file_path)
             
         except Exception as e:
             if parent:
                 QMessageBox.critical(parent, "Error", f"Error cargando archivo: {str(e)}")
             raise e
     
+    def load_path(self, file_path):
+        """
+        Cargar archivo de datos SEV desde una ruta (sin diálogos)
+        
+        Args:
+            file_path: Ruta del archivo (.xlsx, .xls, .csv, .txt)
+        
+        Returns:
+            pandas.DataFrame: Datos cargados
+        """
+        self.file_path = file_path
+        
+        # Cargar según extensión
+        if file_path.lower().endswith(('.xlsx', '.xls')):
+            self.data = self._load_excel(file_path)
+        elif file_path.lower().endswith('.csv'):
+            self.data = self._load_csv(file_path)
+        elif file_path.lower().endswith('.txt'):
+            self.data = self._load_txt(file_path)
+        else:
+            raise ValueError("Formato de archivo no soportado")
+        
+        # Validar datos
+        self._validate_data()
+        
+        return self.data
+    
     def _load_excel(self, file_path):
         """Cargar archivo Excel"""
         try:
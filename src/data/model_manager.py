@@ -10,7 +10,20 @@ Email: josemariagarciamarquez2.72@gmail.com
 
 import pickle
 import os
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
+
+
+def _get_save_path(parent, title, file_filter):
+    """Pedir ruta de guardado con QFileDialog (PyQt5 se importa aquí)."""
+    from PyQt5.QtWidgets import QFileDialog
+    file_path, _ = QFileDialog.getSaveFileName(parent, title, "", file_filter)
+    return file_path
+
+
+def _get_open_path(parent, title, file_filter):
+    """Pedir ruta de apertura con QFileDialog (PyQt5 se importa aquí)."""
+    from PyQt5.QtWidgets import QFileDialog
+    file_path, _ = QFileDialog.getOpenFileName(parent, title, "", file_filter)
+    return file_path
 
 
 def save_model_to_file(model_data, parent=None):
@@ -25,12 +38,7 @@ def save_model_to_file(model_data, parent=None):
         bool: True si se guardó exitosamente
     """
     try:
-        file_path, _ = QFileDialog.getSaveFileName(
-            parent,
-            "Guardar Modelo",
-            "",
-            "Pickle Files (*.pkl);;All Files (*)"
-        )
+        file_path = _get_save_path(parent, "Guardar Modelo", "Pickle Files (*.pkl);;All Files (*)")
         
         if file_path:
             if not file_path.endswith('.pkl'):
@@ -58,12 +66,7 @@ def load_models_from_file(parent=None):
         list: Lista de modelos cargados o None si hay error
     """
     try:
-        file_path, _ = QFileDialog.getOpenFileName(
-            parent,
-            "Cargar Modelos",
-            "",
-            "Pickle Files (*.pkl);;All Files (*)"
-        )
+        file_path = _get_open_path(parent, "Cargar Modelos", "Pickle Files (*.pkl);;All Files (*)")
         
         if file_path:
             with open(file_path, 'rb') as f:
@@ -99,12 +102,8 @@ def save_inversion_table_to_csv(thickness, depths, resistivity, filename=None, p
     
     try:
         if filename is None:
-            file_path, _ = QFileDialog.getSaveFileName(
-                parent,
-                "Guardar Tabla",
-                "",
-                "CSV Files (*.csv);;Excel Files (*.xlsx);;All Files (*)"
-            )
+            file_path = _get_save_path(parent, "Guardar Tabla",
+                                       "CSV Files (*.csv);;Excel Files (*.xlsx);;All Files (*)")
             if not file_path:
                 return False, None
         else:
@@ -157,12 +156,8 @@ def save_curve_to_csv(ab2, rhoa, filename=None, parent=None):
     
     try:
         if filename is None:
-            file_path, _ = QFileDialog.getSaveFileName(
-                parent,
-                "Guardar Curva",
-                "",
-                "CSV Files (*.csv);;Excel Files (*.xlsx);;All Files (*)"
-            )
+            file_path = _get_save_path(parent, "Guardar Curva",
+                                       "CSV Files (*.csv);;Excel Files (*.xlsx);;All Files (*)")
             if not file_path:
                 return False, None
         else:
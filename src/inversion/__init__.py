@@ -5,8 +5,31 @@ from .inversion import (
     prepare_inversion_data,
     extract_inversion_arrays,
     invert_pygimli_discrete,
-    invert_simple_discrete
+    invert_simple_discrete,
+    invert_discrete
 )
+from .forward import (
+    schlumberger_forward,
+    forward_batch,
+    split_models,
+    forward_jacobian,
+    resistivity_transform,
+    hankel_j0_filter,
+    ForwardGeometry,
+    forward_geometry
+)
+from .gauss_newton import invert_gauss_newton, levenberg_marquardt
+from .cache import ResultCache, default_cache
+from .occam import invert_occam, difference_operator, lambda_sweep, lcurve_corner
+from .lci import invert_profile_lci, lateral_operator
+from .profile import invert_profile_sequential
+from .model_selection import select_layer_count, information_criteria
+from .uncertainty import monte_carlo_uncertainty, depth_probability, resistivity_profile
+from .mcmc import sample_posterior, split_rhat
+from .equivalence import explore_equivalence, layer_products
+from .robust import invert_robust, robust_weights
+from .control import CancelToken, InversionCancelled, IterationReporter, StoppingCriteria
+from .pool import WorkerPool, default_pool
 
 __all__ = [
     'invert_simple_method',
@@ -14,5 +37,42 @@ __all__ = [
     'prepare_inversion_data',
     'extract_inversion_arrays',
     'invert_pygimli_discrete',
-    'invert_simple_discrete'
+    'invert_simple_discrete',
+    'invert_discrete',
+    'schlumberger_forward',
+    'forward_batch',
+    'split_models',
+    'forward_jacobian',
+    'resistivity_transform',
+    'hankel_j0_filter',
+    'ForwardGeometry',
+    'forward_geometry',
+    'invert_gauss_newton',
+    'levenberg_marquardt',
+    'ResultCache',
+    'default_cache',
+    'invert_occam',
+    'difference_operator',
+    'lambda_sweep',
+    'lcurve_corner',
+    'invert_profile_lci',
+    'lateral_operator',
+    'invert_profile_sequential',
+    'select_layer_count',
+    'information_criteria',
+    'monte_carlo_uncertainty',
+    'depth_probability',
+    'resistivity_profile',
+    'sample_posterior',
+    'split_rhat',
+    'explore_equivalence',
+    'layer_products',
+    'invert_robust',
+    'robust_weights',
+    'CancelToken',
+    'InversionCancelled',
+    'IterationReporter',
+    'StoppingCriteria',
+    'WorkerPool',
+    'default_pool'
 ]
\ No newline at end of file
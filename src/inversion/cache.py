@@ -0,0 +1,205 @@
+"""
+Caché de Resultados de Inversión para VESPY
+===========================================
+
+Guarda en disco los resultados de inversión indexados por contenido: la
+clave es un hash SHA-256 de los arrays AB/2, MN/2 y ρa más el nombre del
+solucionador y sus parámetros. Repetir la inversión de un sondeo que no
+ha cambiado devuelve el resultado guardado sin recalcular.
+
+Cada resultado es un archivo .npz (sin pickle) dentro del directorio de
+caché. El tamaño total está acotado: al superarlo se eliminan los
+archivos usados hace más tiempo (LRU por fecha de modificación, que se
+actualiza en cada acierto).
+
+Directorio por defecto: ~/.cache/vespy/inversion (variable de entorno
+VESPY_CACHE_DIR para cambiarlo). Con VESPY_CACHE_DIR vacía (o la opción
+--sin-cache de la CLI) la caché queda desactivada: no se lee ni se
+escribe nada en disco.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+
+# Se incluye en la clave: cambiarla invalida los resultados guardados
+CACHE_VERSION = 1
+# Tamaño máximo por defecto del directorio de caché
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ResultCache:
+    """Caché LRU en disco de resultados de inversión (un .npz por resultado)."""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Directorio de caché (None = VESPY_CACHE_DIR o
+                ~/.cache/vespy/inversion; '' = caché desactivada)
+            max_bytes: Tamaño máximo total en bytes
+        """
+        if directory is None:
+            directory = os.environ.get(
+                'VESPY_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.cache', 'vespy', 'inversion')
+            )
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = bool(directory)
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(solver, ab2, mn2, rhoa, **params):
+        """
+        Calcular la clave de un problema de inversión.
+
+        Args:
+            solver: Nombre del solucionador (p. ej. 'pygimli_discrete')
+            ab2: Array de AB/2
+            mn2: Array de MN/2 (o None)
+            rhoa: Array de resistividades aparentes
+            **params: Parámetros del solucionador (n_layers, lam, ...)
+
+        Returns:
+            str: Hash hexadecimal SHA-256
+        """
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_VERSION}:{solver}".encode())
+        for name, values in (('ab2', ab2), ('mn2', mn2), ('rhoa', rhoa)):
+            digest.update(name.encode())
+            if values is None:
+                digest.update(b'none')
+                continue
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            digest.update(str(values.shape).encode())
+            digest.update(values.tobytes())
+        for name in sorted(params):
+            digest.update(f"{name}={params[name]!r}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """
+        Leer un resultado guardado.
+
+        Args:
+            key: Clave de make_key
+
+        Returns:
+            dict con el resultado (con 'cached': True) o None si no existe
+            (siempre None con la caché desactivada)
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                result = {name: stored[name].item() if stored[name].ndim == 0 else stored[name]
+                          for name in stored.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        result['cached'] = True
+        return result
+
+    def put(self, key, result):
+        """
+        Guardar un resultado exitoso.
+
+        Solo se guardan valores representables como arrays numéricos,
+        booleanos o cadenas; los objetos (p. ej. 'ves_manager') se omiten.
+
+        Args:
+            key: Clave de make_key
+            result: Diccionario de resultados de inversión
+        """
+        if not self.enabled or not result.get('success'):
+            return
+
+        arrays = {}
+        for name, value in result.items():
+            if name == 'cached':
+                continue
+            try:
+                value = np.asarray(value)
+            except Exception:
+                continue
+            if value.dtype.kind in 'biufcU':
+                arrays[name] = value
+
+        # Escritura atómica: los procesos de trabajo pueden compartir el directorio
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.savez(handle, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self._evict()
+
+    def _entries(self):
+        if not self.enabled:
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _evict(self):
+        """Eliminar los resultados menos usados hasta respetar max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def size(self):
+        """Tamaño total de la caché en bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        """Eliminar todos los resultados guardados."""
+        for _, _, name in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    Caché compartida del proceso (se crea en el primer uso).
+
+    Returns:
+        ResultCache
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
@@ -0,0 +1,200 @@
+"""
+Control de Inversiones para VESPY
+=================================
+
+Protocolo común de seguimiento y cancelación para todos los motores de
+inversión (scipy, Gauss-Newton, Occam y PyGIMLi):
+
+- callback(iteration, chi2, model): se llama tras cada iteración con el
+  χ² y el modelo actuales ([espesores, resistividades] en modelos de
+  capas, resistividades en modelos suavizados). Si devuelve True, la
+  inversión termina en esa iteración y devuelve el modelo actual con
+  'stopped': True.
+- CancelToken: cancelación cooperativa desde otro hilo (p. ej. el botón
+  "Cancelar" de la interfaz). El motor la comprueba en cada iteración y
+  devuelve {'success': False, 'cancelled': True, ...}.
+- StoppingCriteria: criterios de parada comunes (χ² objetivo,
+  estancamiento del desajuste y tiempo máximo). Los resultados indican en
+  'stop_reason' qué criterio terminó la inversión (STOP_REASONS).
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+# Motivos de parada que informan los motores en 'stop_reason'
+STOP_REASONS = (
+    'converged',     # Criterio de convergencia propio del motor
+    'max_iter',      # Se alcanzó el máximo de iteraciones
+    'unknown',       # Terminó sin criterio propio conocido (PyGIMLi sin número de iteraciones)
+    'target_chi2',   # χ² ≤ objetivo
+    'stagnation',    # Mejora relativa de χ² < ε durante `patience` iteraciones
+    'time_limit',    # Se agotó el tiempo máximo
+    'callback'       # El callback pidió terminar
+)
+
+
+class InversionCancelled(Exception):
+    """La inversión fue cancelada mediante su CancelToken."""
+
+
+class StopInversion(Exception):
+    """Señal interna: el callback o un criterio de parada pidió terminar la inversión."""
+
+
+class CancelToken:
+    """Testigo de cancelación cooperativa (seguro entre hilos)."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Solicitar la cancelación."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """True si se solicitó la cancelación."""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Lanzar InversionCancelled si se solicitó la cancelación."""
+        if self._event.is_set():
+            raise InversionCancelled("Inversión cancelada")
+
+
+class StoppingCriteria:
+    """
+    Criterios de parada anticipada comunes a todos los motores.
+
+    Admite lotes: check() recibe χ² de forma (N,) y evalúa cada problema
+    por separado, de modo que en una inversión por lotes cada sondeo se
+    detiene en cuanto cumple un criterio.
+
+    Args:
+        target_chi2: Detenerse cuando χ² ≤ target_chi2 (None = desactivado)
+        min_improvement: Mejora relativa mínima de χ² por iteración (ε)
+        patience: Iteraciones consecutivas con mejora < ε antes de detenerse
+        max_time: Tiempo máximo en segundos desde reset() (None = sin límite)
+    """
+
+    def __init__(self, target_chi2=None, min_improvement=None, patience=3, max_time=None):
+        self.target_chi2 = target_chi2
+        self.min_improvement = min_improvement
+        self.patience = patience
+        self.max_time = max_time
+        self.reset()
+
+    def reset(self, n_models=1):
+        """Reiniciar el reloj y el historial (al comenzar cada inversión)."""
+        self._start = time.perf_counter()
+        self._best = np.full(n_models, np.inf)
+        self._stalled = np.zeros(n_models, dtype=int)
+
+    def check(self, chi2):
+        """
+        Evaluar los criterios tras una iteración.
+
+        Args:
+            chi2: χ² actual (escalar o array (N,))
+
+        Returns:
+            Array (N,) de motivos de parada ('' = continuar)
+        """
+        chi2 = np.atleast_1d(np.asarray(chi2, dtype=float))
+        reasons = np.full(chi2.shape, '', dtype=object)
+
+        if self.max_time is not None and time.perf_counter() - self._start >= self.max_time:
+            reasons[:] = 'time_limit'
+
+        if self.min_improvement is not None:
+            with np.errstate(invalid='ignore'):
+                improvement = np.where(np.isfinite(self._best),
+                                       (self._best - chi2) / np.maximum(self._best, 1e-300), np.inf)
+            self._stalled = np.where(improvement < self.min_improvement, self._stalled + 1, 0)
+            reasons[self._stalled >= self.patience] = 'stagnation'
+        self._best = np.minimum(self._best, chi2)
+
+        if self.target_chi2 is not None:
+            reasons[chi2 <= self.target_chi2] = 'target_chi2'
+        return reasons
+
+
+class IterationReporter:
+    """
+    Notificador de iteraciones que combina callback, CancelToken y
+    StoppingCriteria.
+
+    Args:
+        callback: Función callback(iteration, chi2, model) o None
+        cancel_token: CancelToken o None
+        stopping: StoppingCriteria o None
+    """
+
+    def __init__(self, callback=None, cancel_token=None, stopping=None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.stopping = stopping
+        self.stopped = False
+        self.reason = None
+        if stopping is not None:
+            stopping.reset()
+
+    def __call__(self, iteration, chi2, model):
+        """
+        Notificar una iteración.
+
+        Returns:
+            bool: True si el callback o un criterio de parada pidió terminar
+            (el motivo queda en self.reason)
+
+        Raises:
+            InversionCancelled: si el testigo fue cancelado
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        if self.callback is not None and self.callback(iteration, chi2, model):
+            self.stopped, self.reason = True, 'callback'
+        elif self.stopping is not None:
+            reason = self.stopping.check(chi2)[0]
+            if reason:
+                self.stopped, self.reason = True, reason
+        return self.stopped
+
+    def check(self, iteration, chi2, model):
+        """Como __call__, pero lanza StopInversion si hay que terminar."""
+        if self(iteration, chi2, model):
+            raise StopInversion()
+
+    @property
+    def active(self):
+        """True si hay callback, testigo o criterios que atender."""
+        return (self.callback is not None or self.cancel_token is not None
+                or self.stopping is not None)
+
+    def stop_reason(self, converged=True):
+        """Motivo de parada para el informe de resultados (converged=None: 'unknown')."""
+        if self.reason is not None:
+            return self.reason
+        if converged is None:
+            return 'unknown'
+        return 'converged' if converged else 'max_iter'
+
+
+def stopped_early(stop_reason):
+    """True si la inversión terminó antes de su propio criterio de convergencia."""
+    return stop_reason not in ('converged', 'max_iter', 'unknown')
+
+
+def cancelled_result():
+    """Diccionario de resultado de una inversión cancelada."""
+    return {
+        'success': False,
+        'error': "Inversión cancelada",
+        'cancelled': True
+    }
@@ -0,0 +1,179 @@
+"""
+Exploración de Dominios de Equivalencia para VESPY
+==================================================
+
+Las capas delgadas conductoras (tipo H) o resistivas (tipo K) no se
+resuelven de forma única: solo se conserva su conductancia longitudinal
+S = h/ρ (equivalencia S) o su resistencia transversal T = h·ρ
+(equivalencia T). Este módulo muestrea la región del espacio de
+parámetros cuyo desajuste está dentro de una tolerancia del óptimo.
+
+El muestreo parte de la covarianza linealizada (JᵀJ)⁻¹ en ln(p) en el
+modelo convergido, inflada para cubrir los valles alargados de
+equivalencia, y se reajusta en rondas sucesivas a los modelos aceptados.
+Cada ronda evalúa todos sus candidatos con una sola llamada a
+forward_batch.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import numpy as np
+
+from .forward import forward_batch, forward_jacobian
+from .gauss_newton import parameter_bounds
+
+
+# Inflado de la covarianza de la propuesta (en desviaciones típicas)
+PROPOSAL_INFLATION = 1.5
+# Ridge relativo de JᵀJ para que las direcciones no resueltas tengan varianza finita
+RIDGE = 1e-3
+# Variación máx/mín de S y T por debajo de la cual la capa se considera resuelta
+RESOLVED_SPREAD = 1.5
+
+
+def _model_vector(model):
+    """
+    Convertir un resultado de inversión o un array en el vector [espesores, resistividades].
+
+    Acepta las claves 'thickness' (funciones de inversion.py) y 'thicknesses'
+    (VESInverter, con la capa semi-infinita como inf al final, que se descarta).
+    """
+    if isinstance(model, dict):
+        thickness = np.asarray(model['thickness'] if 'thickness' in model else model['thicknesses'],
+                               dtype=float)
+        resistivities = np.asarray(model['resistivities'], dtype=float)
+        if thickness.size == resistivities.size:
+            thickness = thickness[:-1]
+        return np.concatenate([thickness, resistivities])
+    return np.asarray(model, dtype=float)
+
+
+def layer_products(thickness, resistivities):
+    """
+    Conductancia longitudinal S = h/ρ y resistencia transversal T = h·ρ.
+
+    Args:
+        thickness: Array (..., n-1) de espesores
+        resistivities: Array (..., n) de resistividades
+
+    Returns:
+        tuple: (S, T) con forma (..., n-1) para las capas de espesor finito
+    """
+    rho = resistivities[..., :-1]
+    return thickness / rho, thickness * rho
+
+
+def explore_equivalence(ab2, mn2, rhoa, model, tolerance=0.1, n_samples=20000, n_rounds=4,
+                        error=0.03, seed=None):
+    """
+    Muestrear los modelos equivalentes a un modelo convergido.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        model: Resultado de invert_pygimli_discrete / invert_simple_discrete /
+            VESInverter.invert (dict con 'thickness' o 'thicknesses' y
+            'resistivities') o array [espesores, resistividades]
+        tolerance: Aumento relativo de χ² admitido sobre el óptimo
+        n_samples: Candidatos totales (repartidos entre las rondas)
+        n_rounds: Rondas de muestreo; cada una adapta la propuesta a los aceptados
+        error: Error relativo de los datos (por defecto 3%)
+        seed: Semilla del generador
+
+    Returns:
+        dict: models (K, 2n-1) aceptados, chi2 (K,), chi2_optimum, threshold,
+        ranges de thickness/depths/resistivities/conductance/transverse_resistance
+        (2, ·) con mínimo y máximo, spread de S y T (máx/mín), equivalence_type
+        por capa ('S', 'T' o '-' si está resuelta), acceptance
+    """
+    try:
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+        optimum = _model_vector(model)
+        n_params = len(optimum)
+        n_layers = (n_params + 1) // 2
+
+        log_data = np.log(rhoa)
+        weights = 1.0 / np.broadcast_to(np.asarray(error, dtype=float), rhoa.shape)
+        lower, upper = parameter_bounds(ab2, n_layers)
+
+        def misfit(models):
+            residual = (log_data - np.log(forward_batch(ab2, mn2, models))) * weights
+            return np.mean(residual**2, axis=1)
+
+        center = np.log(optimum)
+        response, jacobian = forward_jacobian(ab2, mn2, optimum)
+        chi2_optimum = float(np.mean(((log_data - np.log(response)) * weights)**2))
+        threshold = chi2_optimum * (1.0 + tolerance)
+
+        # Covarianza linealizada de ln(p) (χ² por dato: la Hessiana es JᵀWᵀWJ / M)
+        jw = jacobian * weights[:, None]
+        hessian = jw.T @ jw / len(rhoa)
+        hessian += RIDGE * np.trace(hessian) / n_params * np.eye(n_params)
+        # Cambio de χ² por dato admitido → escala de la elipse de tolerancia
+        covariance = np.linalg.inv(hessian) * (threshold - chi2_optimum)
+        covariance *= PROPOSAL_INFLATION**2
+
+        rng = np.random.default_rng(seed)
+        batch = max(1, n_samples // n_rounds)
+        accepted = [center[None, :]]
+        accepted_chi2 = [np.array([chi2_optimum])]
+        n_tried = 0
+
+        for _ in range(n_rounds):
+            factor = np.linalg.cholesky(covariance + 1e-12 * np.eye(n_params))
+            candidates = center + rng.standard_normal((batch, n_params)) @ factor.T
+            candidates = candidates[np.all((candidates >= lower) & (candidates <= upper), axis=1)]
+            n_tried += batch
+            if len(candidates):
+                chi2 = misfit(np.exp(candidates))
+                keep = chi2 <= threshold
+                accepted.append(candidates[keep])
+                accepted_chi2.append(chi2[keep])
+
+            # La siguiente ronda cubre la forma de la región aceptada hasta ahora
+            pool = np.concatenate(accepted)
+            if len(pool) > n_params:
+                covariance = np.cov(pool, rowvar=False) * PROPOSAL_INFLATION**2
+
+        log_models = np.concatenate(accepted)
+        chi2 = np.concatenate(accepted_chi2)
+        models = np.exp(log_models)
+        thickness = models[:, :n_layers - 1]
+        resistivities = models[:, n_layers - 1:]
+        conductance, transverse = layer_products(thickness, resistivities)
+
+        def span(values):
+            return np.vstack([values.min(axis=0), values.max(axis=0)])
+
+        s_spread = conductance.max(axis=0) / conductance.min(axis=0)
+        t_spread = transverse.max(axis=0) / transverse.min(axis=0)
+        # La capa es equivalente en S si S varía menos que T entre los modelos aceptados
+        equivalence_type = np.where(s_spread <= t_spread, 'S', 'T')
+        equivalence_type[np.maximum(s_spread, t_spread) < RESOLVED_SPREAD] = '-'
+
+        return {
+            'success': True,
+            'models': models,
+            'chi2': chi2,
+            'chi2_optimum': chi2_optimum,
+            'threshold': threshold,
+            'thickness': span(thickness),
+            'depths': span(np.cumsum(thickness, axis=1)),
+            'resistivities': span(resistivities),
+            'conductance': span(conductance),
+            'transverse_resistance': span(transverse),
+            'conductance_spread': s_spread,
+            'transverse_spread': t_spread,
+            'equivalence_type': equivalence_type,
+            'acceptance': (len(models) - 1) / max(n_tried, 1),
+            'n_models': len(models)
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
@@ -0,0 +1,488 @@
+"""
+Modelado Directo 1D para VESPY
+==============================
+
+Respuesta de un medio estratificado (capas horizontales) para el
+dispositivo Schlumberger, sin depender de PyGIMLi:
+
+- Transformada de resistividad por recurrencia de Pekeris
+- Filtro digital lineal para la transformada de Hankel (J0)
+- Evaluación vectorizada para todos los AB/2 en una sola llamada
+- Términos geométricos precalculados y memorizados por geometría
+  (ForwardGeometry), con una caché LRU de respuestas recientes
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+
+# Paso del filtro en ln(λ·r): 10 puntos por década
+FILTER_DELTA = np.log(10) / 10
+# Rango de índices del filtro (91 coeficientes)
+FILTER_RANGE = (-60, 30)
+# Fracción de la banda que se conserva sin atenuar
+FILTER_TAPER = 0.65
+# Relación MN/2 : AB/2 usada para el límite Schlumberger ideal
+IDEAL_MN_RATIO = 1e-3
+# Geometrías (tablas AB/2, MN/2) distintas conservadas en memoria
+GEOMETRY_CACHE_SIZE = 64
+# Respuestas recientes conservadas por geometría
+RESPONSE_CACHE_SIZE = 256
+# Elementos (modelos × abscisas) por bloque del jacobiano por lotes
+JACOBIAN_CHUNK = 50_000
+
+
+@lru_cache(maxsize=None)
+def hankel_j0_filter(delta=FILTER_DELTA, n_min=FILTER_RANGE[0], n_max=FILTER_RANGE[1],
+                     taper=FILTER_TAPER):
+    """
+    Diseñar el filtro digital de la transformada de Hankel de orden 0.
+
+    Aproxima ∫ f(λ) J0(λr) dλ ≈ (1/r) Σ w_i f(b_i / r). Los pesos se
+    obtienen de la transformada de Mellin de J0 limitada en banda
+    (interpolación sinc en ln λ) con una ventana coseno en el borde.
+    Las colas truncadas se suman a los coeficientes extremos para que
+    un semiespacio homogéneo se reproduzca exactamente.
+
+    Args:
+        delta: Paso del muestreo en ln(λ·r)
+        n_min: Índice inicial del filtro
+        n_max: Índice final del filtro
+        taper: Fracción de la banda sin atenuar (0-1)
+
+    Returns:
+        tuple: (abscisas b_i, pesos w_i) como arrays de solo lectura
+    """
+    from scipy.special import loggamma
+
+    omega_max = np.pi / delta
+    omega = np.linspace(0.0, omega_max, 8001)
+    d_omega = omega[1] - omega[0]
+
+    # Transformada de Mellin de J0: ∫ u^(z-1) J0(u) du con z = 1 - iω
+    z = 1.0 - 1j * omega
+    spectrum = np.exp((z - 1) * np.log(2) + loggamma(z / 2) - loggamma(1 - z / 2))
+
+    x = np.clip((omega / omega_max - taper) / (1 - taper), 0, 1)
+    spectrum = spectrum * np.cos(np.pi / 2 * x) ** 2
+
+    # Rango amplio para poder plegar las colas sobre los extremos
+    n_wide = np.arange(5 * n_min, 5 * n_max + 1)
+    integrand = (spectrum[None, :] * np.exp(1j * np.outer(n_wide * delta, omega))).real
+    weights = delta / np.pi * d_omega * (integrand.sum(axis=1)
+                                         - 0.5 * (integrand[:, 0] + integrand[:, -1]))
+
+    keep = (n_wide >= n_min) & (n_wide <= n_max)
+    kept = weights[keep].copy()
+    kept[0] += weights[n_wide < n_min].sum()
+    kept[-1] += weights[n_wide > n_max].sum()
+
+    base = np.exp(n_wide[keep] * delta)
+    base.flags.writeable = False
+    kept.flags.writeable = False
+    return base, kept
+
+
+def resistivity_transform(lam, thicknesses, resistivities):
+    """
+    Transformada de resistividad T(λ) por recurrencia de Pekeris.
+
+    Admite lotes de modelos: si thicknesses tiene forma (..., n-1) y
+    resistivities (..., n), el resultado tiene forma (..., *lam.shape).
+
+    Args:
+        lam: Array de números de onda λ (cualquier forma)
+        thicknesses: Espesores de las capas (..., n-1)
+        resistivities: Resistividades de las capas (..., n)
+
+    Returns:
+        Array T(λ) con forma (..., *lam.shape)
+    """
+    lam = np.asarray(lam, dtype=float)
+    thicknesses = np.asarray(thicknesses, dtype=float)
+    resistivities = np.asarray(resistivities, dtype=float)
+
+    expand = (Ellipsis,) + (None,) * lam.ndim
+    batch_shape = resistivities.shape[:-1]
+
+    transform = np.empty(batch_shape + lam.shape)
+    transform[...] = resistivities[..., -1][expand]
+    th = np.empty_like(transform)
+    den = np.empty_like(transform)
+    for i in range(resistivities.shape[-1] - 2, -1, -1):
+        rho = resistivities[..., i][expand]
+        # T_i = ρ_i (T + ρ_i t) / (ρ_i + T t),  t = tanh(λ h_i)
+        np.multiply(lam, thicknesses[..., i][expand], out=th)
+        np.tanh(th, out=th)
+        np.multiply(transform, th, out=den)
+        den += rho
+        th *= rho
+        transform += th
+        transform *= rho
+        transform /= den
+
+    return transform
+
+
+def _check_geometry(ab2, mn2):
+    """Validar y normalizar la geometría Schlumberger."""
+    ab2 = np.atleast_1d(np.asarray(ab2, dtype=float))
+    if mn2 is None:
+        mn2 = ab2 * IDEAL_MN_RATIO
+    else:
+        mn2 = np.broadcast_to(np.asarray(mn2, dtype=float), ab2.shape)
+
+    if np.any(ab2 <= 0) or np.any(mn2 <= 0):
+        raise ValueError("AB/2 y MN/2 deben ser positivos")
+    if np.any(mn2 >= ab2):
+        raise ValueError("MN/2 debe ser menor que AB/2 en el dispositivo Schlumberger")
+
+    return ab2, mn2
+
+
+class ForwardGeometry:
+    """
+    Términos del modelado directo que solo dependen de AB/2 y MN/2.
+
+    Precalcula las abscisas λ del filtro para cada distancia electrodo
+    (sin repetir las que coinciden entre distancias), los pesos divididos
+    por la distancia y el factor geométrico. Conserva además las últimas
+    respuestas de modelos individuales (LRU acotada).
+
+    Se obtiene con forward_geometry(), que reutiliza la misma instancia
+    para tablas de espaciamientos idénticas.
+    """
+
+    def __init__(self, ab2, mn2=None):
+        """
+        Args:
+            ab2: Array (M,) de espaciamientos AB/2
+            mn2: Array (M,) de espaciamientos MN/2 (None = Schlumberger ideal)
+        """
+        ab2, mn2 = _check_geometry(ab2, mn2)
+        base, weights = hankel_j0_filter()
+
+        r = np.concatenate([ab2 - mn2, ab2 + mn2])
+        lam = base[None, :] / r[:, None]
+
+        # Distancias en razón 10^(k/10) comparten abscisas: T(λ) se evalúa una vez
+        grid = np.round(np.log(lam) / FILTER_DELTA * 1e8).astype(np.int64)
+        _, first, inverse = np.unique(grid.ravel(), return_index=True, return_inverse=True)
+        if len(first) < lam.size:
+            self.lam = lam.ravel()[first]
+            self.index = inverse.reshape(lam.shape)
+        else:
+            self.lam = lam
+            self.index = None
+
+        self.ab2 = ab2
+        self.mn2 = mn2
+        self.n_spacings = len(ab2)
+        self.weights = weights
+        self.r = r
+        self.factor = (ab2**2 - mn2**2) / (2 * mn2)
+
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expand(self, values):
+        """Pasar de las abscisas únicas a la malla (2M, n_filtro)."""
+        if self.index is None:
+            return values
+        return values[..., self.index]
+
+    def _combine(self, transform):
+        """Aplicar el filtro y combinar los potenciales de A y B."""
+        n = self.n_spacings
+        potential = self._expand(transform) @ self.weights / self.r
+        return self.factor * (potential[..., :n] - potential[..., n:])
+
+    def apparent_resistivity(self, thicknesses, resistivities):
+        """
+        Resistividad aparente de uno o varios modelos (..., n).
+
+        Args:
+            thicknesses: Espesores (..., n-1)
+            resistivities: Resistividades (..., n)
+
+        Returns:
+            Array (..., M) de resistividades aparentes
+        """
+        return self._combine(resistivity_transform(self.lam, thicknesses, resistivities))
+
+    def response(self, thicknesses, resistivities):
+        """
+        Resistividad aparente de un único modelo, usando la caché LRU.
+
+        Args:
+            thicknesses: Espesores (n-1)
+            resistivities: Resistividades (n)
+
+        Returns:
+            Array (M,) de resistividades aparentes (copia)
+        """
+        key = np.concatenate([np.ravel(thicknesses), np.ravel(resistivities)]).astype(float).tobytes()
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                return cached.copy()
+
+        result = self.apparent_resistivity(thicknesses, resistivities)
+
+        with self._lock:
+            self._responses[key] = result
+            if len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return result.copy()
+
+    def jacobian(self, thicknesses, resistivities):
+        """
+        Respuesta y derivadas respecto a ln(h) y ln(ρ) de un lote de modelos.
+
+        Args:
+            thicknesses: Espesores (N, n-1)
+            resistivities: Resistividades (N, n)
+
+        Returns:
+            tuple: (respuesta (N, M), derivadas (P, N, M))
+        """
+        n_models, n_params = resistivities.shape[0], 2 * resistivities.shape[-1] - 1
+        # Bloques de modelos con ~JACOBIAN_CHUNK elementos por derivada: los
+        # temporales (P + n por abscisa) permanecen en caché
+        chunk = max(1, JACOBIAN_CHUNK // self.lam.size)
+        if n_models <= chunk:
+            transform, d_transform = _transform_jacobian(self.lam, thicknesses, resistivities)
+            return self._combine(transform), self._combine(d_transform)
+
+        response = np.empty((n_models, self.n_spacings))
+        d_response = np.empty((n_params, n_models, self.n_spacings))
+        for start in range(0, n_models, chunk):
+            stop = start + chunk
+            transform, d_transform = _transform_jacobian(
+                self.lam, thicknesses[start:stop], resistivities[start:stop]
+            )
+            response[start:stop] = self._combine(transform)
+            d_response[:, start:stop] = self._combine(d_transform)
+        return response, d_response
+
+
+def forward_geometry(ab2, mn2=None):
+    """
+    Obtener el precálculo de una geometría (reutilizado si ya existe).
+
+    Args:
+        ab2: Array de espaciamientos AB/2
+        mn2: Array de espaciamientos MN/2 (None = Schlumberger ideal)
+
+    Returns:
+        ForwardGeometry
+    """
+    ab2 = np.ascontiguousarray(np.atleast_1d(ab2), dtype=float)
+    if mn2 is not None:
+        mn2 = np.ascontiguousarray(np.broadcast_to(np.asarray(mn2, dtype=float), ab2.shape))
+        return _cached_geometry(ab2.tobytes(), mn2.tobytes())
+    return _cached_geometry(ab2.tobytes(), None)
+
+
+@lru_cache(maxsize=GEOMETRY_CACHE_SIZE)
+def _cached_geometry(ab2_bytes, mn2_bytes):
+    ab2 = np.frombuffer(ab2_bytes)
+    mn2 = None if mn2_bytes is None else np.frombuffer(mn2_bytes)
+    return ForwardGeometry(ab2, mn2)
+
+
+def schlumberger_forward(ab2, mn2, thicknesses, resistivities):
+    """
+    Resistividad aparente Schlumberger de un modelo de capas.
+
+    Calcula el potencial de cada electrodo de corriente con el filtro
+    de Hankel y combina las cuatro distancias A-M, A-N, B-M, B-N:
+
+        ρa = (s² - m²) / (2m) · [I(s - m) - I(s + m)],  I(r) = ∫ T(λ) J0(λr) dλ
+
+    Args:
+        ab2: Array de espaciamientos AB/2
+        mn2: Array de espaciamientos MN/2 (None = Schlumberger ideal)
+        thicknesses: Espesores de las capas (n-1)
+        resistivities: Resistividades de las capas (n)
+
+    Returns:
+        Array de resistividades aparentes (una por AB/2)
+    """
+    geometry = forward_geometry(ab2, mn2)
+    if np.ndim(resistivities) == 1:
+        return geometry.response(thicknesses, resistivities)
+    return geometry.apparent_resistivity(thicknesses, resistivities)
+
+
+def split_models(models):
+    """
+    Separar una matriz de modelos en espesores y resistividades.
+
+    Cada fila sigue la convención de PyGIMLi: [h_1 .. h_(n-1), ρ_1 .. ρ_n].
+
+    Args:
+        models: Array (N, 2n-1) o (2n-1,) de modelos
+
+    Returns:
+        tuple: (espesores (N, n-1), resistividades (N, n))
+    """
+    models = np.asarray(models, dtype=float)
+    n_params = models.shape[-1]
+    if n_params % 2 == 0:
+        raise ValueError("Cada modelo debe tener 2n-1 parámetros (espesores y resistividades)")
+    n_layers = (n_params + 1) // 2
+    return models[..., :n_layers - 1], models[..., n_layers - 1:]
+
+
+def forward_batch(ab2, mn2, models, chunk_size=None):
+    """
+    Modelado directo de muchos modelos sobre la misma geometría.
+
+    La transformada de resistividad y el filtro se evalúan para todo el
+    lote a la vez (sin bucle por modelo). Para acotar la memoria, el lote
+    se procesa en bloques de chunk_size modelos.
+
+    Args:
+        ab2: Array (M,) de espaciamientos AB/2
+        mn2: Array (M,) de espaciamientos MN/2 (None = Schlumberger ideal)
+        models: Array (N, 2n-1) de modelos [espesores, resistividades]
+        chunk_size: Modelos por bloque (None = automático)
+
+    Returns:
+        Array (N, M) de resistividades aparentes
+    """
+    geometry = forward_geometry(ab2, mn2)
+    models = np.atleast_2d(np.asarray(models, dtype=float))
+    thicknesses, resistivities = split_models(models)
+
+    if chunk_size is None:
+        # ~300 mil elementos por bloque: los temporales caben en caché
+        chunk_size = max(1, 300_000 // (geometry.r.size * len(geometry.weights)))
+
+    n_models = models.shape[0]
+    if n_models <= chunk_size:
+        return geometry.apparent_resistivity(thicknesses, resistivities)
+
+    result = np.empty((n_models, geometry.n_spacings))
+    for start in range(0, n_models, chunk_size):
+        stop = start + chunk_size
+        result[start:stop] = geometry.apparent_resistivity(
+            thicknesses[start:stop], resistivities[start:stop]
+        )
+    return result
+
+
+def _transform_jacobian(lam, thicknesses, resistivities):
+    """
+    Transformada T(λ) y sus derivadas respecto a ln(h) y ln(ρ).
+
+    La recurrencia de Pekeris se evalúa de abajo hacia arriba guardando las
+    derivadas locales de cada capa; la regla de la cadena hasta la
+    superficie es el producto acumulado de ∂T_j/∂T_(j+1) desde arriba, por
+    lo que el coste es lineal en el número de capas.
+
+    Returns:
+        tuple: (T con forma (..., *lam.shape), dT con forma (P, ..., *lam.shape))
+    """
+    lam = np.asarray(lam, dtype=float)
+    thicknesses = np.asarray(thicknesses, dtype=float)
+    resistivities = np.asarray(resistivities, dtype=float)
+
+    expand = (Ellipsis,) + (None,) * lam.ndim
+    n_layers = resistivities.shape[-1]
+    shape = resistivities.shape[:-1] + lam.shape
+
+    transform = np.empty(shape)
+    transform[...] = resistivities[..., -1][expand]
+    d_transform = np.empty((2 * n_layers - 1,) + shape)
+    # ∂T_i/∂T_(i+1) de cada capa; se convierte en el producto acumulado
+    chain = np.empty((n_layers,) + shape)
+    chain[0] = 1.0
+    d_transform[-1] = transform
+
+    for i in range(n_layers - 2, -1, -1):
+        rho = resistivities[..., i][expand]
+        h = thicknesses[..., i][expand]
+        t = np.tanh(lam * h)
+        den = rho + transform * t
+        inv_den2 = 1.0 / den**2
+
+        chain[i + 1] = rho**2 * (1 - t**2) * inv_den2
+        d_t = rho * (rho**2 - transform**2) * inv_den2
+        d_rho = t * (transform**2 + rho**2 + 2 * rho * transform * t) * inv_den2
+
+        d_transform[i] = d_t * lam * h * (1 - t**2)
+        d_transform[n_layers - 1 + i] = d_rho * rho
+        transform = rho * (transform + rho * t) / den
+
+    # chain[i] = ∂T_0/∂T_i = Π_(j<i) ∂T_j/∂T_(j+1)
+    np.cumprod(chain, axis=0, out=chain)
+    d_transform[:n_layers - 1] *= chain[:n_layers - 1]
+    d_transform[n_layers - 1:] *= chain
+
+    return transform, d_transform
+
+
+def forward_jacobian(ab2, mn2, models):
+    """
+    Respuesta y jacobiano analítico de log(ρa) respecto a log(parámetros).
+
+    J[k, j] = ∂ ln ρa_k / ∂ ln p_j, con p = [h_1 .. h_(n-1), ρ_1 .. ρ_n].
+    Al ser un cociente de logaritmos, es el mismo en log10. El cálculo es
+    exacto (no usa diferencias finitas) y cuesta aproximadamente lo mismo
+    que 2-3 evaluaciones del modelado directo.
+
+    Args:
+        ab2: Array (M,) de espaciamientos AB/2
+        mn2: Array (M,) de espaciamientos MN/2 (None = Schlumberger ideal)
+        models: Array (2n-1,) o (N, 2n-1) de modelos
+
+    Returns:
+        tuple: (respuesta (N, M), jacobiano (N, M, 2n-1)); sin la
+        dimensión N si models es un único modelo
+    """
+    geometry = forward_geometry(ab2, mn2)
+    models = np.asarray(models, dtype=float)
+    single = models.ndim == 1
+    thicknesses, resistivities = split_models(np.atleast_2d(models))
+
+    response, d_response = geometry.jacobian(thicknesses, resistivities)
+
+    # (P, N, M) -> (N, M, P), normalizado a derivada logarítmica
+    jacobian = np.moveaxis(d_response, 0, -1) / response[..., None]
+
+    if single:
+        return response[0], jacobian[0]
+    return response, jacobian
+
+
+def starting_thicknesses(ab2, n_layers):
+    """
+    Espesores iniciales con interfaces equiespaciadas en log(profundidad).
+
+    Las interfaces van de AB/2 mínimo a AB/2 máximo / 3 (regla empírica
+    de profundidad de investigación), de modo que un modelo homogéneo
+    inicial tenga gradiente no nulo respecto a todos los espesores.
+
+    Args:
+        ab2: Array de espaciamientos AB/2
+        n_layers: Número de capas del modelo
+
+    Returns:
+        Array de n_layers - 1 espesores
+    """
+    ab2 = np.asarray(ab2, dtype=float)
+    if n_layers < 2:
+        return np.array([])
+    top = ab2.min()
+    bottom = max(ab2.max() / 3, top * 1.5)
+    interfaces = np.logspace(np.log10(top), np.log10(bottom), n_layers - 1)
+    return np.diff(np.concatenate(([0.0], interfaces)))
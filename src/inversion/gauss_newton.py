@@ -0,0 +1,263 @@
+"""
+Inversión Gauss-Newton / Levenberg-Marquardt para VESPY
+=======================================================
+
+Inversión discreta de modelos de capas con el jacobiano analítico del
+modelado directo nativo (sin PyGIMLi y sin diferencias finitas).
+
+El núcleo trabaja sobre lotes: N problemas (modelos iniciales y/o datos)
+se iteran simultáneamente con una sola evaluación de jacobiano y una de
+modelado directo por iteración para todo el lote.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import numpy as np
+
+from .control import InversionCancelled, IterationReporter, cancelled_result, stopped_early
+from .forward import forward_jacobian, starting_thicknesses
+
+
+# Límites de los parámetros (escala lineal)
+RESISTIVITY_BOUNDS = (0.1, 1e5)
+# Paso máximo por iteración en ln(p) (un factor ~e² por parámetro)
+MAX_STEP = 2.0
+
+
+def parameter_bounds(ab2, n_layers):
+    """
+    Límites en ln(p) para espesores y resistividades.
+
+    Args:
+        ab2: Array de espaciamientos AB/2
+        n_layers: Número de capas
+
+    Returns:
+        tuple: (límite inferior, límite superior) como arrays (2n-1,)
+    """
+    ab2 = np.asarray(ab2, dtype=float)
+    thk_lo, thk_hi = np.log(ab2.min() / 100), np.log(ab2.max() * 10)
+    rho_lo, rho_hi = np.log(RESISTIVITY_BOUNDS[0]), np.log(RESISTIVITY_BOUNDS[1])
+    lower = np.array([thk_lo] * (n_layers - 1) + [rho_lo] * n_layers)
+    upper = np.array([thk_hi] * (n_layers - 1) + [rho_hi] * n_layers)
+    return lower, upper
+
+
+def starting_model(ab2, rhoa, n_layers):
+    """
+    Modelo inicial homogéneo (mediana de ρa) con interfaces log-espaciadas.
+
+    Args:
+        ab2: Array de espaciamientos AB/2
+        rhoa: Array de resistividades aparentes
+        n_layers: Número de capas
+
+    Returns:
+        Array (2n-1,) [espesores, resistividades]
+    """
+    return np.concatenate([
+        starting_thicknesses(ab2, n_layers),
+        np.full(n_layers, np.median(rhoa))
+    ])
+
+
+def levenberg_marquardt(ab2, mn2, rhoa, start_models, error=0.03, max_iter=30,
+                        tol=1e-3, damping=1.0, bounds=None, callback=None, cancel_token=None,
+                        stopping=None):
+    """
+    Levenberg-Marquardt amortiguado en ln(p) para un lote de problemas.
+
+    Minimiza Σ [(ln d - ln f(m)) / error]² para cada fila. En cada
+    iteración se resuelve (JᵀJ + μ·[diag(JᵀJ) + εI]) δ = Jᵀr; si el paso reduce
+    la desadecuación se acepta y μ disminuye, si no μ aumenta.
+
+    Args:
+        ab2: Array (M,) de AB/2
+        mn2: Array (M,) de MN/2 (None = Schlumberger ideal)
+        rhoa: Array (M,) o (N, M) de resistividades aparentes
+        start_models: Array (N, 2n-1) de modelos iniciales (escala lineal)
+        error: Error relativo de los datos (escalar o array)
+        max_iter: Máximo de iteraciones
+        tol: Cambio relativo de χ² para declarar convergencia
+        damping: Amortiguamiento inicial μ
+        bounds: Tupla (inferior, superior) en ln(p) (None = automático)
+        callback: callback(iteration, chi2 (N,), models (N, 2n-1)); True = terminar
+        cancel_token: CancelToken (lanza InversionCancelled al cancelarse)
+        stopping: StoppingCriteria evaluados por problema (cada uno se detiene
+            por separado; 'time_limit' detiene todo el lote)
+
+    Returns:
+        dict: models (N, 2n-1), response (N, M), chi2 (N,), n_iter (N,),
+        converged (N,), n_forward (evaluaciones del modelado directo),
+        stop_reason (N,) y stopped (el callback pidió terminar)
+    """
+    start_models = np.atleast_2d(np.asarray(start_models, dtype=float))
+    n_models, n_params = start_models.shape
+    n_layers = (n_params + 1) // 2
+
+    log_data = np.log(np.broadcast_to(np.asarray(rhoa, dtype=float),
+                                      (n_models, len(ab2))))
+    weights = 1.0 / np.broadcast_to(np.asarray(error, dtype=float), log_data.shape)
+
+    if bounds is None:
+        bounds = parameter_bounds(ab2, n_layers)
+    lower, upper = bounds
+
+    m = np.clip(np.log(start_models), lower, upper)
+    response, jacobian = forward_jacobian(ab2, mn2, np.exp(m))
+    n_forward = 1
+    residual = (log_data - np.log(response)) * weights
+    phi = np.sum(residual**2, axis=1)
+
+    mu = np.full(n_models, float(damping))
+    n_iter = np.zeros(n_models, dtype=int)
+    converged = np.zeros(n_models, dtype=bool)
+    active = np.ones(n_models, dtype=bool)
+    eye = np.eye(n_params)
+    reporter = IterationReporter(callback, cancel_token)
+    stop_reason = np.full(n_models, '', dtype=object)
+    if stopping is not None:
+        stopping.reset(n_models)
+
+    for iteration in range(1, max_iter + 1):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        jw = jacobian[idx] * weights[idx, :, None]
+        jtj = np.einsum('nmi,nmj->nij', jw, jw)
+        grad = np.einsum('nmi,nm->ni', jw, residual[idx])
+        diag = np.einsum('nii->ni', jtj)
+        # Marquardt (diag) más un término de Levenberg que evita pasos enormes
+        # en parámetros casi insensibles (p. ej. capas muy delgadas)
+        ridge = 1e-2 * diag.mean(axis=1)[:, None, None] * eye
+        lhs = jtj + mu[idx, None, None] * (diag[:, :, None] * eye + ridge)
+        step = np.linalg.solve(lhs, grad[..., None])[..., 0]
+
+        # Limitar el paso para mantener la estabilidad en modelos con muchas capas
+        scale = np.maximum(np.abs(step).max(axis=1) / MAX_STEP, 1.0)
+        trial = np.clip(m[idx] + step / scale[:, None], lower, upper)
+
+        trial_response, trial_jacobian = forward_jacobian(ab2, mn2, np.exp(trial))
+        n_forward += 1
+        trial_residual = (log_data[idx] - np.log(trial_response)) * weights[idx]
+        trial_phi = np.sum(trial_residual**2, axis=1)
+
+        n_iter[idx] += 1
+        accept = trial_phi < phi[idx]
+        acc = idx[accept]
+        rej = idx[~accept]
+
+        improvement = (phi[acc] - trial_phi[accept]) / np.maximum(phi[acc], 1e-300)
+        m[acc] = trial[accept]
+        response[acc] = trial_response[accept]
+        jacobian[acc] = trial_jacobian[accept]
+        residual[acc] = trial_residual[accept]
+        phi[acc] = trial_phi[accept]
+        mu[acc] = np.maximum(mu[acc] / 3.0, 1e-6)
+        mu[rej] *= 4.0
+
+        # Convergencia: mejora relativa pequeña o ajuste prácticamente exacto
+        done = (improvement < tol) | (trial_phi[accept] < 1e-8 * log_data.shape[1])
+        converged[acc[done]] = True
+        active[acc[done]] = False
+        # Amortiguamiento saturado: no hay paso que mejore el ajuste
+        stalled = rej[mu[rej] > 1e8]
+        converged[stalled] = True
+        active[stalled] = False
+        stop_reason[converged & (stop_reason == '')] = 'converged'
+
+        if stopping is not None:
+            reasons = stopping.check(phi / log_data.shape[1])
+            halted = active & (reasons != '')
+            stop_reason[halted] = reasons[halted]
+            active[halted] = False
+
+        if reporter.active and reporter(iteration, phi / log_data.shape[1], np.exp(m)):
+            stop_reason[active] = 'callback'
+            break
+
+    stop_reason[stop_reason == ''] = 'max_iter'
+
+    return {
+        'models': np.exp(m),
+        'response': response,
+        'chi2': phi / log_data.shape[1],
+        'n_iter': n_iter,
+        'converged': converged,
+        'n_forward': n_forward,
+        'stop_reason': stop_reason,
+        'stopped': reporter.stopped
+    }
+
+
+def invert_gauss_newton(ab2, mn2, rhoa, n_layers, start_model=None, error=0.03,
+                        max_iter=30, tol=1e-3, damping=1.0, callback=None, cancel_token=None,
+                        stopping=None):
+    """
+    Inversión discreta Gauss-Newton/Levenberg-Marquardt (sin PyGIMLi).
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        n_layers: Número de capas
+        start_model: Modelo inicial [espesores, resistividades] (opcional)
+        error: Error relativo de los datos (por defecto 3%)
+        max_iter: Máximo de iteraciones
+        tol: Cambio relativo de χ² para declarar convergencia
+        damping: Amortiguamiento inicial de Marquardt
+        callback: callback(iteration, chi2, model) tras cada iteración; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+
+    Returns:
+        dict: Resultados de inversión con modelo discreto y stop_reason
+    """
+    try:
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+        if start_model is None:
+            start_model = starting_model(ab2, rhoa, n_layers)
+
+        batch_callback = None
+        if callback is not None:
+            # El núcleo por lotes informa arrays (N,); aquí N = 1
+            def batch_callback(iteration, chi2, models):
+                return callback(iteration, chi2[0], models[0])
+
+        result = levenberg_marquardt(ab2, mn2, rhoa, start_model, error=error,
+                                     max_iter=max_iter, tol=tol, damping=damping,
+                                     callback=batch_callback, cancel_token=cancel_token,
+                                     stopping=stopping)
+
+        model = result['models'][0]
+        thickness = model[:n_layers - 1]
+        resistivities = model[n_layers - 1:]
+        depths = np.cumsum(thickness)
+
+        return {
+            'success': True,
+            'thickness': thickness,
+            'depths': depths,
+            'resistivities': resistivities,
+            'max_depth': np.max(ab2) / 3,
+            'chi2': result['chi2'][0],
+            'response': result['response'][0],
+            'n_iter': int(result['n_iter'][0]),
+            'n_forward': result['n_forward'],
+            'converged': bool(result['converged'][0]),
+            'stop_reason': result['stop_reason'][0],
+            'stopped': stopped_early(result['stop_reason'][0]),
+            'method': 'gauss_newton'
+        }
+
+    except InversionCancelled:
+        return cancelled_result()
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
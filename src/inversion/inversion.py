@@ -10,9 +10,77 @@ Autor: VESPY Team
 Fecha: 2025
 """
 
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
+
+from utils.lazy import pygimli_available
+from .forward import schlumberger_forward, forward_batch, starting_thicknesses
+from .gauss_newton import invert_gauss_newton
+from .cache import default_cache
+from .occam import invert_occam
+from .control import (InversionCancelled, StopInversion, IterationReporter, cancelled_result,
+                      stopped_early)
+from .robust import invert_robust
+from .scheme import default_mn2, schlumberger_scheme
+
+# Iteraciones máximas por defecto de PyGIMLi (maxIter de pg.Inversion)
+PYGIMLI_MAX_ITER = 20
+# Métodos de VESInverter.invert
+INVERTER_METHODS = ('auto', 'pygimli', 'simple', 'gauss_newton')
+
+# VESManager reutilizables por número de capas y operadores VESRhoModelling por
+# tabla (AB/2, MN/2, espesores) (None = uno nuevo por inversión). Solo se activa
+# en los procesos del pool persistente (ver pool.py): en el proceso de la
+# interfaz el resultado conserva su propio 'ves_manager'.
+_reusable_managers = None
+_reusable_operators = None
+# Operadores VESRhoModelling conservados por proceso
+OPERATOR_CACHE_SIZE = 16
+
+
+def enable_manager_reuse():
+    """Reutilizar los VESManager y operadores VESRhoModelling de PyGIMLi en este proceso."""
+    global _reusable_managers, _reusable_operators
+    if _reusable_managers is None:
+        _reusable_managers = {}
+        _reusable_operators = OrderedDict()
+
+
+def _ves_manager(n_layers):
+    """VESManager para una inversión (reutilizado si el proceso lo permite)."""
+    from pygimli.physics import ves
+    
+    if _reusable_managers is None:
+        return ves.VESManager()
+    manager = _reusable_managers.get(n_layers)
+    if manager is None:
+        manager = _reusable_managers[n_layers] = ves.VESManager()
+    else:
+        # Sin restos de la inversión anterior
+        manager.inv.setPostStep(None)
+    return manager
+
+
+def _smooth_operator(thk, ab2, mn2):
+    """VESRhoModelling para una inversión suavizada (reutilizado si el proceso lo permite)."""
+    from pygimli.physics.ves import VESRhoModelling
+    
+    if _reusable_operators is None:
+        return VESRhoModelling(thk=thk, ab2=ab2, mn2=mn2)
+    key = tuple(np.ascontiguousarray(values, dtype=float).tobytes() for values in (thk, ab2, mn2))
+    operator = _reusable_operators.get(key)
+    if operator is None:
+        operator = _reusable_operators[key] = VESRhoModelling(thk=thk, ab2=ab2, mn2=mn2)
+        if len(_reusable_operators) > OPERATOR_CACHE_SIZE:
+            _reusable_operators.popitem(last=False)
+    else:
+        _reusable_operators.move_to_end(key)
+    return operator
+
 
 class VESInverter:
     """Inversor de datos SEV"""
@@ -22,16 +90,15 @@ class VESInverter:
         self._check_pygimli()
     
     def _check_pygimli(self):
-        """Verificar si PyGIMLi está disponible"""
-        try:
-            import pygimli as pg
-            self.use_pygimli = True
+        """Verificar si PyGIMLi está disponible (detección cacheada por proceso)"""
+        self.use_pygimli = pygimli_available()
+        if self.use_pygimli:
             print("✅ PyGIMLi disponible - usando inversión avanzada")
-        except ImportError:
-            self.use_pygimli = False
+        else:
             print("⚠️ PyGIMLi no disponible - usando inversión simple")
     
-    def invert(self, data: pd.DataFrame, num_layers=3, lam=20, lam_factor=0.8):
+    def invert(self, data: pd.DataFrame, num_layers=3, lam=20, lam_factor=0.8, method='auto',
+               callback=None, cancel_token=None, stopping=None, max_iter=None):
         """
         Realizar inversión de datos SEV
         
@@ -40,35 +107,95 @@ class VESInverter:
             num_layers: Número de capas para el modelo
             lam: Lambda inicial (regularización)
             lam_factor: Factor lambda (decrecimiento)
+            method: 'auto' (PyGIMLi si está disponible), 'pygimli', 'simple'
+                    o 'gauss_newton'
+            callback: callback(iteration, chi2, model) tras cada iteración;
+                      si devuelve True la inversión termina con el modelo actual
+            cancel_token: CancelToken para cancelar desde otro hilo
+            stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+            max_iter: Máximo de iteraciones (None = valor por defecto de cada método)
         
         Returns:
-            dict: Resultado de inversión con modelo y curva ajustada
+            dict: Resultado de inversión con modelo y curva ajustada, con
+            stop_reason ({'success': False, 'cancelled': True} si se canceló)
+        
+        Raises:
+            ValueError: Método desconocido
         """
+        if method not in INVERTER_METHODS:
+            raise ValueError(f"Método de inversión desconocido: {method}")
         try:
             # Extraer datos
             ab2_col, rho_col = self._get_columns(data)
             ab2 = pd.to_numeric(data[ab2_col], errors='coerce')
             rho_obs = pd.to_numeric(data[rho_col], errors='coerce')
+            mn2 = pd.to_numeric(data['MN/2'], errors='coerce') if 'MN/2' in data.columns else None
             
             # Eliminar NaN
             valid_data = ~(ab2.isna() | rho_obs.isna())
+            if mn2 is not None:
+                valid_data &= ~mn2.isna()
+                mn2 = mn2[valid_data].values
             ab2 = ab2[valid_data].values
             rho_obs = rho_obs[valid_data].values
             
-            if self.use_pygimli:
-                return self._invert_pygimli(ab2, rho_obs, num_layers, lam, lam_factor)
+            reporter = IterationReporter(callback, cancel_token, stopping)
+            if method == 'gauss_newton':
+                return self._invert_gauss_newton(ab2, rho_obs, num_layers, mn2=mn2, reporter=reporter,
+                                                 max_iter=max_iter)
+            elif method == 'simple':
+                return self._invert_simple(ab2, rho_obs, num_layers, mn2=mn2, reporter=reporter,
+                                           max_iter=max_iter)
+            elif self.use_pygimli:
+                return self._invert_pygimli(ab2, rho_obs, num_layers, lam, lam_factor, mn2=mn2,
+                                            reporter=reporter, max_iter=max_iter)
             else:
                 print("⚠️ PyGIMLi no disponible, usando método alternativo")
-                return self._invert_simple(ab2, rho_obs, num_layers)
+                return self._invert_simple(ab2, rho_obs, num_layers, mn2=mn2, reporter=reporter,
+                                           max_iter=max_iter)
                 
+        except InversionCancelled:
+            return cancelled_result()
         except Exception as e:
             raise Exception(f"Error en inversión: {str(e)}")
     
-    def _invert_pygimli(self, ab2, rho_obs, num_layers, lam=20, lam_factor=0.8):
+    def invert_many(self, soundings, workers=None, chunksize=1, pool=None, **kwargs):
+        """
+        Invertir muchos sondeos en paralelo con un pool de procesos.
+        
+        Los errores de cada sondeo se capturan en su resultado (con
+        'success': False) en lugar de abortar el lote.
+        
+        Args:
+            soundings: Lista de DataFrames con datos SEV
+            workers: Número de procesos (None = todos los núcleos, 1 = en serie)
+            chunksize: Sondeos enviados a cada proceso por tarea
+            pool: WorkerPool persistente (pool.py) en lugar de un pool nuevo;
+                  workers y chunksize se ignoran
+            **kwargs: Parámetros de invert() (num_layers, lam, lam_factor, method)
+        
+        Returns:
+            list: Resultados de inversión en el mismo orden que soundings
+        """
+        soundings = list(soundings)
+        if pool is not None:
+            return pool.map('sounding', [(data,) for data in soundings], **kwargs)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(soundings)))
+        
+        jobs = [(data, kwargs) for data in soundings]
+        if workers == 1:
+            return [_invert_sounding(job) for job in jobs]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_invert_sounding, jobs, chunksize=chunksize))
+    
+    def _invert_pygimli(self, ab2, rho_obs, num_layers, lam=20, lam_factor=0.8, mn2=None, reporter=None,
+                        max_iter=None):
         """Inversión usando PyGIMLi (método principal)"""
         try:
             import pygimli as pg
-            from pygimli.physics import ert
             
             print("="*60)
             print("🔥 INVERSIÓN CON PYGIMLI")
@@ -80,39 +207,8 @@ class VESInverter:
             print(f"  - Puntos de datos: {len(ab2)}")
             print("-"*60)
             
-            # Crear datos sintéticos para el esquema VES (Schlumberger)
-            # AB/2 es la mitad de AB (distancia entre electrodos de corriente)
-            ab = ab2 * 2  # Convertir AB/2 a AB
-            
-            # Crear esquema de medición Schlumberger
-            scheme = pg.DataContainer()
-            
-            # Para Schlumberger: A---M---N---B
-            # Configuración simétrica donde MN es pequeño respecto a AB
-            mn = ab2 * 0.1  # MN típicamente es ~10% de AB/2
-            
-            # Agregar sensores (electrodos)
-            for i, spacing in enumerate(ab2):
-                # Posiciones de electrodos en configuración Schlumberger
-                # Centro en 0, simétrico
-                pos_a = -spacing  # Electrodo A
-                pos_m = -mn[i]/2  # Electrodo M
-                pos_n = mn[i]/2   # Electrodo N  
-                pos_b = spacing   # Electrodo B
-                
-                # Agregar sensores si no existen
-                for pos in [pos_a, pos_m, pos_n, pos_b]:
-                    scheme.createSensor([pos, 0.0, 0.0])
-            
-            # Agregar mediciones
-            for i in range(len(ab2)):
-                # Índices de electrodos (4 por cada medición)
-                a_idx = i * 4
-                m_idx = i * 4 + 1
-                n_idx = i * 4 + 2
-                b_idx = i * 4 + 3
-                
-                scheme.createFourPointData(a_idx, b_idx, m_idx, n_idx, rho_obs[i])
+            # Esquema de medición Schlumberger (A---M---N---B), preparado una vez por tabla de AB/2
+            scheme = schlumberger_scheme(ab2, rho_obs, mn2)
             
             # Configurar geometría del problema (1D, vertical)
             # Crear modelo inicial de capas
@@ -120,7 +216,7 @@ class VESInverter:
             model = pg.meshtools.createParaMesh1DBlock(num_layers)
             
             # Configurar VES manager
-            ves = ert.VESManager()
+            ves = _ves_manager(num_layers)
             
             # Establecer datos
             ves.setData(scheme)
@@ -134,14 +230,25 @@ class VESInverter:
             inv_params = {
                 'lam': lam,
                 'lambdaFactor': lam_factor,
-                'maxIter': 20,
+                'maxIter': PYGIMLI_MAX_ITER if max_iter is None else max_iter,
                 'verbose': True
             }
             
             print(f"\\nIniciando inversión PyGIMLi...")
             
-            # Ejecutar inversión
-            model_res = ves.invert(lam=lam, lambdaFactor=lam_factor)
+            # Ejecutar inversión (el callback o un criterio de parada pueden terminarla antes)
+            if reporter is not None and reporter.active:
+                last_step = _connect_post_step(ves.inv, reporter)
+                try:
+                    model_res = ves.invert(lam=lam, lambdaFactor=lam_factor, maxIter=inv_params['maxIter'])
+                except StopInversion:
+                    result = self._discrete_result(ab2, rho_obs, num_layers, last_step['model'], mn2,
+                                                   f'PyGIMLi (λ={lam}, detenida en la iteración '
+                                                   f'{last_step["iteration"]})')
+                    result['stop_reason'] = reporter.reason
+                    return result
+            else:
+                model_res = ves.invert(lam=lam, lambdaFactor=lam_factor, maxIter=inv_params['maxIter'])
             
             # Obtener resultados
             resistivities = ves.resistivity
@@ -171,55 +278,42 @@ class VESInverter:
                 'rho_model': rho_model,
                 'rms_error': rms_error,
                 'chi2': chi2,
+                'stop_reason': IterationReporter().stop_reason(
+                    converged=_converged(_pygimli_iterations(ves), inv_params['maxIter'])),
                 'method': f'PyGIMLi (λ={lam}, factor={lam_factor})'
             }
             
         except ImportError as e:
             print(f"❌ PyGIMLi no está instalado: {e}")
             print("💡 Instale PyGIMLi con: conda install -c gimli pygimli")
-            return self._invert_simple(ab2, rho_obs, num_layers)
+            return self._invert_simple(ab2, rho_obs, num_layers, mn2=mn2, reporter=reporter,
+                                       max_iter=max_iter)
+        except InversionCancelled:
+            raise
         except Exception as e:
             print(f"❌ Error en PyGIMLi: {e}")
             print("⚠️ Usando método alternativo...")
-            return self._invert_simple(ab2, rho_obs, num_layers)
-    
-    def _invert_simple(self, ab2, rho_obs, num_layers):
-        """Inversión simple usando optimización scipy"""
-        
-        def schlumberger_apparent_resistivity(ab2, resistivities, thicknesses):
-            """
-            Calcular resistividad aparente usando transformada de Fourier
-            (Implementación simplificada)
-            """
-            # Implementación muy simplificada
-            # En un caso real, se usaría la transformada de Hankel
-            
-            rho_app = np.zeros_like(ab2)
-            
-            for i, spacing in enumerate(ab2):
-                # Modelo muy simple de 3 capas
-                if len(resistivities) >= 3:
-                    if spacing < thicknesses[0]:
-                        rho_app[i] = resistivities[0]
-                    elif spacing < thicknesses[0] + thicknesses[1]:
-                        # Transición entre capas
-                        weight = (spacing - thicknesses[0]) / thicknesses[1]
-                        rho_app[i] = resistivities[0] * (1 - weight) + resistivities[1] * weight
-                    else:
-                        rho_app[i] = resistivities[2]
-                else:
-                    rho_app[i] = np.mean(resistivities)
-            
-            return rho_app
+            return self._invert_simple(ab2, rho_obs, num_layers, mn2=mn2, reporter=reporter,
+                                       max_iter=max_iter)
+    
+    def _invert_simple(self, ab2, rho_obs, num_layers, mn2=None, reporter=None, max_iter=None):
+        """Inversión simple usando optimización scipy y el modelado directo nativo"""
+        from scipy.optimize import minimize
+        
+        if reporter is None:
+            reporter = IterationReporter()
+        
+        def split_params(params):
+            """Separar resistividades y espesores (en escala lineal)"""
+            values = 10 ** np.asarray(params)
+            return values[:num_layers], values[num_layers:2*num_layers-1]
         
         def objective_function(params):
             """Función objetivo para minimizar"""
-            n_layers = num_layers
-            resistivities = params[:n_layers]
-            thicknesses = params[n_layers:2*n_layers-1]  # n-1 espesores
+            resistivities, thicknesses = split_params(params)
             
             # Calcular resistividad aparente del modelo
-            rho_calc = schlumberger_apparent_resistivity(ab2, resistivities, thicknesses)
+            rho_calc = schlumberger_forward(ab2, mn2, thicknesses, resistivities)
             
             # Error RMS en escala logarítmica
             log_error = np.log10(rho_calc) - np.log10(rho_obs)
@@ -227,36 +321,48 @@ class VESInverter:
             
             return rms
         
-        # Parámetros iniciales
+        # Parámetros iniciales (log10)
         initial_resistivities = [np.median(rho_obs)] * num_layers
-        initial_thicknesses = [ab2.max() / (2 * num_layers)] * (num_layers - 1)
-        initial_params = initial_resistivities + initial_thicknesses
+        initial_thicknesses = list(starting_thicknesses(ab2, num_layers))
+        initial_params = np.log10(initial_resistivities + initial_thicknesses)
         
         # Límites
         bounds = []
         # Límites para resistividades (1 a 10000 ohm-m)
         for _ in range(num_layers):
-            bounds.append((1, 10000))
-        # Límites para espesores (1 a ab2_max)
+            bounds.append((0, 4))
+        # Límites para espesores (0.1 a ab2_max)
         for _ in range(num_layers - 1):
-            bounds.append((1, ab2.max()))
+            bounds.append((-1, np.log10(ab2.max())))
+        
+        def on_iteration(intermediate_result):
+            """Notificar cada iteración de L-BFGS-B (χ² equivalente con error del 3%)"""
+            on_iteration.count += 1
+            resistivities, thicknesses = split_params(intermediate_result.x)
+            chi2 = (intermediate_result.fun * np.log(10) / 0.03)**2
+            if reporter(on_iteration.count, chi2, np.concatenate([thicknesses, resistivities])):
+                raise StopIteration
+        on_iteration.count = 0
         
         # Optimización
         try:
             result = minimize(objective_function, initial_params, 
-                            method='L-BFGS-B', bounds=bounds)
+                            method='L-BFGS-B', bounds=bounds,
+                            callback=on_iteration if reporter.active else None,
+                            options={} if max_iter is None else {'maxiter': max_iter})
             
-            if result.success:
+            # status 1: se alcanzó el máximo de iteraciones (el modelo sigue siendo válido)
+            if result.success or reporter.stopped or result.status == 1:
                 # Extraer parámetros optimizados
-                resistivities = result.x[:num_layers]
-                thicknesses = list(result.x[num_layers:2*num_layers-1]) + [np.inf]  # Última capa infinita
+                resistivities, thicknesses = split_params(result.x)
+                thicknesses = list(thicknesses) + [np.inf]  # Última capa infinita
                 
-                # Calcular curva ajustada
+                # Calcular curva ajustada (Schlumberger ideal)
                 ab2_model = np.logspace(np.log10(ab2.min()), np.log10(ab2.max()), 50)
-                rho_model = schlumberger_apparent_resistivity(ab2_model, resistivities, thicknesses[:-1])
+                rho_model = schlumberger_forward(ab2_model, None, thicknesses[:-1], resistivities)
                 
                 # Calcular RMS
-                rho_calc_obs = schlumberger_apparent_resistivity(ab2, resistivities, thicknesses[:-1])
+                rho_calc_obs = schlumberger_forward(ab2, mn2, thicknesses[:-1], resistivities)
                 rms_error = np.sqrt(np.mean((np.log10(rho_calc_obs) - np.log10(rho_obs))**2))
                 
                 return {
@@ -265,16 +371,81 @@ class VESInverter:
                     'thicknesses': thicknesses,
                     'ab2_model': ab2_model,
                     'rho_model': rho_model,
+                    'response': rho_calc_obs,
                     'rms_error': rms_error,
+                    'n_iter': int(result.nit),
+                    'stopped': reporter.stopped,
+                    'stop_reason': reporter.stop_reason(converged=result.status != 1),
                     'method': 'Simple scipy optimization'
                 }
             else:
                 raise Exception("Optimización no convergió")
                 
+        except InversionCancelled:
+            raise
         except Exception as e:
             # Fallback: devolver modelo simple
             return self._create_simple_model(ab2, rho_obs)
     
+    def _invert_gauss_newton(self, ab2, rho_obs, num_layers, mn2=None, reporter=None, max_iter=None):
+        """Inversión Levenberg-Marquardt con jacobiano analítico"""
+        callback = cancel_token = stopping = None
+        if reporter is not None:
+            callback, cancel_token, stopping = reporter.callback, reporter.cancel_token, reporter.stopping
+        options = {} if max_iter is None else {'max_iter': max_iter}
+        result = invert_gauss_newton(ab2, mn2, rho_obs, num_layers, callback=callback,
+                                     cancel_token=cancel_token, stopping=stopping, **options)
+        
+        if result.get('cancelled'):
+            raise InversionCancelled(result['error'])
+        if not result['success']:
+            print(f"❌ Error en Gauss-Newton: {result['error']}")
+            return self._create_simple_model(ab2, rho_obs)
+        
+        resistivities = result['resistivities']
+        thicknesses = list(result['thickness']) + [np.inf]
+        
+        # Calcular curva ajustada (Schlumberger ideal)
+        ab2_model = np.logspace(np.log10(ab2.min()), np.log10(ab2.max()), 50)
+        rho_model = schlumberger_forward(ab2_model, None, thicknesses[:-1], resistivities)
+        rms_error = np.sqrt(np.mean((np.log10(result['response']) - np.log10(rho_obs))**2))
+        
+        return {
+            'success': True,
+            'resistivities': resistivities.tolist(),
+            'thicknesses': thicknesses,
+            'ab2_model': ab2_model,
+            'rho_model': rho_model,
+            'response': result['response'],
+            'rms_error': rms_error,
+            'chi2': result['chi2'],
+            'n_iter': result['n_iter'],
+            'stopped': result['stopped'],
+            'stop_reason': result['stop_reason'],
+            'method': f"Gauss-Newton/LM ({result['n_iter']} iteraciones)"
+        }
+    
+    def _discrete_result(self, ab2, rho_obs, num_layers, model, mn2, method):
+        """Resultado a partir de un vector [espesores, resistividades] (inversión detenida)"""
+        model = np.asarray(model, dtype=float)
+        resistivities = model[num_layers - 1:]
+        thicknesses = list(model[:num_layers - 1]) + [np.inf]
+        ab2_model = np.logspace(np.log10(ab2.min()), np.log10(ab2.max()), 50)
+        rho_model = schlumberger_forward(ab2_model, None, thicknesses[:-1], resistivities)
+        response = schlumberger_forward(ab2, mn2, thicknesses[:-1], resistivities)
+        
+        return {
+            'success': True,
+            'resistivities': resistivities.tolist(),
+            'thicknesses': thicknesses,
+            'ab2_model': ab2_model,
+            'rho_model': rho_model,
+            'response': response,
+            'rms_error': np.sqrt(np.mean((np.log10(response) - np.log10(rho_obs))**2)),
+            'stopped': True,
+            'method': method
+        }
+    
     def _create_simple_model(self, ab2, rho_obs):
         """Crear modelo simple cuando la inversión falla"""
         # Modelo de 3 capas simple
@@ -311,9 +482,11 @@ class VESInverter:
         
         for col in data.columns:
             col_lower = str(col).lower()
+            if 'mn' in col_lower:
+                continue
             if any(keyword in col_lower for keyword in ['ab', 'distancia', 'spacing']):
                 ab2_col = col
-            elif any(keyword in col_lower for keyword in ['rho', 'resistividad', 'resistivity']):
+            elif any(keyword in col_lower for keyword in ['rho', 'resistividad', 'resistivity', 'pa (', 'ρa', 'ohm', 'ω']):
                 rho_col = col
         
         if ab2_col is None:
@@ -323,6 +496,17 @@ class VESInverter:
             
         return ab2_col, rho_col
 
+def _invert_sounding(job):
+    """Invertir un sondeo en un proceso del pool (errores capturados)."""
+    data, kwargs = job
+    try:
+        return VESInverter().invert(data, **kwargs)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
 def test_inversion():
     """Test del módulo de inversión"""
     # Crear datos sintéticos
@@ -331,15 +515,9 @@ def test_inversion():
     rho_true = [100, 10, 200]
     thick_true = [5, 15]
     
-    # Simular resistividad aparente (muy simplificado)
-    rho_obs = np.zeros_like(ab2)
-    for i, spacing in enumerate(ab2):
-        if spacing < 5:
-            rho_obs[i] = 100 + np.random.normal(0, 5)
-        elif spacing < 20:
-            rho_obs[i] = 10 + np.random.normal(0, 1)
-        else:
-            rho_obs[i] = 200 + np.random.normal(0, 10)
+    # Simular resistividad aparente con el modelado directo (ruido 3%)
+    rho_obs = schlumberger_forward(ab2, None, thick_true, rho_true)
+    rho_obs = rho_obs * (1 + np.random.normal(0, 0.03, len(ab2)))
     
     data = pd.DataFrame({'AB2': ab2, 'Resistividad': rho_obs})
     
@@ -357,7 +535,8 @@ def test_inversion():
     return result
 
 
-def invert_simple_method(ab2, rhoa, n_layers):
+def invert_simple_method(ab2, rhoa, n_layers, mn2=None, start_model=None, callback=None,
+                         cancel_token=None, stopping=None, max_iter=None):
     """
     Inversión simple usando scipy.optimize (fallback cuando PyGIMLi no está disponible).
     
@@ -365,40 +544,73 @@ def invert_simple_method(ab2, rhoa, n_layers):
         ab2: Array de espaciamientos AB/2
         rhoa: Array de resistividades aparentes
         n_layers: Número de capas del modelo
+        mn2: Array de espaciamientos MN/2 (opcional, None = Schlumberger ideal)
+        start_model: Modelo inicial [espesores, resistividades] (None = homogéneo)
+        callback: callback(iteration, chi2, model) tras cada iteración; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+        max_iter: Máximo de iteraciones de L-BFGS-B (None = el de scipy)
     
     Returns:
-        dict: Resultados con thickness, depths, resistivities
+        dict: Resultados con thickness, depths, resistivities y stop_reason
     """
     from scipy.optimize import minimize
     
-    # Modelo inicial
-    thickness_init = np.ones(n_layers - 1) * (ab2.max() / (2 * n_layers))
-    resistivity_init = np.ones(n_layers) * np.median(rhoa)
-    x0 = np.concatenate([thickness_init, resistivity_init])
+    ab2 = np.asarray(ab2, dtype=float)
+    rhoa = np.asarray(rhoa, dtype=float)
+    
+    # Límites: espesores (0.1 a ab2_max) y resistividades (1 a 10000)
+    bounds = [(-1, np.log10(ab2.max()))] * (n_layers - 1) + [(0, 4)] * n_layers
+    
+    # Modelo inicial (log10 de espesores y resistividades)
+    if start_model is None:
+        thickness_init = starting_thicknesses(ab2, n_layers)
+        resistivity_init = np.ones(n_layers) * np.median(rhoa)
+        start_model = np.concatenate([thickness_init, resistivity_init])
+    lower, upper = np.array(bounds).T
+    x0 = np.clip(np.log10(start_model), lower, upper)
     
     def forward_model(params):
-        # Modelo simplificado - asume resistividad constante
-        return np.ones_like(ab2) * np.mean(params[n_layers-1:])
+        values = 10 ** params
+        return schlumberger_forward(ab2, mn2, values[:n_layers-1], values[n_layers-1:])
     
     def objective(params):
         predicted = forward_model(params)
         return np.sum((np.log10(rhoa) - np.log10(predicted))**2)
     
-    # Límites: espesores (0.1 a ab2_max) y resistividades (1 a 10000)
-    bounds = [(0.1, ab2.max())] * (n_layers - 1) + [(1, 10000)] * n_layers
+    reporter = IterationReporter(callback, cancel_token, stopping)
     
-    # Optimización
-    result = minimize(objective, x0, method='L-BFGS-B', bounds=bounds)
+    def on_iteration(intermediate_result):
+        on_iteration.count += 1
+        chi2 = intermediate_result.fun * np.log(10)**2 / (len(rhoa) * 0.03**2)
+        if reporter(on_iteration.count, chi2, 10 ** intermediate_result.x):
+            raise StopIteration
+    on_iteration.count = 0
     
-    thickness = result.x[:n_layers-1]
-    resistivities = result.x[n_layers-1:]
+    # Optimización
+    try:
+        result = minimize(objective, x0, method='L-BFGS-B', bounds=bounds,
+                          callback=on_iteration if reporter.active else None,
+                          options={} if max_iter is None else {'maxiter': max_iter})
+    except InversionCancelled:
+        return cancelled_result()
+    
+    values = 10 ** result.x
+    thickness = values[:n_layers-1]
+    resistivities = values[n_layers-1:]
     depths = np.cumsum(thickness)
+    response = forward_model(result.x)
     
     return {
         'success': True,
         'thickness': thickness,
         'depths': depths,
         'resistivities': resistivities,
+        'response': response,
+        'chi2': np.mean((np.log(rhoa) - np.log(response))**2) / 0.03**2,
+        'n_iter': int(result.nit),
+        'stopped': reporter.stopped,
+        'stop_reason': reporter.stop_reason(converged=result.status != 1),
         'method': 'simple'
     }
 
@@ -439,34 +651,61 @@ def extract_inversion_arrays(data):
         data: DataFrame con datos preparados
     
     Returns:
-        tuple: (ab2, mn2, rhoa)
+        tuple: (ab2, mn2, rhoa); mn2 es None sin columna MN/2 (los métodos
+        nativos usan entonces el límite Schlumberger ideal)
     """
     ab2 = data['AB/2'].values
-    mn2 = data['MN/2'].values if 'MN/2' in data.columns else np.ones_like(ab2)
+    mn2 = data['MN/2'].values if 'MN/2' in data.columns else None
     rhoa = data['pa (Ω*m)'].values
     
     return ab2, mn2, rhoa
 
 
-def invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val=20, smooth_order=1, n_layers=30):
+def invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val=20, smooth_order=1, n_layers=30,
+                        use_cache=True, callback=None, cancel_token=None, stopping=None,
+                        max_iter=PYGIMLI_MAX_ITER):
     """
     Inversión suavizada usando VESRhoModelling de PyGIMLi
     
+    Sin PyGIMLi se usa la inversión Occam nativa (occam.invert_occam), que
+    devuelve el mismo diccionario de resultados.
+    
     Args:
         ab2: Array de AB/2 (espaciamiento de electrodos)
-        mn2: Array de MN/2 (espaciamiento de electrodos de potencial)
+        mn2: Array de MN/2 (espaciamiento de electrodos de potencial; None =
+            Schlumberger ideal en Occam, MN = 10% de AB/2 en PyGIMLi)
         rhoa: Array de resistividades aparentes observadas
         max_depth: Profundidad máxima del modelo (debe coincidir con el modelo discreto)
         lambda_val: Parámetro de regularización
         smooth_order: Orden de suavizado (1=primera derivada, 2=segunda derivada)
         n_layers: Número de capas para el modelo suavizado (default: 30)
+        use_cache: Consultar/guardar el resultado en la caché de disco
+        callback: callback(iteration, chi2, resistividades) tras cada iteración; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+        max_iter: Máximo de iteraciones
     
     Returns:
-        dict: Contiene thicknesses, depths, resistivities, response, chi2, rrms
+        dict: Contiene thicknesses, depths, resistivities, response, chi2, rrms, stop_reason
     """
+    if not pygimli_available():
+        return invert_occam(ab2, mn2, rhoa, max_depth, lambda_val, smooth_order, n_layers,
+                            max_iter=max_iter, callback=callback, cancel_token=cancel_token,
+                            stopping=stopping)
+    
+    if mn2 is None:
+        mn2 = default_mn2(ab2)
+    if use_cache:
+        key = default_cache().make_key('pygimli_smooth', ab2, mn2, rhoa, max_depth=float(max_depth),
+                                       lam=lambda_val, smooth_order=smooth_order, n_layers=n_layers,
+                                       max_iter=max_iter)
+        cached = default_cache().get(key)
+        if cached is not None:
+            return cached
+    
+    reporter = IterationReporter(callback, cancel_token, stopping)
     try:
         import pygimli as pg
-        from pygimli.physics.ves import VESRhoModelling
         
         # Error estimado
         error = np.ones_like(rhoa) * 0.03
@@ -481,16 +720,20 @@ def invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val=20, smooth_order=1
         print(f"Profundidad generada: {total_depth:.2f} m")
         
         # Configurar operador forward
-        f = VESRhoModelling(thk=thk, ab2=ab2, mn2=mn2)
+        f = _smooth_operator(thk, ab2, mn2)
         
         # Configurar inversión
         inv = pg.Inversion(fop=f, verbose=False)
         inv.transData = pg.trans.TransLog()
         inv.transModel = pg.trans.TransLogLU(1, 1000)
         inv.setRegularization(cType=smooth_order)
+        last_step = _connect_post_step(inv, reporter) if reporter.active else None
         
         # Ejecutar inversión
-        model = inv.run(rhoa, error, lam=lambda_val)
+        try:
+            model = inv.run(rhoa, error, lam=lambda_val, maxIter=max_iter)
+        except StopInversion:
+            model = last_step['model']
         response = inv.response
         
         # Calcular profundidades
@@ -500,17 +743,26 @@ def invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val=20, smooth_order=1
         chi2 = inv.chi2()
         rrms = inv.relrms()
         
-        return {
+        result = {
             'success': True,
             'thicknesses': thk,
             'depths': depths,
-            'resistivities': model,
-            'response': response,
+            'resistivities': np.asarray(model),
+            'response': np.asarray(response),
             'chi2': chi2,
             'rrms': rrms,
-            'max_depth_achieved': total_depth
+            'max_depth_achieved': total_depth,
+            'stopped': reporter.stopped,
+            'stop_reason': reporter.stop_reason(converged=_converged(_inversion_iterations(inv), max_iter))
         }
+        # Un resultado detenido por el callback o por los criterios de parada
+        # depende de ellos y no solo de la clave
+        if use_cache and not stopped_early(result['stop_reason']):
+            default_cache().put(key, result)
+        return result
         
+    except InversionCancelled:
+        return cancelled_result()
     except Exception as e:
         return {
             'success': False,
@@ -518,48 +770,82 @@ def invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val=20, smooth_order=1
         }
 
 
-def invert_pygimli_discrete(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor):
+def invert_pygimli_discrete(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor, use_cache=True,
+                            start_model=None, callback=None, cancel_token=None, stopping=None,
+                            max_iter=PYGIMLI_MAX_ITER):
     """
     Inversión discreta con PyGIMLi (modelo de capas).
     
     Args:
         ab2: Array de AB/2
-        mn2: Array de MN/2
+        mn2: Array de MN/2 (None = MN = 10% de AB/2)
         rhoa: Array de resistividades aparentes
         n_layers: Número de capas
         lambda_val: Lambda de regularización
         lambda_factor: Factor lambda
+        use_cache: Consultar/guardar el resultado en la caché de disco
+        start_model: Modelo inicial [espesores, resistividades] (None = el de PyGIMLi)
+        callback: callback(iteration, chi2, model) tras cada iteración; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+        max_iter: Máximo de iteraciones (maxIter de PyGIMLi)
     
     Returns:
-        dict: Resultados de inversión con modelo discreto
+        dict: Resultados de inversión con modelo discreto ('ves_manager' no
+        está presente cuando el resultado proviene de la caché)
     """
+    if mn2 is None:
+        mn2 = default_mn2(ab2)
+    if use_cache:
+        key = default_cache().make_key('pygimli_discrete', ab2, mn2, rhoa, n_layers=n_layers,
+                                       lam=lambda_val, lam_factor=lambda_factor,
+                                       start=None if start_model is None else tuple(np.round(start_model, 6)),
+                                       max_iter=max_iter)
+        cached = default_cache().get(key)
+        if cached is not None:
+            return cached
+    
+    reporter = IterationReporter(callback, cancel_token, stopping)
     try:
-        from pygimli.physics import ves
-        
-        ves_obj = ves.VESManager()
+        ves_obj = _ves_manager(n_layers)
         error = np.ones_like(rhoa) * 0.03
         max_depth = np.max(ab2) / 3
 
-        model = ves_obj.invert(rhoa, error, ab2=ab2, mn2=mn2, nLayers=n_layers, 
-                              lam=lambda_val, lambdaFactor=lambda_factor)
+        options = {} if start_model is None else {'startModel': np.asarray(start_model, dtype=float)}
+        last_step = _connect_post_step(ves_obj.inv, reporter) if reporter.active else None
+        try:
+            model = ves_obj.invert(rhoa, error, ab2=ab2, mn2=mn2, nLayers=n_layers, 
+                                  lam=lambda_val, lambdaFactor=lambda_factor, maxIter=max_iter,
+                                  **options)
+        except StopInversion:
+            model = last_step['model']
 
         depths = np.cumsum(model[:n_layers - 1])
         resistivities = model[n_layers - 1:]
         thickness = np.diff(np.concatenate(([0], depths)))
         
         chi2 = ves_obj.inv.chi2()
+        n_iter = _pygimli_iterations(ves_obj)
         
-        return {
+        result = {
             'success': True,
             'ves_manager': ves_obj,
             'thickness': thickness,
             'depths': depths,
-            'resistivities': resistivities,
+            'resistivities': np.asarray(resistivities),
             'max_depth': max_depth,
             'chi2': chi2,
-            'response': ves_obj.inv.response
+            'response': np.asarray(ves_obj.inv.response),
+            'n_iter': n_iter,
+            'stopped': reporter.stopped,
+            'stop_reason': reporter.stop_reason(converged=_converged(n_iter, max_iter))
         }
+        if use_cache and not stopped_early(result['stop_reason']):
+            default_cache().put(key, result)
+        return result
         
+    except InversionCancelled:
+        return cancelled_result()
     except Exception as e:
         return {
             'success': False,
@@ -567,7 +853,87 @@ def invert_pygimli_discrete(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor)
         }
 
 
-def invert_simple_discrete(ab2, rhoa, n_layers):
+def invert_discrete(ab2, mn2, rhoa, n_layers, method='gauss_newton', start_model=None, **options):
+    """
+    Inversión discreta de un sondeo con el método indicado.
+    
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        n_layers: Número de capas
+        method: 'gauss_newton', 'robust', 'simple' o 'pygimli'
+        start_model: Modelo inicial [espesores, resistividades] (opcional)
+        **options: error, max_iter, tol, damping (Gauss-Newton); norm, threshold
+            (robusta); lam, lam_factor (PyGIMLi); callback, cancel_token y
+            stopping (todos los métodos)
+    
+    Returns:
+        dict: Resultados de inversión con modelo discreto
+    """
+    ab2 = np.asarray(ab2, dtype=float)
+    rhoa = np.asarray(rhoa, dtype=float)
+    control = {key: options[key] for key in ('callback', 'cancel_token', 'stopping') if key in options}
+    if method == 'gauss_newton':
+        kwargs = {key: options[key] for key in ('error', 'max_iter', 'tol', 'damping') if key in options}
+        kwargs.update(control)
+        return invert_gauss_newton(ab2, mn2, rhoa, n_layers, start_model=start_model, **kwargs)
+    if method == 'robust':
+        kwargs = {key: options[key] for key in ('norm', 'threshold', 'error', 'max_iter', 'tol') if key in options}
+        kwargs.update(control)
+        return invert_robust(ab2, mn2, rhoa, n_layers, start_model=start_model, **kwargs)
+    if method == 'simple':
+        if 'max_iter' in options:
+            control['max_iter'] = options['max_iter']
+        return invert_simple_method(ab2, rhoa, n_layers, mn2=mn2, start_model=start_model, **control)
+    if method == 'pygimli':
+        if 'max_iter' in options:
+            control['max_iter'] = options['max_iter']
+        return invert_pygimli_discrete(ab2, mn2, rhoa, n_layers, options.get('lam', 20),
+                                       options.get('lam_factor', 0.8), start_model=start_model,
+                                       **control)
+    raise ValueError(f"Método de inversión desconocido: {method}")
+
+
+def _connect_post_step(inversion, reporter):
+    """
+    Conectar un IterationReporter al paso posterior de una inversión de PyGIMLi.
+    
+    Returns:
+        dict: Se actualiza en cada iteración con 'iteration' y 'model' (el
+        modelo a devolver si el callback termina la inversión)
+    """
+    last_step = {}
+    
+    def post_step(iteration, inv):
+        last_step['iteration'] = iteration
+        last_step['model'] = np.asarray(inv.model)
+        reporter.check(iteration, inv.chi2(), last_step['model'])
+    
+    inversion.setPostStep(post_step)
+    return last_step
+
+
+def _pygimli_iterations(ves_obj):
+    """Número de iteraciones de la última inversión de PyGIMLi (None si no se conoce)."""
+    return _inversion_iterations(ves_obj.inv)
+
+
+def _inversion_iterations(inversion):
+    """Número de iteraciones de un pg.Inversion (None si no se conoce)."""
+    try:
+        return int(inversion.inv.iter())
+    except Exception:
+        return None
+
+
+def _converged(iterations, max_iter):
+    """Convergencia según el número de iteraciones (None si no se conoce)."""
+    return None if iterations is None else iterations < max_iter
+
+
+def invert_simple_discrete(ab2, rhoa, n_layers, mn2=None, start_model=None, callback=None,
+                           cancel_token=None, stopping=None):
     """
     Inversión discreta simple (sin PyGIMLi).
     
@@ -575,11 +941,17 @@ def invert_simple_discrete(ab2, rhoa, n_layers):
         ab2: Array de AB/2
         rhoa: Array de resistividades aparentes
         n_layers: Número de capas
+        mn2: Array de MN/2 (opcional)
+        start_model: Modelo inicial [espesores, resistividades] (opcional)
+        callback: callback(iteration, chi2, model) tras cada iteración; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
     
     Returns:
         dict: Resultados de inversión simple
     """
-    return invert_simple_method(ab2, rhoa, n_layers)
+    return invert_simple_method(ab2, rhoa, n_layers, mn2=mn2, start_model=start_model,
+                                callback=callback, cancel_token=cancel_token, stopping=stopping)
 
 
 if __name__ == "__main__":
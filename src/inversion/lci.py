@@ -0,0 +1,199 @@
+"""
+Inversión Lateralmente Restringida (LCI) para VESPY
+===================================================
+
+Invierte conjuntamente todos los sondeos de un perfil. Los parámetros de
+cada sondeo (ln de espesores y resistividades) se acoplan con los del
+sondeo vecino en X mediante una regularización dispersa por bloques:
+
+    Φ = Σ_i ‖W_i (ln d_i - ln f(p_i))‖² + Σ_(i,i+1) w_i² ‖p_i - p_(i+1)‖²
+
+El peso lateral decrece con la distancia entre sondeos,
+w = lateral_weight · sqrt(d_ref / d), lo que equivale a una covarianza
+entre vecinos que crece linealmente con la separación.
+
+Cada iteración Levenberg-Marquardt resuelve un único sistema disperso
+(bloques P×P tridiagonales por sondeo) con scipy.sparse.linalg.spsolve,
+por lo que el coste crece linealmente con el número de sondeos.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import numpy as np
+
+from utils.lazy import lazy_import
+from .forward import forward_jacobian
+from .gauss_newton import MAX_STEP, parameter_bounds, starting_model
+
+# SciPy se carga en la primera inversión, no al importar el módulo
+sparse = lazy_import('scipy.sparse')
+sparse_linalg = lazy_import('scipy.sparse.linalg')
+
+
+def lateral_operator(x_positions, n_params, lateral_weight=1.0, reference_distance=None):
+    """
+    Operador disperso de restricciones laterales entre sondeos vecinos.
+
+    Args:
+        x_positions: Array (N,) de posiciones X de los sondeos
+        n_params: Parámetros por sondeo (2n-1)
+        lateral_weight: Peso lateral (escalar o array (2n-1,) por parámetro)
+        reference_distance: Distancia con peso = lateral_weight (None = mediana)
+
+    Returns:
+        scipy.sparse.csr_matrix de forma ((N-1)·P, N·P)
+    """
+    x_positions = np.asarray(x_positions, dtype=float)
+    n_soundings = len(x_positions)
+    if n_soundings < 2:
+        return sparse.csr_matrix((0, n_soundings * n_params))
+
+    order = np.argsort(x_positions, kind='stable')
+    distance = np.diff(x_positions[order])
+    if reference_distance is None:
+        reference_distance = np.median(distance) if np.any(distance > 0) else 1.0
+    distance = np.maximum(distance, 1e-6 * reference_distance)
+    edge_weights = np.sqrt(reference_distance / distance)
+
+    rows = np.arange(n_soundings - 1)
+    differences = sparse.csr_matrix(
+        (np.concatenate([-edge_weights, edge_weights]),
+         (np.concatenate([rows, rows]), np.concatenate([order[:-1], order[1:]]))),
+        shape=(n_soundings - 1, n_soundings)
+    )
+    param_weights = np.broadcast_to(np.asarray(lateral_weight, dtype=float), (n_params,))
+    return sparse.kron(differences, sparse.diags(param_weights), format='csr')
+
+
+def _group_by_geometry(soundings):
+    """Agrupar sondeos con la misma tabla AB/2-MN/2 para evaluarlos en lote."""
+    groups = {}
+    for i, (ab2, mn2, _) in enumerate(soundings):
+        key = (np.asarray(ab2, dtype=float).tobytes(),
+               None if mn2 is None else np.asarray(mn2, dtype=float).tobytes())
+        groups.setdefault(key, []).append(i)
+    return [(soundings[idx[0]][0], soundings[idx[0]][1], np.array(idx)) for idx in groups.values()]
+
+
+def _profile_jacobian(groups, models, n_soundings):
+    """Respuestas y jacobianos de todos los sondeos (listas en el orden original)."""
+    responses = [None] * n_soundings
+    jacobians = [None] * n_soundings
+    for ab2, mn2, idx in groups:
+        response, jacobian = forward_jacobian(ab2, mn2, models[idx])
+        for k, i in enumerate(idx):
+            responses[i] = response[k]
+            jacobians[i] = jacobian[k]
+    return responses, jacobians
+
+
+def invert_profile_lci(soundings, x_positions, n_layers, lateral_weight=1.0,
+                       reference_distance=None, error=0.03, max_iter=30, tol=1e-3,
+                       damping=1.0):
+    """
+    Inversión conjunta lateralmente restringida de los sondeos de un perfil.
+
+    Args:
+        soundings: Lista de tuplas (ab2, mn2, rhoa); mn2 puede ser None
+        x_positions: Posición X de cada sondeo
+        n_layers: Número de capas (igual para todos los sondeos)
+        lateral_weight: Peso de las restricciones laterales (escalar o por parámetro)
+        reference_distance: Distancia de referencia del peso lateral (None = mediana)
+        error: Error relativo de los datos (por defecto 3%)
+        max_iter: Máximo de iteraciones
+        tol: Cambio relativo de Φ para declarar convergencia
+        damping: Amortiguamiento inicial de Marquardt
+
+    Returns:
+        dict: thickness (N, n-1), depths (N, n-1), resistivities (N, n),
+        responses (lista), chi2 (N,), chi2_total, n_iter, converged
+        (en el orden de entrada de los sondeos)
+    """
+    try:
+        soundings = [(np.asarray(ab2, dtype=float),
+                      None if mn2 is None else np.asarray(mn2, dtype=float),
+                      np.asarray(rhoa, dtype=float)) for ab2, mn2, rhoa in soundings]
+        n_soundings = len(soundings)
+        if n_soundings != len(x_positions):
+            raise ValueError("Debe haber una posición X por sondeo")
+        n_params = 2 * n_layers - 1
+
+        groups = _group_by_geometry(soundings)
+        log_data = [np.log(rhoa) for _, _, rhoa in soundings]
+        weights = [1.0 / np.broadcast_to(np.asarray(error, dtype=float), d.shape) for d in log_data]
+        n_data = np.array([len(d) for d in log_data])
+
+        bounds = [parameter_bounds(ab2, n_layers) for ab2, _, _ in soundings]
+        lower = np.concatenate([lo for lo, _ in bounds])
+        upper = np.concatenate([hi for _, hi in bounds])
+
+        lateral = lateral_operator(x_positions, n_params, lateral_weight, reference_distance)
+        rtr = (lateral.T @ lateral).tocsr()
+
+        start = np.array([starting_model(ab2, rhoa, n_layers) for ab2, _, rhoa in soundings])
+        p = np.clip(np.log(start).ravel(), lower, upper)
+
+        def evaluate(p_values):
+            responses, jacobians = _profile_jacobian(groups, np.exp(p_values.reshape(n_soundings, n_params)),
+                                                     n_soundings)
+            residuals = [(d - np.log(f)) * w for d, f, w in zip(log_data, responses, weights)]
+            phi_data = np.array([np.sum(r**2) for r in residuals])
+            phi = phi_data.sum() + p_values @ (rtr @ p_values)
+            return responses, jacobians, residuals, phi_data, phi
+
+        responses, jacobians, residuals, phi_data, phi = evaluate(p)
+        mu = float(damping)
+        converged = False
+        n_iter = 0
+
+        for n_iter in range(1, max_iter + 1):
+            jw = sparse.block_diag([j * w[:, None] for j, w in zip(jacobians, weights)], format='csr')
+            jtj = (jw.T @ jw).tocsr()
+            normal = jtj + rtr
+            gradient = jw.T @ np.concatenate(residuals) - rtr @ p
+
+            diag = jtj.diagonal()
+            # Marquardt más un término de Levenberg (igual que levenberg_marquardt)
+            lhs = normal + sparse.diags(mu * (diag + 1e-2 * diag.mean()))
+            step = sparse_linalg.spsolve(lhs.tocsc(), gradient)
+            step /= max(np.abs(step).max() / MAX_STEP, 1.0)
+            trial_p = np.clip(p + step, lower, upper)
+
+            trial = evaluate(trial_p)
+            if trial[-1] < phi:
+                improvement = (phi - trial[-1]) / max(phi, 1e-300)
+                p = trial_p
+                responses, jacobians, residuals, phi_data, phi = trial
+                mu = max(mu / 3.0, 1e-6)
+                if improvement < tol or phi_data.sum() < 1e-8 * n_data.sum():
+                    converged = True
+                    break
+            else:
+                mu *= 4.0
+                if mu > 1e8:
+                    converged = True
+                    break
+
+        models = np.exp(p.reshape(n_soundings, n_params))
+        thickness = models[:, :n_layers - 1]
+
+        return {
+            'success': True,
+            'thickness': thickness,
+            'depths': np.cumsum(thickness, axis=1),
+            'resistivities': models[:, n_layers - 1:],
+            'responses': responses,
+            'chi2': phi_data / n_data,
+            'chi2_total': phi_data.sum() / n_data.sum(),
+            'x_positions': np.asarray(x_positions, dtype=float),
+            'n_iter': n_iter,
+            'converged': converged,
+            'method': 'lci'
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
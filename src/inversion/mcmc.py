@@ -0,0 +1,256 @@
+"""
+Inversión Bayesiana MCMC para VESPY
+===================================
+
+Muestreo de la distribución a posteriori del modelo de capas con el
+muestreador por conjuntos invariante afín (Goodman & Weare, 2010; el
+"stretch move" de emcee). Los parámetros son ln(espesores) y
+ln(resistividades) con prior uniforme dentro de parameter_bounds y
+verosimilitud gaussiana del desajuste logarítmico (error relativo).
+
+En cada paso el conjunto se divide en dos mitades: cada mitad propone
+movimientos usando la otra como referencia y todas sus propuestas se
+evalúan con una única llamada a forward_batch. El coste por paso es, por
+tanto, el de dos modelados directos vectorizados, no uno por caminante.
+
+Incluye:
+- Puntos de control en .npz (escritura atómica) para reanudar cadenas largas
+- Diagnóstico de convergencia R-hat de Gelman-Rubin sobre cadenas divididas
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .forward import forward_batch
+from .gauss_newton import invert_gauss_newton, parameter_bounds
+
+
+# Parámetro a del stretch move (valor recomendado por Goodman & Weare)
+STRETCH_SCALE = 2.0
+# Umbral de R-hat para declarar convergencia
+RHAT_THRESHOLD = 1.1
+# Dispersión inicial de los caminantes alrededor del ajuste, en ln(p)
+INITIAL_SCATTER = 0.05
+
+
+def log_posterior(ab2, mn2, log_data, weights, lower, upper, log_models):
+    """
+    Log-posterior de un lote de modelos en ln(p).
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        log_data: ln(ρa) observada
+        weights: 1 / error relativo por dato
+        lower: Límite inferior del prior en ln(p)
+        upper: Límite superior del prior en ln(p)
+        log_models: Array (W, 2n-1) de modelos en ln(p)
+
+    Returns:
+        Array (W,) de log-posterior (-inf fuera del prior)
+    """
+    log_prob = np.full(len(log_models), -np.inf)
+    inside = np.all((log_models >= lower) & (log_models <= upper), axis=1)
+    if np.any(inside):
+        response = forward_batch(ab2, mn2, np.exp(log_models[inside]))
+        residual = (log_data - np.log(response)) * weights
+        log_prob[inside] = -0.5 * np.sum(residual**2, axis=1)
+    return log_prob
+
+
+def split_rhat(chain):
+    """
+    R-hat de Gelman-Rubin con cadenas divididas por la mitad.
+
+    Args:
+        chain: Array (pasos, caminantes, parámetros)
+
+    Returns:
+        Array (parámetros,) de R-hat (≈ 1 cuando las cadenas se han mezclado)
+    """
+    n_half = chain.shape[0] // 2
+    if n_half < 2:
+        return np.full(chain.shape[-1], np.inf)
+    halves = np.concatenate([chain[:n_half], chain[n_half:2 * n_half]], axis=1)
+    means = halves.mean(axis=0)
+    within = halves.var(axis=0, ddof=1).mean(axis=0)
+    between = n_half * means.var(axis=0, ddof=1)
+    var_plus = (n_half - 1) / n_half * within + between / n_half
+    return np.sqrt(var_plus / np.maximum(within, 1e-300))
+
+
+def _run_key(ab2, mn2, rhoa, n_layers, n_walkers, error):
+    """Huella de la configuración para no reanudar un punto de control ajeno."""
+    digest = hashlib.sha256()
+    for values in (ab2, mn2, rhoa):
+        digest.update(b'-' if values is None else np.ascontiguousarray(values, dtype=float).tobytes())
+    digest.update(json.dumps([n_layers, n_walkers, float(error)]).encode())
+    return digest.hexdigest()
+
+
+def _save_checkpoint(path, key, chain, log_prob, accepted, rng):
+    """Guardar el estado del muestreador de forma atómica."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            np.savez(handle, key=key, chain=chain, log_prob=log_prob, accepted=accepted,
+                     rng_state=json.dumps(rng.bit_generator.state))
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_checkpoint(path, key):
+    """Cargar un punto de control compatible (None si no existe o no coincide)."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as stored:
+            if str(stored['key']) != key:
+                return None
+            return (stored['chain'], stored['log_prob'], stored['accepted'],
+                    json.loads(str(stored['rng_state'])))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def sample_posterior(ab2, mn2, rhoa, n_layers, n_walkers=None, n_steps=2000, burn_in=None,
+                     error=0.03, start_model=None, seed=None, checkpoint=None,
+                     checkpoint_every=200, percentiles=(2.5, 16, 50, 84, 97.5)):
+    """
+    Muestrear la distribución a posteriori de un modelo de capas.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        n_layers: Número de capas
+        n_walkers: Caminantes del conjunto (None = max(32, 4·(2n-1)), siempre par)
+        n_steps: Pasos totales por caminante (incluye los ya guardados)
+        burn_in: Pasos descartados (None = la mitad)
+        error: Error relativo de los datos (por defecto 3%)
+        start_model: Centro inicial [espesores, resistividades] (None = ajuste Gauss-Newton)
+        seed: Semilla del generador
+        checkpoint: Ruta .npz de punto de control (None = sin puntos de control);
+            si existe y corresponde a los mismos datos se reanuda
+        checkpoint_every: Pasos entre puntos de control
+        percentiles: Percentiles a calcular
+
+    Returns:
+        dict: chain (pasos, W, 2n-1) en ln(p), log_prob (pasos, W), samples
+        (modelos a posteriori tras burn_in), percentiles de thickness, depths
+        y resistivities, map_model, acceptance, rhat, converged
+    """
+    try:
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+        n_params = 2 * n_layers - 1
+        if n_walkers is None:
+            n_walkers = max(32, 4 * n_params)
+        n_walkers += n_walkers % 2
+        if n_walkers < 2 * n_params:
+            raise ValueError("Se necesitan al menos 2·(2n-1) caminantes")
+
+        log_data = np.log(rhoa)
+        weights = 1.0 / np.broadcast_to(np.asarray(error, dtype=float), rhoa.shape)
+        lower, upper = parameter_bounds(ab2, n_layers)
+
+        def posterior(log_models):
+            return log_posterior(ab2, mn2, log_data, weights, lower, upper, log_models)
+
+        key = _run_key(ab2, mn2, rhoa, n_layers, n_walkers, error)
+        rng = np.random.default_rng(seed)
+        chain = np.empty((n_steps, n_walkers, n_params))
+        log_prob = np.empty((n_steps, n_walkers))
+
+        stored = _load_checkpoint(checkpoint, key)
+        if stored is not None:
+            done = min(len(stored[0]), n_steps)
+            chain[:done] = stored[0][:done]
+            log_prob[:done] = stored[1][:done]
+            accepted = stored[2].copy()
+            rng.bit_generator.state = stored[3]
+            position, current = chain[done - 1].copy(), log_prob[done - 1].copy()
+        else:
+            if start_model is None:
+                fit = invert_gauss_newton(ab2, mn2, rhoa, n_layers, error=error)
+                if not fit['success']:
+                    raise RuntimeError(fit['error'])
+                start_model = np.concatenate([fit['thickness'], fit['resistivities']])
+            center = np.log(np.asarray(start_model, dtype=float))
+            position = np.clip(center + INITIAL_SCATTER * rng.standard_normal((n_walkers, n_params)),
+                               lower, upper)
+            current = posterior(position)
+            accepted = np.zeros(n_walkers)
+            done = 0
+
+        half = n_walkers // 2
+        halves = (np.arange(half), np.arange(half, n_walkers))
+        a = STRETCH_SCALE
+
+        for step in range(done, n_steps):
+            for moving, reference in (halves, halves[::-1]):
+                # z ~ g(z) ∝ 1/sqrt(z) en [1/a, a]
+                z = ((a - 1.0) * rng.random(half) + 1.0)**2 / a
+                partners = position[reference[rng.integers(half, size=half)]]
+                proposal = partners + z[:, None] * (position[moving] - partners)
+                proposal_prob = posterior(proposal)
+
+                log_ratio = (n_params - 1) * np.log(z) + proposal_prob - current[moving]
+                accept = np.log(rng.random(half)) < log_ratio
+                position[moving[accept]] = proposal[accept]
+                current[moving[accept]] = proposal_prob[accept]
+                accepted[moving] += accept
+
+            chain[step] = position
+            log_prob[step] = current
+            if checkpoint and (step + 1) % checkpoint_every == 0:
+                _save_checkpoint(checkpoint, key, chain[:step + 1], log_prob[:step + 1], accepted, rng)
+
+        if checkpoint and n_steps % checkpoint_every:
+            _save_checkpoint(checkpoint, key, chain, log_prob, accepted, rng)
+
+        if burn_in is None:
+            burn_in = n_steps // 2
+        kept = chain[burn_in:]
+        samples = np.exp(kept.reshape(-1, n_params))
+        thickness = samples[:, :n_layers - 1]
+        resistivities = samples[:, n_layers - 1:]
+        rhat = split_rhat(kept)
+
+        q = np.asarray(percentiles, dtype=float)
+        best = np.unravel_index(np.argmax(log_prob), log_prob.shape)
+
+        return {
+            'success': True,
+            'chain': chain,
+            'log_prob': log_prob,
+            'samples': samples,
+            'percentiles': q,
+            'thickness': np.percentile(thickness, q, axis=0),
+            'depths': np.percentile(np.cumsum(thickness, axis=1), q, axis=0),
+            'resistivities': np.percentile(resistivities, q, axis=0),
+            'map_model': np.exp(chain[best]),
+            'acceptance': accepted / n_steps,
+            'rhat': rhat,
+            'converged': bool(np.all(rhat < RHAT_THRESHOLD)),
+            'n_walkers': n_walkers,
+            'n_steps': n_steps,
+            'burn_in': burn_in,
+            'method': 'mcmc'
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
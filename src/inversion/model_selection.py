@@ -0,0 +1,138 @@
+"""
+Selección del Número de Capas para VESPY
+========================================
+
+Invierte el mismo sondeo con distintos números de capas en paralelo y
+puntúa cada resultado con criterios de información sobre el desajuste
+logarítmico (RSS = Σ (ln ρa_obs - ln ρa_calc)²):
+
+    AIC = M·ln(RSS/M) + 2k
+    BIC = M·ln(RSS/M) + k·ln(M)
+
+con M datos y k = 2n - 1 parámetros. El modelo recomendado es el de menor
+puntuación: más capas solo se aceptan si reducen el desajuste lo
+suficiente para compensar los parámetros añadidos.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .inversion import invert_discrete
+
+
+def information_criteria(rhoa, response, n_params):
+    """
+    Calcular AIC y BIC sobre el desajuste logarítmico.
+
+    Args:
+        rhoa: Resistividades aparentes observadas
+        response: Respuesta del modelo
+        n_params: Número de parámetros del modelo
+
+    Returns:
+        tuple: (aic, bic, rss)
+    """
+    rhoa = np.asarray(rhoa, dtype=float)
+    n_data = len(rhoa)
+    rss = np.sum((np.log(rhoa) - np.log(np.asarray(response, dtype=float)))**2)
+    log_likelihood_term = n_data * np.log(max(rss, 1e-300) / n_data)
+    return (float(log_likelihood_term + 2 * n_params),
+            float(log_likelihood_term + n_params * np.log(n_data)),
+            float(rss))
+
+
+def _invert_layer_count(job):
+    """Invertir con un número de capas (función de módulo para el pool de procesos)."""
+    ab2, mn2, rhoa, n_layers, method, options = job
+    try:
+        result = invert_discrete(ab2, mn2, rhoa, n_layers, method=method, **options)
+        # El VESManager de PyGIMLi no puede volver del proceso de trabajo
+        result.pop('ves_manager', None)
+        return result
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def select_layer_count(ab2, mn2, rhoa, layer_range=(2, 6), criterion='bic',
+                       method='gauss_newton', workers=None, pool=None, **options):
+    """
+    Invertir para varios números de capas y elegir el mejor por AIC/BIC.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        layer_range: Tupla (mínimo, máximo) de capas, ambos incluidos
+        criterion: 'bic' o 'aic'
+        method: Método de inversión ('gauss_newton', 'robust', 'simple' o 'pygimli')
+        workers: Número de procesos (None = todos los núcleos, 1 = secuencial)
+        pool: WorkerPool persistente (pool.py) en lugar de un pool nuevo
+        **options: Opciones del método de inversión
+
+    Returns:
+        dict: ranking (lista ordenada de mejor a peor con n_layers, aic, bic,
+        rss, chi2, n_params y result), best_n_layers, best (resultado
+        recomendado) y criterion
+    """
+    try:
+        if criterion not in ('aic', 'bic'):
+            raise ValueError("El criterio debe ser 'aic' o 'bic'")
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+        layer_counts = list(range(max(layer_range[0], 1), layer_range[1] + 1))
+        if not layer_counts:
+            raise ValueError("Rango de capas vacío")
+
+        jobs = [(ab2, mn2, rhoa, n_layers, method, options) for n_layers in layer_counts]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(jobs))
+
+        if pool is not None:
+            results = pool.map('discrete', [job[:4] for job in jobs], method=method, **options)
+        elif workers <= 1:
+            results = [_invert_layer_count(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_invert_layer_count, jobs))
+
+        ranking = []
+        for n_layers, result in zip(layer_counts, results):
+            if not result['success']:
+                continue
+            n_params = 2 * n_layers - 1
+            aic, bic, rss = information_criteria(rhoa, result['response'], n_params)
+            ranking.append({
+                'n_layers': n_layers,
+                'n_params': n_params,
+                'aic': aic,
+                'bic': bic,
+                'rss': rss,
+                'chi2': result.get('chi2'),
+                'result': result
+            })
+
+        if not ranking:
+            errors = [r.get('error') for r in results]
+            raise RuntimeError(f"Ninguna inversión tuvo éxito: {errors[0]}")
+
+        ranking.sort(key=lambda row: row[criterion])
+
+        return {
+            'success': True,
+            'ranking': ranking,
+            'best_n_layers': ranking[0]['n_layers'],
+            'best': ranking[0]['result'],
+            'criterion': criterion
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
@@ -0,0 +1,345 @@
+"""
+Inversión Suavizada (Occam) Nativa para VESPY
+=============================================
+
+Inversión de un modelo de muchas capas de espesor fijo minimizando
+
+    Φ = ‖W (ln d - ln f(m))‖² + λ ‖C m‖²
+
+donde C es el operador de primeras o segundas diferencias (scipy.sparse)
+y m = ln(ρ - a) - ln(b - ρ) mantiene las resistividades dentro de (a, b),
+igual que TransLogLU de PyGIMLi.
+
+Cada paso Gauss-Newton resuelve (JᵀJ + λCᵀC) δ = Jᵀr - λCᵀCm sin
+matrices densas P×P: λCᵀC es una matriz en banda (solveh_banded) y JᵀJ
+tiene rango M (número de datos), por lo que se aplica la identidad de
+Woodbury. El coste por iteración es O(P·M²), lineal en el número de capas.
+
+lambda_sweep() invierte una serie log-espaciada de λ en paralelo (bloques
+de λ vecinos por proceso, cada uno iniciado con la solución del anterior)
+y elige λ por la esquina de la curva L o por validación cruzada
+generalizada (GCV).
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.lazy import lazy_import
+from .control import InversionCancelled, IterationReporter, cancelled_result
+from .forward import forward_jacobian
+
+# SciPy se carga en la primera inversión, no al importar el módulo
+sparse = lazy_import('scipy.sparse')
+linalg = lazy_import('scipy.linalg')
+
+
+# Límites de resistividad de la transformación logarítmica acotada
+SMOOTH_BOUNDS = (1.0, 1000.0)
+# Serie de λ por defecto del barrido (mismo rango que el selector de la GUI)
+SWEEP_LAMBDAS = np.logspace(0, 3, 13)
+
+
+def difference_operator(n_params, order=1):
+    """
+    Operador disperso de diferencias finitas.
+
+    Args:
+        n_params: Número de parámetros del modelo
+        order: 1 = primeras diferencias, 2 = segundas diferencias
+
+    Returns:
+        scipy.sparse.csr_matrix de forma (n_params - order, n_params)
+    """
+    if order not in (1, 2):
+        raise ValueError("El orden de suavizado debe ser 1 o 2")
+    stencil = [-1.0, 1.0] if order == 1 else [1.0, -2.0, 1.0]
+    return sparse.diags(stencil, list(range(order + 1)),
+                        shape=(n_params - order, n_params), format='csr')
+
+
+def _banded_upper(matrix, bandwidth):
+    """Convertir una matriz dispersa simétrica al formato superior de solveh_banded."""
+    n = matrix.shape[0]
+    banded = np.zeros((bandwidth + 1, n))
+    for k in range(bandwidth + 1):
+        banded[bandwidth - k, k:] = matrix.diagonal(k)
+    return banded
+
+
+def smooth_thicknesses(max_depth, n_layers):
+    """
+    Espesores fijos log-espaciados (finos arriba) que suman max_depth.
+
+    Args:
+        max_depth: Profundidad total de las capas
+        n_layers: Número de capas de espesor finito
+
+    Returns:
+        Array (n_layers,) de espesores
+    """
+    thk = np.logspace(-1, 1, n_layers)
+    return thk * (max_depth / np.sum(thk))
+
+
+def _to_model(rho, lower, upper):
+    return np.log(rho - lower) - np.log(upper - rho)
+
+
+def _to_resistivity(m, lower, upper):
+    # ρ = (a + b·e^m) / (1 + e^m), escrito de forma estable
+    return lower + (upper - lower) / (1.0 + np.exp(-m))
+
+
+def invert_occam(ab2, mn2, rhoa, max_depth, lambda_val=20, smooth_order=1, n_layers=30,
+                 error=0.03, max_iter=20, tol=1e-2, bounds=SMOOTH_BOUNDS, start_model=None,
+                 stop_at_chi1=True, callback=None, cancel_token=None, stopping=None):
+    """
+    Inversión suavizada con regularización dispersa (sin PyGIMLi).
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes observadas
+        max_depth: Profundidad máxima del modelo (debe coincidir con el modelo discreto)
+        lambda_val: Parámetro de regularización
+        smooth_order: Orden de suavizado (1=primera derivada, 2=segunda derivada)
+        n_layers: Número de capas de espesor finito (default: 30)
+        error: Error relativo de los datos (por defecto 3%)
+        max_iter: Máximo de iteraciones
+        tol: Disminución relativa mínima de Φ para continuar
+        bounds: Tupla (mínimo, máximo) de resistividad
+        start_model: Resistividades iniciales (n_layers + 1) (None = homogéneo)
+        stop_at_chi1: Detenerse al alcanzar χ² < 1 (como PyGIMLi)
+        callback: callback(iteration, chi2, resistividades) tras cada iteración; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+
+    Returns:
+        dict: Contiene thicknesses, depths, resistivities, response, chi2, rrms,
+        además de phi_d (desajuste), roughness (‖Cm‖²) y effective_params
+        (traza de la matriz de resolución de datos, para GCV) y stop_reason
+    """
+    try:
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+        lower, upper = bounds
+        n_data = len(rhoa)
+
+        thk = smooth_thicknesses(max_depth, n_layers)
+        n_params = n_layers + 1
+
+        log_data = np.log(rhoa)
+        weights = 1.0 / np.broadcast_to(np.asarray(error, dtype=float), log_data.shape)
+
+        # Regularización λCᵀC en banda; el término diagonal amortigua el paso
+        # (CᵀC es singular: los modelos constantes o lineales no se penalizan)
+        c_matrix = difference_operator(n_params, smooth_order)
+        ctc = (lambda_val * (c_matrix.T @ c_matrix)).tocsr()
+        banded = _banded_upper(ctc, smooth_order)
+        banded[-1] += 1e-2 * max(lambda_val, 1.0)
+
+        margin = 1e-3 * (upper - lower)
+        if start_model is None:
+            start_model = np.full(n_params, np.median(rhoa))
+        m = _to_model(np.clip(start_model, lower + margin, upper - margin), lower, upper)
+
+        def evaluate(m_values):
+            rho = _to_resistivity(m_values, lower, upper)
+            response, jac = forward_jacobian(ab2, mn2, np.concatenate([thk, rho]))
+            residual = (log_data - np.log(response)) * weights
+            phi_d = np.sum(residual**2)
+            phi = phi_d + m_values @ (ctc @ m_values)
+            return rho, response, jac, residual, phi_d, phi
+
+        rho, response, jac, residual, phi_d, phi = evaluate(m)
+        n_iter = 0
+        reporter = IterationReporter(callback, cancel_token, stopping)
+        stop_reason = 'max_iter'
+
+        def weighted_jacobian(rho, jac):
+            # d ln ρa / dm = d ln ρa / d ln ρ · (ρ - a)(b - ρ) / ((b - a) ρ)
+            dlnrho_dm = (rho - lower) * (upper - rho) / ((upper - lower) * rho)
+            return jac[:, n_layers:] * dlnrho_dm * weights[:, None]
+
+        for n_iter in range(1, max_iter + 1):
+            jw = weighted_jacobian(rho, jac)
+            gradient = jw.T @ residual - ctc @ m
+            # Woodbury: (B + JᵀJ)⁻¹g = B⁻¹g - B⁻¹Jᵀ (I + J B⁻¹ Jᵀ)⁻¹ J B⁻¹g
+            solved = linalg.solveh_banded(banded, np.column_stack([gradient, jw.T]))
+            b_grad, b_jt = solved[:, 0], solved[:, 1:]
+            capacitance = np.eye(n_data) + jw @ b_jt
+            step = b_grad - b_jt @ np.linalg.solve(capacitance, jw @ b_grad)
+
+            # Búsqueda lineal simple: reducir el paso hasta que Φ disminuya
+            for factor in (1.0, 0.5, 0.25, 0.1):
+                trial = evaluate(m + factor * step)
+                if trial[-1] < phi:
+                    break
+            else:
+                stop_reason = 'converged'
+                break
+
+            improvement = (phi - trial[-1]) / phi
+            m = m + factor * step
+            rho, response, jac, residual, phi_d, phi = trial
+            if reporter.active and reporter(n_iter, phi_d / n_data, rho):
+                stop_reason = reporter.reason
+                break
+            if stop_at_chi1 and phi_d / n_data < 1.0:
+                stop_reason = 'target_chi2'
+                break
+            if improvement < tol:
+                stop_reason = 'converged'
+                break
+
+        # Parámetros efectivos: traza de J (JᵀJ + B)⁻¹ Jᵀ = traza de K (I + K)⁻¹, K = J B⁻¹ Jᵀ
+        jw = weighted_jacobian(rho, jac)
+        kernel = jw @ linalg.solveh_banded(banded, jw.T)
+        effective_params = np.trace(np.linalg.solve(np.eye(n_data) + kernel, kernel))
+
+        depths = np.concatenate(([0], np.cumsum(thk)))
+        rrms = np.sqrt(np.mean(((rhoa - response) / rhoa)**2)) * 100
+
+        return {
+            'success': True,
+            'thicknesses': thk,
+            'depths': depths,
+            'resistivities': rho,
+            'response': response,
+            'chi2': phi_d / n_data,
+            'rrms': rrms,
+            'max_depth_achieved': np.sum(thk),
+            'phi_d': phi_d,
+            'roughness': (phi - phi_d) / lambda_val,
+            'effective_params': effective_params,
+            'lambda': lambda_val,
+            'n_iter': n_iter,
+            'stop_reason': stop_reason,
+            'stopped': reporter.stopped,
+            'method': 'occam'
+        }
+
+    except InversionCancelled:
+        return cancelled_result()
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+
+def lcurve_corner(phi_d, roughness):
+    """
+    Índice de máxima curvatura de la curva L (log desajuste vs log rugosidad).
+
+    Args:
+        phi_d: Desajuste de cada λ (ordenados por λ)
+        roughness: Rugosidad ‖Cm‖² de cada λ
+
+    Returns:
+        int: Índice de la esquina
+    """
+    x = np.log(np.maximum(phi_d, 1e-300))
+    y = np.log(np.maximum(roughness, 1e-300))
+    if len(x) < 3:
+        return int(np.argmin(x))
+    dx, dy = np.gradient(x), np.gradient(y)
+    ddx, ddy = np.gradient(dx), np.gradient(dy)
+    curvature = (dx * ddy - dy * ddx) / np.maximum((dx**2 + dy**2)**1.5, 1e-300)
+    # Los extremos no tienen vecinos a ambos lados
+    return 1 + int(np.argmax(np.abs(curvature[1:-1])))
+
+
+def _sweep_chunk(job):
+    """Invertir un bloque de λ vecinos, cada uno iniciado con la solución anterior."""
+    ab2, mn2, rhoa, max_depth, lambdas, kwargs = job
+    kwargs = dict(kwargs, stop_at_chi1=False)
+    results, start = [], None
+    for lambda_val in lambdas:
+        result = invert_occam(ab2, mn2, rhoa, max_depth, lambda_val, start_model=start, **kwargs)
+        if result['success']:
+            start = result['resistivities']
+        results.append(result)
+    return results
+
+
+def lambda_sweep(ab2, mn2, rhoa, max_depth, lambdas=None, criterion='lcurve',
+                 workers=None, **kwargs):
+    """
+    Barrido de λ con selección automática (curva L o GCV).
+
+    Los λ se ordenan de mayor a menor y se reparten en bloques contiguos,
+    uno por proceso; dentro de cada bloque cada inversión parte de la
+    solución del λ vecino (más suave). Cada inversión converge por completo
+    (sin detenerse en χ² = 1) para que la curva refleje el compromiso real.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        max_depth: Profundidad máxima del modelo
+        lambdas: Serie de λ (None = 1 a 1000, 13 valores log-espaciados)
+        criterion: 'lcurve' (esquina de la curva L) o 'gcv'
+        workers: Número de procesos (None = todos los núcleos, 1 = secuencial)
+        **kwargs: Argumentos de invert_occam (smooth_order, n_layers, error, ...)
+
+    Returns:
+        dict: lambdas, phi_d, chi2, roughness, gcv, effective_params (curva
+        completa ordenada por λ creciente), best_index, best_lambda,
+        criterion y result (inversión del λ elegido)
+    """
+    try:
+        if criterion not in ('lcurve', 'gcv'):
+            raise ValueError("El criterio debe ser 'lcurve' o 'gcv'")
+        lambdas = np.sort(np.asarray(SWEEP_LAMBDAS if lambdas is None else lambdas, dtype=float))[::-1]
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(lambdas)))
+        jobs = [(ab2, mn2, rhoa, max_depth, chunk, kwargs)
+                for chunk in np.array_split(lambdas, workers)]
+
+        if workers == 1:
+            chunks = [_sweep_chunk(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunks = list(executor.map(_sweep_chunk, jobs))
+        results = [result for chunk in chunks for result in chunk][::-1]
+        lambdas = lambdas[::-1]
+
+        failed = [r.get('error') for r in results if not r['success']]
+        if failed:
+            raise RuntimeError(failed[0])
+
+        n_data = len(np.atleast_1d(rhoa))
+        phi_d = np.array([r['phi_d'] for r in results])
+        roughness = np.array([r['roughness'] for r in results])
+        effective = np.array([r['effective_params'] for r in results])
+        gcv = n_data * phi_d / np.maximum(n_data - effective, 1e-12)**2
+
+        best = lcurve_corner(phi_d, roughness) if criterion == 'lcurve' else int(np.argmin(gcv))
+
+        return {
+            'success': True,
+            'lambdas': lambdas,
+            'phi_d': phi_d,
+            'chi2': phi_d / n_data,
+            'roughness': roughness,
+            'gcv': gcv,
+            'effective_params': effective,
+            'best_index': best,
+            'best_lambda': lambdas[best],
+            'criterion': criterion,
+            'result': results[best]
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
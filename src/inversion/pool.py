@@ -0,0 +1,186 @@
+"""
+Pool Persistente de Procesos para VESPY
+=======================================
+
+Procesos de trabajo de larga vida para muchas inversiones pequeñas, en
+los que el arranque de procesos y la importación de PyGIMLi (varios
+segundos) dominan frente a la inversión en sí:
+
+- Cada proceso importa PyGIMLi una sola vez al arrancar, precalcula el
+  filtro de Hankel del modelado directo nativo y reutiliza entre trabajos
+  sus VESManager (uno por número de capas) y sus operadores
+  VESRhoModelling (uno por tabla AB/2, MN/2 y espesores).
+- Los trabajos se envían a una cola con submit() (devuelve un Future) o
+  map() (lista de resultados en orden), tanto desde SEVApp como desde
+  scripts.
+- default_pool() devuelve un pool compartido por el proceso que se crea
+  en el primer uso y se cierra al salir.
+
+Los trabajos se identifican por nombre (JOBS). Los errores de cada
+trabajo se devuelven como {'success': False, 'error': ...} y el
+'ves_manager' se retira del resultado (no puede salir del proceso).
+Los callbacks y CancelToken no atraviesan procesos: un trabajo pendiente
+se cancela con Future.cancel().
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import atexit
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.lazy import pygimli_available
+from .forward import hankel_j0_filter
+from .inversion import (VESInverter, enable_manager_reuse, invert_discrete,
+                        invert_smooth_model)
+
+
+# VESInverter del proceso de trabajo (se crea en el primer sondeo)
+_worker_inverter = None
+# Duración de cada ping de warm(): retiene el proceso para que los demás pings
+# lleguen a otros procesos
+PING_HOLD = 0.05
+
+
+def _invert_sounding(data, **kwargs):
+    """Invertir un DataFrame SEV con el VESInverter del proceso."""
+    global _worker_inverter
+    if _worker_inverter is None:
+        _worker_inverter = VESInverter()
+    return _worker_inverter.invert(data, **kwargs)
+
+
+# Trabajos disponibles: nombre → función
+JOBS = {
+    'sounding': _invert_sounding,          # VESInverter.invert(data, **kwargs)
+    'discrete': invert_discrete,           # invert_discrete(ab2, mn2, rhoa, n_layers, **kwargs)
+    'smooth': invert_smooth_model          # invert_smooth_model(ab2, mn2, rhoa, max_depth, **kwargs)
+}
+
+
+def _warm_worker():
+    """Inicializar un proceso de trabajo: cargar PyGIMLi y los núcleos del modelado directo."""
+    hankel_j0_filter()
+    if pygimli_available():
+        try:
+            import pygimli  # noqa: F401
+            from pygimli.physics import ves  # noqa: F401
+            enable_manager_reuse()
+        except ImportError:
+            pass
+
+
+def _run_job(kind, args, kwargs):
+    """Ejecutar un trabajo en el proceso de trabajo (errores capturados)."""
+    try:
+        result = JOBS[kind](*args, **kwargs)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+    if isinstance(result, dict):
+        result.pop('ves_manager', None)
+    return result
+
+
+def _ping(hold=0.0):
+    """Trabajo vacío para arrancar un proceso (devuelve su PID)."""
+    time.sleep(hold)
+    return os.getpid()
+
+
+class WorkerPool:
+    """
+    Pool de procesos persistente con PyGIMLi precargado.
+
+    Args:
+        workers: Número de procesos (None = todos los núcleos)
+    """
+
+    def __init__(self, workers=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        return self._executor
+
+    def submit(self, kind, *args, **kwargs):
+        """
+        Encolar un trabajo.
+
+        Args:
+            kind: Nombre del trabajo ('sounding', 'discrete' o 'smooth')
+            *args, **kwargs: Argumentos de la función del trabajo
+
+        Returns:
+            concurrent.futures.Future con el diccionario de resultado
+        """
+        if kind not in JOBS:
+            raise ValueError(f"Trabajo desconocido: {kind}")
+        return self._get_executor().submit(_run_job, kind, args, kwargs)
+
+    def map(self, kind, arguments, **kwargs):
+        """
+        Encolar un trabajo por tupla de argumentos y esperar los resultados.
+
+        Args:
+            kind: Nombre del trabajo
+            arguments: Iterable de tuplas de argumentos posicionales
+            **kwargs: Argumentos con nombre comunes a todos los trabajos
+
+        Returns:
+            list: Resultados en el mismo orden que arguments
+        """
+        futures = [self.submit(kind, *args, **kwargs) for args in arguments]
+        return [future.result() for future in futures]
+
+    def warm(self):
+        """
+        Arrancar todos los procesos de antemano (importan PyGIMLi una vez).
+        
+        Un proceso libre puede atender varios pings, así que se envían
+        rondas hasta que hayan respondido `workers` PID distintos.
+        
+        Returns:
+            set: PID de los procesos arrancados
+        """
+        executor = self._get_executor()
+        pids = set()
+        while len(pids) < self.workers:
+            futures = [executor.submit(_ping, PING_HOLD) for _ in range(self.workers)]
+            pids.update(future.result() for future in futures)
+        return pids
+
+    def shutdown(self, wait=True):
+        """Cerrar los procesos (trabajos pendientes cancelados si wait=False)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+_default_pool = None
+
+
+def default_pool():
+    """
+    Pool compartido del proceso (se crea en el primer uso y se cierra al salir).
+
+    Returns:
+        WorkerPool
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = WorkerPool()
+        atexit.register(_default_pool.shutdown)
+    return _default_pool
@@ -0,0 +1,102 @@
+"""
+Inversión Secuencial de Perfiles para VESPY
+===========================================
+
+Invierte los sondeos de un perfil uno a uno, ordenados por posición X,
+iniciando cada inversión con el modelo convergido del sondeo anterior
+(arranque en caliente). Los sondeos vecinos tienen modelos parecidos, por
+lo que cada inversión necesita menos iteraciones que desde un modelo
+homogéneo. Con Gauss-Newton, las inversiones en caliente empiezan además
+con un amortiguamiento menor (el modelo inicial ya está cerca de la
+solución).
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import numpy as np
+
+from .inversion import invert_discrete
+
+
+# Amortiguamiento inicial de Marquardt para inversiones con arranque en caliente
+WARM_DAMPING = 0.01
+
+
+def _invert_one(method, ab2, mn2, rhoa, n_layers, start_model, options):
+    """Invertir un sondeo; con Gauss-Newton en caliente se reduce el amortiguamiento."""
+    if method == 'gauss_newton' and start_model is not None:
+        options = dict(options, damping=options.get('warm_damping', WARM_DAMPING))
+    return invert_discrete(ab2, mn2, rhoa, n_layers, method=method, start_model=start_model, **options)
+
+
+def _iterations(results):
+    """Iteraciones por sondeo (-1 si la inversión falló o no informa el número)."""
+    return np.array([r['n_iter'] if r['success'] and r.get('n_iter') is not None else -1
+                     for r in results])
+
+
+def invert_profile_sequential(soundings, x_positions, n_layers, method='gauss_newton',
+                              compare_cold=False, **options):
+    """
+    Inversión de un perfil con arranque en caliente entre sondeos vecinos.
+
+    Args:
+        soundings: Lista de tuplas (ab2, mn2, rhoa); mn2 puede ser None
+        x_positions: Posición X de cada sondeo
+        n_layers: Número de capas
+        method: 'gauss_newton', 'robust', 'simple' o 'pygimli'
+        compare_cold: Repetir cada inversión desde el modelo homogéneo para
+            medir las iteraciones ahorradas (duplica el coste)
+        **options: Opciones del método (error, max_iter, lam, lam_factor,
+            warm_damping, ...)
+
+    Returns:
+        dict: results (lista en el orden de entrada), order (orden por X),
+        n_iter (N,) (-1 si no se conoce), n_iter_cold (N,) o None,
+        iterations_saved (total) o None
+    """
+    try:
+        if len(soundings) != len(x_positions):
+            raise ValueError("Debe haber una posición X por sondeo")
+        order = np.argsort(np.asarray(x_positions, dtype=float), kind='stable')
+
+        results = [None] * len(soundings)
+        start_model = None
+        for i in order:
+            ab2, mn2, rhoa = soundings[i]
+            ab2 = np.asarray(ab2, dtype=float)
+            rhoa = np.asarray(rhoa, dtype=float)
+            result = _invert_one(method, ab2, mn2, rhoa, n_layers, start_model, options)
+            results[i] = result
+            if result['success']:
+                start_model = np.concatenate([result['thickness'], result['resistivities']])
+
+        n_iter = _iterations(results)
+
+        n_iter_cold = None
+        saved = None
+        if compare_cold:
+            cold = [_invert_one(method, np.asarray(ab2, dtype=float), mn2, np.asarray(rhoa, dtype=float),
+                                n_layers, None, options)
+                    for ab2, mn2, rhoa in soundings]
+            n_iter_cold = _iterations(cold)
+            # El primer sondeo del perfil siempre parte en frío
+            valid = (n_iter >= 0) & (n_iter_cold >= 0)
+            saved = int(np.sum(n_iter_cold[valid] - n_iter[valid]))
+
+        return {
+            'success': True,
+            'results': results,
+            'order': order,
+            'n_iter': n_iter,
+            'n_iter_cold': n_iter_cold,
+            'iterations_saved': saved,
+            'method': method
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
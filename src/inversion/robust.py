@@ -0,0 +1,156 @@
+"""
+Inversión Robusta (IRLS) para VESPY
+===================================
+
+Inversión discreta con normas robustas del desajuste logarítmico mediante
+mínimos cuadrados iterativamente reponderados (IRLS). Cada iteración
+externa resuelve un problema Levenberg-Marquardt (jacobiano analítico y
+modelado directo vectorizados) con el error de cada dato escalado por
+1/sqrt(w) y recalcula los pesos a partir de los residuos normalizados
+r = (ln ρa_obs - ln ρa_calc) / error:
+
+    Huber: w = 1                 si |r| ≤ c
+           w = c / |r|           si |r| > c
+    L1:    w = 1 / max(|r|, ε)
+
+Un dato anómalo (p. ej. un salto de empalme no corregido) recibe un peso
+pequeño en lugar de deformar todo el modelo. Los pesos finales se
+devuelven para marcar los datos sospechosos.
+
+El callback, el CancelToken y los StoppingCriteria se atienden tras cada
+reponderación con el χ² ponderado; la cancelación también se comprueba
+dentro de cada problema Levenberg-Marquardt.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import numpy as np
+
+from .control import InversionCancelled, IterationReporter, cancelled_result
+from .gauss_newton import levenberg_marquardt, starting_model
+
+
+# Umbral de Huber (95% de eficiencia con errores gaussianos)
+HUBER_THRESHOLD = 1.345
+# Residuo normalizado mínimo en los pesos L1 (evita pesos infinitos)
+L1_EPSILON = 1e-2
+# Peso de Huber por debajo del cual un dato se marca como anómalo
+OUTLIER_WEIGHT = 0.5
+
+
+def robust_weights(residuals, norm='huber', threshold=HUBER_THRESHOLD):
+    """
+    Pesos IRLS a partir de residuos normalizados.
+
+    Args:
+        residuals: Residuos normalizados por el error
+        norm: 'huber' o 'l1'
+        threshold: Umbral c de Huber
+
+    Returns:
+        Array de pesos en (0, 1] (Huber) o (0, 1/ε] (L1)
+    """
+    magnitude = np.abs(residuals)
+    if norm == 'huber':
+        return np.minimum(1.0, threshold / np.maximum(magnitude, 1e-300))
+    if norm == 'l1':
+        return 1.0 / np.maximum(magnitude, L1_EPSILON)
+    raise ValueError(f"Norma desconocida: {norm}")
+
+
+def invert_robust(ab2, mn2, rhoa, n_layers, norm='huber', threshold=HUBER_THRESHOLD,
+                  start_model=None, error=0.03, max_irls=20, tol=1e-3, max_iter=30,
+                  outlier_weight=OUTLIER_WEIGHT, callback=None, cancel_token=None, stopping=None):
+    """
+    Inversión discreta con norma robusta (Huber o L1) por IRLS.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes
+        n_layers: Número de capas
+        norm: 'huber' o 'l1'
+        threshold: Umbral c de Huber (en unidades del error)
+        start_model: Modelo inicial [espesores, resistividades] (opcional)
+        error: Error relativo de los datos (por defecto 3%)
+        max_irls: Máximo de reponderaciones
+        tol: Cambio máximo de pesos o de ln(modelo) para declarar convergencia
+        max_iter: Máximo de iteraciones Levenberg-Marquardt por reponderación
+        outlier_weight: Peso de Huber bajo el cual un dato se marca como anómalo
+        callback: callback(n_irls, chi2, model) tras cada reponderación; True = terminar
+        cancel_token: CancelToken para cancelar desde otro hilo
+        stopping: StoppingCriteria (χ² objetivo, estancamiento, tiempo máximo)
+
+    Returns:
+        dict: Resultados de inversión con modelo discreto más data_weights
+        (pesos finales), outliers (máscara booleana), residuals (normalizados),
+        chi2 (ponderado), chi2_l2 (sin ponderar), n_irls, norm y stop_reason
+    """
+    try:
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+        if start_model is None:
+            start_model = starting_model(ab2, rhoa, n_layers)
+        model = np.asarray(start_model, dtype=float)
+        error = np.broadcast_to(np.asarray(error, dtype=float), rhoa.shape)
+
+        weights = np.ones_like(rhoa)
+        reporter = IterationReporter(callback, cancel_token, stopping)
+        n_iter = 0
+        converged = False
+        n_irls = 0
+
+        for n_irls in range(1, max_irls + 1):
+            result = levenberg_marquardt(ab2, mn2, rhoa, model, error=error / np.sqrt(weights),
+                                         max_iter=max_iter, cancel_token=cancel_token)
+            model_change = np.max(np.abs(np.log(result['models'][0] / model)))
+            model = result['models'][0]
+            response = result['response'][0]
+            n_iter += int(result['n_iter'][0])
+
+            residuals = (np.log(rhoa) - np.log(response)) / error
+            new_weights = robust_weights(residuals, norm, threshold)
+            change = np.max(np.abs(new_weights - weights) / np.max(new_weights))
+            weights = new_weights
+            if reporter.active and reporter(n_irls, float(np.mean(weights * residuals**2)), model):
+                break
+            # Con L1 los pesos de los datos mejor ajustados oscilan cerca de ε: basta
+            # con que el modelo deje de cambiar
+            if change < tol or model_change < tol:
+                converged = True
+                break
+
+        thickness = model[:n_layers - 1]
+        # Anómalos según los pesos de Huber de los residuos finales (|r| > c / outlier_weight),
+        # comparables entre normas (los pesos L1 dependen de ε)
+        outliers = robust_weights(residuals, 'huber', threshold) < outlier_weight
+
+        return {
+            'success': True,
+            'thickness': thickness,
+            'depths': np.cumsum(thickness),
+            'resistivities': model[n_layers - 1:],
+            'max_depth': np.max(ab2) / 3,
+            'response': response,
+            'chi2': float(np.mean(weights * residuals**2)),
+            'chi2_l2': float(np.mean(residuals**2)),
+            'residuals': residuals,
+            'data_weights': weights,
+            'outliers': outliers,
+            'n_irls': n_irls,
+            'n_iter': n_iter,
+            'converged': converged,
+            'stop_reason': reporter.stop_reason(converged=converged),
+            'stopped': reporter.stopped,
+            'norm': norm,
+            'method': 'robust'
+        }
+
+    except InversionCancelled:
+        return cancelled_result()
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
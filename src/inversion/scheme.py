@@ -0,0 +1,112 @@
+"""
+Esquemas de Medición PyGIMLi para VESPY
+=======================================
+
+Construcción vectorizada del DataContainerERT de un sondeo Schlumberger
+(A---M---N---B, centrado en 0):
+
+- Las posiciones de electrodo se deduplican con np.unique: los electrodos
+  compartidos entre lecturas (p. ej. AB/2 repetidos en los empalmes) se
+  crean una sola vez.
+- Sensores, índices a/b/m/n y factor geométrico k se asignan de una vez
+  desde arrays, sin crear sensores ni lecturas uno a uno.
+- Los esquemas preparados se guardan en una caché LRU indexada por la
+  tabla de espaciamientos; cada inversión recibe una copia con sus ρa.
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+# Esquemas preparados que se conservan en memoria
+SCHEME_CACHE_SIZE = 32
+# MN relativo a AB/2 cuando no se conoce MN/2 (MN ≈ 10% de AB/2)
+DEFAULT_MN_RATIO = 0.1
+
+
+def default_mn2(ab2):
+    """
+    MN/2 supuesto cuando el sondeo no lo registra (MN = 10% de AB/2).
+
+    Args:
+        ab2: Array de AB/2
+
+    Returns:
+        np.ndarray: MN/2 con la forma de ab2 (siempre menor que AB/2)
+    """
+    return np.asarray(ab2, dtype=float) * DEFAULT_MN_RATIO / 2
+
+
+def schlumberger_electrodes(ab2, mn2=None):
+    """
+    Posiciones únicas de electrodo e índices de cada lectura.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = MN = 10% de AB/2)
+
+    Returns:
+        tuple: (positions (S,), indices (4, N) con las filas a, b, m, n,
+        k (N,) factor geométrico)
+    """
+    ab2 = np.asarray(ab2, dtype=float)
+    if mn2 is None:
+        mn2 = default_mn2(ab2)
+    mn2 = np.broadcast_to(np.asarray(mn2, dtype=float), ab2.shape)
+
+    # Filas a, b, m, n: posiciones por lectura
+    electrodes = np.stack([-ab2, ab2, -mn2, mn2])
+    positions, inverse = np.unique(electrodes, return_inverse=True)
+    indices = inverse.reshape(electrodes.shape)
+
+    am = ab2 - mn2
+    an = ab2 + mn2
+    k = 2 * np.pi / (2 / am - 2 / an)
+    return positions, indices, k
+
+
+@lru_cache(maxsize=SCHEME_CACHE_SIZE)
+def _cached_scheme(ab2_bytes, mn2_bytes):
+    import pygimli as pg
+
+    ab2 = np.frombuffer(ab2_bytes)
+    mn2 = None if mn2_bytes is None else np.frombuffer(mn2_bytes)
+    positions, indices, k = schlumberger_electrodes(ab2, mn2)
+
+    scheme = pg.DataContainerERT()
+    scheme.setSensorPositions(np.column_stack([positions, np.zeros((len(positions), 2))]))
+    scheme.resize(len(ab2))
+    for token, values in zip(('a', 'b', 'm', 'n'), indices):
+        scheme.set(token, values.astype(float))
+    scheme.set('k', k)
+    scheme.set('valid', np.ones(len(ab2)))
+    return scheme
+
+
+def schlumberger_scheme(ab2, rhoa, mn2=None):
+    """
+    DataContainerERT de un sondeo Schlumberger (reutiliza el esquema si ya existe).
+
+    Args:
+        ab2: Array de AB/2
+        rhoa: Array de resistividades aparentes
+        mn2: Array de MN/2 (None = MN = 10% de AB/2)
+
+    Returns:
+        pg.DataContainerERT con sensores, a/b/m/n, k y rhoa
+    """
+    import pygimli as pg
+
+    ab2 = np.ascontiguousarray(np.atleast_1d(ab2), dtype=float)
+    mn2_bytes = None
+    if mn2 is not None:
+        mn2_bytes = np.ascontiguousarray(np.broadcast_to(np.asarray(mn2, dtype=float), ab2.shape)).tobytes()
+
+    # Copia: la plantilla en caché no debe recibir los datos de cada inversión
+    scheme = pg.DataContainerERT(_cached_scheme(ab2.tobytes(), mn2_bytes))
+    scheme.set('rhoa', np.asarray(rhoa, dtype=float))
+    return scheme
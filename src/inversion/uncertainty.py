@@ -0,0 +1,165 @@
+"""
+Incertidumbre Monte Carlo para VESPY
+====================================
+
+Estima la incertidumbre de un modelo de capas perturbando los datos con el
+modelo de error (3% relativo, el mismo de invert_pygimli_discrete) y
+reinvirtiendo cientos de realizaciones.
+
+Las realizaciones se invierten por lotes con levenberg_marquardt (un
+único modelado directo vectorizado por iteración para todo el lote) y los
+lotes se reparten entre procesos. Todas parten del modelo ajustado a los
+datos originales.
+
+Resultados:
+- Percentiles por capa de espesores, profundidades y resistividades
+- Perfiles de probabilidad en profundidad: probabilidad de encontrar cada
+  interfaz en cada intervalo de profundidad y percentiles de ρ(z)
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .gauss_newton import invert_gauss_newton, levenberg_marquardt
+
+
+# Percentiles por defecto (mediana, ±1σ y ±2σ aproximados)
+DEFAULT_PERCENTILES = (2.5, 16, 50, 84, 97.5)
+
+
+def _invert_realizations(job):
+    """Invertir un lote de realizaciones (función de módulo para el pool de procesos)."""
+    ab2, mn2, data, start_model, error, max_iter = job
+    start_models = np.repeat(start_model[None, :], len(data), axis=0)
+    result = levenberg_marquardt(ab2, mn2, data, start_models, error=error, max_iter=max_iter)
+    return result['models'], result['chi2'], result['converged']
+
+
+def depth_probability(interfaces, depth_grid):
+    """
+    Probabilidad de encontrar cada interfaz en cada intervalo de profundidad.
+
+    Args:
+        interfaces: Array (R, n-1) de profundidades de interfaz por realización
+        depth_grid: Bordes de los intervalos de profundidad (B+1,)
+
+    Returns:
+        Array (n-1, B) de probabilidades (cada fila suma ≤ 1)
+    """
+    n_realizations = interfaces.shape[0]
+    return np.array([np.histogram(column, bins=depth_grid)[0] / n_realizations
+                     for column in interfaces.T])
+
+
+def resistivity_profile(interfaces, resistivities, depths):
+    """
+    Resistividad en función de la profundidad para cada realización.
+
+    Args:
+        interfaces: Array (R, n-1) de profundidades de interfaz
+        resistivities: Array (R, n) de resistividades
+        depths: Profundidades de evaluación (Z,)
+
+    Returns:
+        Array (R, Z) con ρ(z) de cada realización
+    """
+    # Índice de capa: número de interfaces por encima de cada profundidad
+    layer = np.sum(depths[None, None, :] >= interfaces[:, :, None], axis=1)
+    return np.take_along_axis(resistivities, layer, axis=1)
+
+
+def monte_carlo_uncertainty(ab2, mn2, rhoa, n_layers, n_realizations=200, error=0.03,
+                            start_model=None, workers=None, seed=None,
+                            percentiles=DEFAULT_PERCENTILES, depth_grid=None, max_iter=30):
+    """
+    Incertidumbre de un modelo discreto por reinversión de datos perturbados.
+
+    Args:
+        ab2: Array de AB/2
+        mn2: Array de MN/2 (None = Schlumberger ideal)
+        rhoa: Array de resistividades aparentes observadas
+        n_layers: Número de capas
+        n_realizations: Número de realizaciones
+        error: Error relativo de los datos (por defecto 3%)
+        start_model: Modelo inicial [espesores, resistividades] (None = ajuste previo)
+        workers: Número de procesos (None = todos los núcleos, 1 = en este proceso)
+        seed: Semilla del generador (resultados reproducibles)
+        percentiles: Percentiles a calcular
+        depth_grid: Bordes de profundidad para los perfiles (None = 60 intervalos log hasta AB/2 máx / 2)
+        max_iter: Máximo de iteraciones por realización
+
+    Returns:
+        dict: percentiles, thickness/depths/resistivities (percentiles × capa),
+        depth_grid, interface_probability (n-1, B), resistivity_percentiles
+        (percentiles × B), models (R, 2n-1), chi2 (R,), converged (R,)
+    """
+    try:
+        ab2 = np.asarray(ab2, dtype=float)
+        rhoa = np.asarray(rhoa, dtype=float)
+
+        if start_model is None:
+            fit = invert_gauss_newton(ab2, mn2, rhoa, n_layers, error=error)
+            if not fit['success']:
+                raise RuntimeError(fit['error'])
+            start_model = np.concatenate([fit['thickness'], fit['resistivities']])
+        start_model = np.asarray(start_model, dtype=float)
+
+        # Ruido log-normal coherente con un error relativo en ln(ρa)
+        rng = np.random.default_rng(seed)
+        data = rhoa * np.exp(rng.normal(0.0, error, (n_realizations, len(rhoa))))
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, n_realizations))
+        jobs = [(ab2, mn2, chunk, start_model, error, max_iter)
+                for chunk in np.array_split(data, workers)]
+
+        if workers == 1:
+            outputs = [_invert_realizations(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outputs = list(executor.map(_invert_realizations, jobs))
+
+        models = np.concatenate([out[0] for out in outputs])
+        chi2 = np.concatenate([out[1] for out in outputs])
+        converged = np.concatenate([out[2] for out in outputs])
+
+        thickness = models[:, :n_layers - 1]
+        resistivities = models[:, n_layers - 1:]
+        interfaces = np.cumsum(thickness, axis=1)
+
+        if depth_grid is None:
+            depth_grid = np.logspace(np.log10(ab2.min() / 10), np.log10(ab2.max() / 2), 61)
+        depth_grid = np.asarray(depth_grid, dtype=float)
+        centers = np.sqrt(depth_grid[:-1] * depth_grid[1:]) if depth_grid[0] > 0 \
+            else 0.5 * (depth_grid[:-1] + depth_grid[1:])
+        profiles = resistivity_profile(interfaces, resistivities, centers)
+
+        q = np.asarray(percentiles, dtype=float)
+        return {
+            'success': True,
+            'percentiles': q,
+            'thickness': np.percentile(thickness, q, axis=0),
+            'depths': np.percentile(interfaces, q, axis=0),
+            'resistivities': np.percentile(resistivities, q, axis=0),
+            'depth_grid': depth_grid,
+            'depth_centers': centers,
+            'interface_probability': depth_probability(interfaces, depth_grid),
+            'resistivity_percentiles': np.percentile(profiles, q, axis=0),
+            'start_model': start_model,
+            'models': models,
+            'chi2': chi2,
+            'converged': converged,
+            'n_realizations': n_realizations
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
@@ -10,8 +10,6 @@ Email: josemariagarciamarquez2.72@gmail.com
 
 import numpy as np
 import pandas as pd
-import seaborn as sns
-from scipy.fft import fft, fftfreq
 
 
 def plot_resistivity_curve(ax, data, empalme_data=None, smoothed_data=None):
@@ -65,6 +63,9 @@ def plot_statistical_analysis(figure, resistivity):
     Returns:
         dict con estadísticas calculadas
     """
+    import seaborn as sns
+    from scipy.fft import fft, fftfreq
+    
     figure.clear()
     
     # Calcular estadísticas
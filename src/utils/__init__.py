@@ -3,12 +3,27 @@ Paquete de utilidades para VESPY
 ================================
 
 Funciones auxiliares y helpers.
+
+Los helpers de interfaz (PyQt5) se importan en el primer acceso para que
+`utils.lazy` pueda usarse sin cargar la GUI.
 """
 
-from .ui_helpers import update_model_table, update_smooth_model_table, update_data_table
+from .lazy import lazy_import, is_available, pygimli_available
+
+_UI_HELPERS = ('update_model_table', 'update_smooth_model_table', 'update_data_table')
 
 __all__ = [
     'update_model_table',
     'update_smooth_model_table',
-    'update_data_table'
-]
\ No newline at end of file
+    'update_data_table',
+    'lazy_import',
+    'is_available',
+    'pygimli_available'
+]
+
+
+def __getattr__(name):
+    if name in _UI_HELPERS:
+        from . import ui_helpers
+        return getattr(ui_helpers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
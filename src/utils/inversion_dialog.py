@@ -16,35 +16,62 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
+# Métodos del combo de la interfaz → métodos de VESInverter
+METHOD_MAP = {
+    "Optimización Simple": "simple",
+    "Gauss-Newton (jacobiano analítico)": "gauss_newton",
+    "PyGIMLi (si disponible)": "auto"
+}
+
 class InversionWorker(QThread):
     """Worker thread para ejecutar inversión sin bloquear GUI"""
     
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(int)
+    iteration = pyqtSignal(int, float)
     
-    def __init__(self, data, num_layers, method, lam, lam_factor):
+    def __init__(self, data, num_layers, method, lam, lam_factor, max_iter=20, stopping=None):
         super().__init__()
         self.data = data
         self.num_layers = num_layers
         self.method = method
         self.lam = lam
         self.lam_factor = lam_factor
+        self.max_iter = max_iter
+        self.stopping = stopping
+        
+        from inversion.control import CancelToken
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """Solicitar la cancelación (se atiende en la siguiente iteración)"""
+        self.cancel_token.cancel()
+    
+    def _on_iteration(self, iteration, chi2, model):
+        """Progreso por iteración (las señales cruzan de hilo de forma segura)"""
+        self.iteration.emit(iteration, float(chi2))
+        self.progress.emit(min(95, 5 + int(90 * iteration / max(self.max_iter, 1))))
+        return False
     
     def run(self):
         """Ejecutar inversión en thread separado"""
         try:
             from inversion.inversion import VESInverter
             
-            self.progress.emit(20)
+            self.progress.emit(5)
             inverter = VESInverter()
             
-            self.progress.emit(40)
             result = inverter.invert(
                 self.data, 
                 num_layers=self.num_layers,
                 lam=self.lam,
-                lam_factor=self.lam_factor
+                lam_factor=self.lam_factor,
+                method=METHOD_MAP.get(self.method, 'auto'),
+                callback=self._on_iteration,
+                cancel_token=self.cancel_token,
+                stopping=self.stopping,
+                max_iter=self.max_iter
             )
             
             self.progress.emit(100)
@@ -87,7 +114,7 @@ class InversionDialog(QDialog):
         method_layout = QHBoxLayout()
         method_layout.addWidget(QLabel("Método:"))
         self.method_combo = QComboBox()
-        self.method_combo.addItems(["Optimización Simple", "PyGIMLi (si disponible)"])
+        self.method_combo.addItems(list(METHOD_MAP.keys()))
         method_layout.addWidget(self.method_combo)
         params_layout.addLayout(method_layout)
         
@@ -176,7 +203,7 @@ class InversionDialog(QDialog):
         button_layout.addWidget(self.accept_btn)
         
         cancel_btn = QPushButton("❌ Cancelar")
-        cancel_btn.clicked.connect(self.reject)
+        cancel_btn.clicked.connect(self.cancel_or_close)
         button_layout.addWidget(cancel_btn)
         
         layout.addLayout(button_layout)
@@ -191,28 +218,54 @@ class InversionDialog(QDialog):
             self.progress_bar.setValue(0)
             self.run_btn.setEnabled(False)
             
+            # Detener al alcanzar el RMS objetivo: con error del 3%, χ² = (RMS% / 3)²
+            from inversion.control import StoppingCriteria
+            stopping = StoppingCriteria(target_chi2=(self.rms_spin.value() / 3.0)**2)
+            
             # Crear y ejecutar worker
             self.worker = InversionWorker(
                 self.data, 
                 self.layers_spin.value(),
                 self.method_combo.currentText(),
                 self.lambda_spin.value(),
-                self.lam_factor_spin.value()
+                self.lam_factor_spin.value(),
+                max_iter=self.iter_spin.value(),
+                stopping=stopping
             )
             self.worker.finished.connect(self.on_inversion_finished)
             self.worker.error.connect(self.on_inversion_error)
             self.worker.progress.connect(self.progress_bar.setValue)
+            self.worker.iteration.connect(self.on_iteration)
             self.worker.start()
             
         except Exception as e:
             self.on_inversion_error(str(e))
     
+    def cancel_or_close(self):
+        """Cancelar la inversión en curso o, si no hay ninguna, cerrar el diálogo"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.log("⏹ Cancelando...")
+        else:
+            self.reject()
+    
+    def on_iteration(self, iteration, chi2):
+        """Mostrar el avance de cada iteración"""
+        self.log(f"  Iteración {iteration}: χ² = {chi2:.3f}")
+    
     def on_inversion_finished(self, result):
         """Callback cuando la inversión termina"""
+        if result.get('cancelled'):
+            self.log("\\n⏹ Inversión cancelada")
+            self.progress_bar.setVisible(False)
+            self.run_btn.setEnabled(True)
+            return
+        
         self.result = result
         self.log(f"\\n✅ Inversión completada")
         self.log(f"Método: {result.get('method', 'N/A')}")
         self.log(f"RMS Error: {result.get('rms_error', 0):.4f}")
+        self.log(f"Criterio de parada: {result.get('stop_reason', 'N/A')}")
         self.log(f"\\nResistividades (Ω·m):")
         for i, rho in enumerate(result.get('resistivities', [])):
             self.log(f"  Capa {i+1}: {rho:.2f}")
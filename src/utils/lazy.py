@@ -0,0 +1,77 @@
+"""
+Importaciones Diferidas para VESPY
+==================================
+
+Las dependencias pesadas (PyQt5, seaborn, PyGIMLi, partes de SciPy) se
+cargan en el primer uso, no al importar los módulos de cálculo. Así los
+procesos de trabajo y los scripts que solo necesitan cálculos arrancan
+rápido.
+
+La detección de dependencias opcionales se hace una sola vez por
+proceso y no importa el paquete (solo busca su especificación).
+
+Autor: VESPY Team
+Fecha: 2025
+"""
+
+import importlib
+import importlib.util
+from functools import lru_cache
+
+
+class LazyModule:
+    """Módulo que se importa al acceder al primer atributo."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "cargado" if self._module is not None else "diferido"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """
+    Obtener un módulo que se importa en el primer acceso.
+
+    Args:
+        name: Nombre del módulo (p. ej. 'seaborn')
+
+    Returns:
+        LazyModule
+    """
+    return LazyModule(name)
+
+
+@lru_cache(maxsize=None)
+def is_available(name):
+    """
+    Verificar (una vez por proceso) si un paquete está instalado.
+
+    No importa el paquete: solo busca su especificación, por lo que es
+    barato incluso para PyGIMLi.
+
+    Args:
+        name: Nombre del paquete
+
+    Returns:
+        bool: True si el paquete puede importarse
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def pygimli_available():
+    """Verificar si PyGIMLi está instalado (resultado cacheado por proceso)."""
+    return is_available('pygimli')
@@ -265,12 +265,10 @@ def apply_stitching(data, threshold=30):
         jumps = changes > threshold
         
         if jumps.any():
-            # Corregir saltos aplicando factor de corrección
-            for idx in jumps[jumps].index:
-                if idx > 0:
-                    correction_factor = rho.iloc[idx-1] / rho.iloc[idx]
-                    # Aplicar corrección a partir del salto
-                    result.loc[idx:, rho_col] *= correction_factor
+            # Factor de cada salto (ρ anterior / ρ actual) aplicado a partir del
+            # salto: producto acumulado de los factores
+            correction = (rho.shift(1) / rho).where(jumps, 1.0).cumprod()
+            result[rho_col] = rho * correction
         
         return result
         
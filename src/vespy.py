@@ -12,24 +12,26 @@ Funcionalidades Principales:
 Autor: Jose Maria Garcia Marquez
 Email: josemariagarciamarquez2.72@gmail.com
 Versión: 3.0
+
+Modo por lotes (sin interfaz gráfica):
+    python -m vespy <archivos|directorio|patrón> [opciones]   (ver cli.py)
 """
 import sys
 import os
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Con argumentos se ejecuta la cadena por lotes sin importar PyQt5
+    from cli import main as cli_main
+    sys.exit(cli_main())
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.fft import fft, fftfreq
-from scipy.interpolate import griddata
-from scipy.signal import savgol_filter
-
-# Intentar importar PyGIMLi (opcional)
-try:
-    import pygimli as pg
-    from pygimli.physics import VESManager
-    PYGIMLI_AVAILABLE = True
-except ImportError:
-    PYGIMLI_AVAILABLE = False
+
+# PyGIMLi (opcional): solo se detecta aquí; se importa al invertir
+from utils.lazy import pygimli_available
+PYGIMLI_AVAILABLE = pygimli_available()
+if not PYGIMLI_AVAILABLE:
     print("⚠️ PyGIMLi no disponible. Instalar con: conda install -c gimli pygimli")
 
 from PyQt5.QtWidgets import (
@@ -37,7 +39,7 @@ from PyQt5.QtWidgets import (
     QTableWidget, QTableWidgetItem, QComboBox, QDoubleSpinBox, 
     QSpinBox, QLabel, QGroupBox, QToolBar, QAction, QPushButton, 
     QTabWidget, QTextEdit, QApplication, QInputDialog, QMessageBox,
-    QDialog, QDialogButtonBox, QFormLayout, QCheckBox
+    QDialog, QDialogButtonBox, QFormLayout, QCheckBox, QAbstractButton, QAbstractSpinBox
 )
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import QSize, Qt
@@ -47,8 +49,8 @@ from matplotlib.colors import Normalize
 from matplotlib import cm
 
 # Módulos propios
-from calculos.empalme import realizar_empalme
-from calculos.suavizado import apply_smoothing
+from calculos.empalme import factores_segmentos
+from calculos.pipeline import Pipeline
 from calculos.estadisticas import calcular_estadisticas
 from inversion.inversion import (
     prepare_inversion_data, 
@@ -57,6 +59,15 @@ from inversion.inversion import (
     invert_simple_discrete,
     invert_smooth_model
 )
+from inversion.occam import lambda_sweep
+from inversion.lci import invert_profile_lci
+from inversion.profile import invert_profile_sequential
+from inversion.model_selection import select_layer_count
+from inversion.pool import default_pool
+from inversion.uncertainty import monte_carlo_uncertainty
+from inversion.equivalence import explore_equivalence
+from inversion.robust import invert_robust
+from inversion.control import CancelToken
 
 
 class ColumnMappingDialog(QDialog):
@@ -230,6 +241,9 @@ class SEVApp(QMainWindow):
         self.window_size_spin.setRange(1, 100)
         self.window_size_spin.setValue(5)
         
+        self.log_filter_checkbox = QCheckBox("Suavizar en escala logarítmica")
+        self.log_filter_checkbox.setToolTip("Filtrar log(ρa) sobre una malla uniforme en log(AB/2)")
+        
         self.apply_filter_button = QPushButton("✨ Aplicar Suavizado")
         self.apply_filter_button.clicked.connect(self.apply_filter)
         
@@ -237,6 +251,7 @@ class SEVApp(QMainWindow):
         filter_layout.addWidget(self.filter_combo)
         filter_layout.addWidget(QLabel("Tamaño de Ventana"))
         filter_layout.addWidget(self.window_size_spin)
+        filter_layout.addWidget(self.log_filter_checkbox)
         filter_layout.addWidget(self.apply_filter_button)
         filter_group.setLayout(filter_layout)
         preprocessing_layout.addWidget(filter_group)
@@ -279,6 +294,10 @@ class SEVApp(QMainWindow):
         params_layout.addWidget(self.lambda_spin)
         params_layout.addWidget(QLabel("Factor Lambda"))
         params_layout.addWidget(self.lambda_factor_spin)
+
+        self.robust_checkbox = QCheckBox("Inversión robusta (Huber)")
+        self.robust_checkbox.setToolTip("Reponderar los datos (IRLS) para que los valores anómalos no deformen el modelo")
+        params_layout.addWidget(self.robust_checkbox)
         
         params_group.setLayout(params_layout)
         processing_layout.addWidget(params_group)
@@ -288,6 +307,31 @@ class SEVApp(QMainWindow):
         self.invert_button.clicked.connect(self.invert_model)
         processing_layout.addWidget(self.invert_button)
 
+        # Botón para detener la inversión o el suavizado en curso
+        self.stop_button = QPushButton("⏹ Detener Inversión")
+        self.stop_button.clicked.connect(self.stop_inversion)
+        self.stop_button.setEnabled(False)  # Solo durante una inversión
+        processing_layout.addWidget(self.stop_button)
+
+        # Botón de selección automática del número de capas
+        self.select_layers_button = QPushButton("🔢 Elegir Nº de Capas (BIC)")
+        self.select_layers_button.setToolTip("Invertir con 2 a 6 capas en paralelo y elegir por BIC")
+        self.select_layers_button.clicked.connect(self.select_layer_count)
+        processing_layout.addWidget(self.select_layers_button)
+
+        # Botón de incertidumbre Monte Carlo
+        self.uncertainty_button = QPushButton("📏 Incertidumbre (Monte Carlo)")
+        self.uncertainty_button.setToolTip("Reinvertir 200 realizaciones con ruido del 3% y mostrar percentiles")
+        self.uncertainty_button.clicked.connect(self.estimate_uncertainty)
+        processing_layout.addWidget(self.uncertainty_button)
+
+        # Botón de exploración de equivalencias (requiere un modelo invertido)
+        self.equivalence_button = QPushButton("🔀 Explorar Equivalencias (S/T)")
+        self.equivalence_button.setToolTip("Muestrear modelos con χ² hasta 10% sobre el óptimo")
+        self.equivalence_button.clicked.connect(self.explore_model_equivalence)
+        self.equivalence_button.setEnabled(False)  # Se activa después de invertir
+        processing_layout.addWidget(self.equivalence_button)
+
         # Grupo de Suavizado de Modelo
         smooth_group = QGroupBox("Suavizado de Modelo Invertido")
         smooth_layout = QVBoxLayout()
@@ -317,6 +361,11 @@ class SEVApp(QMainWindow):
         smooth_layout.addWidget(self.log_depth_checkbox)
         smooth_layout.addWidget(self.smooth_button)
         
+        self.lambda_sweep_button = QPushButton("📈 Elegir λ (curva L)")
+        self.lambda_sweep_button.setToolTip("Barrido de λ con inversión Occam y selección por la esquina de la curva L")
+        self.lambda_sweep_button.clicked.connect(self.sweep_smoothing_lambda)
+        smooth_layout.addWidget(self.lambda_sweep_button)
+        
         smooth_group.setLayout(smooth_layout)
         processing_layout.addWidget(smooth_group)
 
@@ -391,9 +440,8 @@ class SEVApp(QMainWindow):
 
         # Variables para almacenar datos y resultados
         self.data = None
-        self.smoothed_data = None
-        self.smoothed_data_df = None  # DataFrame completo del suavizado
-        self.empalme_data = None
+        # Preprocesamiento por etapas (limpieza → empalme → suavizado) con caché por etapa
+        self.pipeline = Pipeline()
         self.saved_models = []
         self.loaded_models = []
         self.depths = None
@@ -436,6 +484,18 @@ class SEVApp(QMainWindow):
         self.generate_2d_button.clicked.connect(self.generate_2d_plot)
         control_panel.addWidget(self.generate_2d_button)
 
+        # Botón para la inversión conjunta lateralmente restringida
+        self.lci_button = QPushButton("🔗 Inversión Conjunta (LCI)")
+        self.lci_button.setToolTip("Invertir juntos los SEV guardados con restricciones laterales según su posición X")
+        self.lci_button.clicked.connect(self.invert_profile_lci)
+        control_panel.addWidget(self.lci_button)
+
+        # Botón para la inversión secuencial con arranque en caliente
+        self.sequential_button = QPushButton("⏩ Inversión Secuencial (perfil)")
+        self.sequential_button.setToolTip("Invertir los SEV guardados en orden de X, iniciando cada uno con el modelo del anterior")
+        self.sequential_button.clicked.connect(self.invert_profile_sequential)
+        control_panel.addWidget(self.sequential_button)
+
         # Mensaje de bienvenida
         self.eda_output.append("=" * 60)
         self.eda_output.append("🌊 VESPY - Vertical Electrical Sounding in Python")
@@ -492,6 +552,9 @@ class SEVApp(QMainWindow):
                         QMessageBox.critical(self, "Error", "No se encontraron las columnas necesarias después del mapeo.")
                         return
                     
+                    # Datos nuevos: preprocesamiento desde cero
+                    self.pipeline = Pipeline()
+                    
                     # Extraer el nombre del archivo
                     self.current_file = os.path.splitext(os.path.basename(file_path))[0]
                     self.table_tabs.setTabText(0, f"{self.current_file}-datos")
@@ -523,17 +586,24 @@ class SEVApp(QMainWindow):
 
     def save_curve(self):
         """Guardar la curva suavizada en un archivo Excel."""
-        if self.smoothed_data is not None:
-            self.data['Suavizado (Ω*m)'] = self.smoothed_data
+        smoothed = self.pipeline.output('smoothing')
+        if smoothed is not None:
+            # Con el mismo número de puntos se añade como columna; si el empalme
+            # cambió los AB/2 se guarda la curva suavizada
+            if len(smoothed) == len(self.data):
+                output = self.data.copy()
+                output['Suavizado (Ω*m)'] = smoothed['pa (Ω*m)'].values
+            else:
+                output = smoothed
             file_path, _ = QFileDialog.getSaveFileName(
                 self, "Guardar Curva Suavizada", "", 
                 "Excel Files (*.xlsx);;CSV Files (*.csv)"
             )
             if file_path:
                 if file_path.endswith('.xlsx'):
-                    self.data.to_excel(file_path, index=False)
+                    output.to_excel(file_path, index=False)
                 elif file_path.endswith('.csv'):
-                    self.data.to_csv(file_path, index=False)
+                    output.to_csv(file_path, index=False)
                 self.eda_output.append(f"💾 Curva guardada: {os.path.basename(file_path)}")
         else:
             QMessageBox.warning(self, "Advertencia", "No hay datos suavizados para guardar.")
@@ -722,6 +792,12 @@ class SEVApp(QMainWindow):
             "model_type": model_label
         }
         
+        # Guardar también los datos invertidos (necesarios para la inversión conjunta LCI)
+        if self._last_inversion_data:
+            model_data["ab2"] = np.asarray(self._last_inversion_data['ab2'])
+            model_data["mn2"] = self._last_inversion_data['mn2']
+            model_data["rhoa"] = np.asarray(self._last_inversion_data['rhoa'])
+        
         self.saved_models.append(model_data)
         self.eda_output.append(f"💾 Modelo {model_label} guardado")
         self.eda_output.append(f"   SEV: {sev_number}")
@@ -737,10 +813,16 @@ class SEVApp(QMainWindow):
         """Generar el empalme y almacenarlo internamente usando módulo de cálculos."""
         if self.data is not None:
             try:
-                # Usar módulo de empalme
-                self.empalme_data = realizar_empalme(self.data, 'AB/2', 'pa (Ω*m)')
+                # Etapa de empalme (con MN/2: corrección de saltos entre segmentos)
+                self.pipeline.configure('empalme', enabled=True)
+                self.pipeline.run(self.data)
                 self.plot_data(empalme=True)
                 self.eda_output.append("🔗 Empalme realizado correctamente")
+                if 'MN/2' in self.data.columns:
+                    factors = factores_segmentos(self.data, 'AB/2', 'pa (Ω*m)')
+                    for _, row in factors.iterrows():
+                        self.eda_output.append(f"  MN/2 = {row['MN/2']:g} m: factor {row['factor']:.3f} "
+                                               f"({row['n_solape']} lecturas en solape)")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error en empalme:\n{str(e)}")
         else:
@@ -764,25 +846,22 @@ class SEVApp(QMainWindow):
             
             method = filter_map.get(self.filter_combo.currentText(), "moving_average")
             
-            # Determinar qué datos suavizar (priorizar empalme)
-            if self.empalme_data is not None:
-                data_to_smooth = self.empalme_data
+            # El suavizado se aplica tras el empalme si está activo
+            if self.pipeline.enabled('empalme'):
                 self.eda_output.append(f"✨ Aplicando filtro a datos EMPALMADOS")
             else:
-                data_to_smooth = self.data
                 self.eda_output.append(f"✨ Aplicando filtro a datos ORIGINALES")
             
-            # Usar módulo de suavizado (devuelve DataFrame con 'AB/2' y 'pa (Ω*m)')
-            result = apply_smoothing(data_to_smooth, 'AB/2', 'pa (Ω*m)', method=method, window_size=n_ventana)
-            
-            # Guardar resultado completo como DataFrame
-            self.smoothed_data_df = result
-            # Guardar solo los valores para compatibilidad
-            self.smoothed_data = result['pa (Ω*m)'].values
+            # Etapa de suavizado: solo se recalcula lo que cambia
+            self.pipeline.configure('smoothing', enabled=True, method=method, window_size=n_ventana,
+                                    log_domain=self.log_filter_checkbox.isChecked())
+            self.pipeline.run(self.data)
             
             self.plot_data(smoothed=True)
             self.eda_output.append(f"  Método: {self.filter_combo.currentText()}")
             self.eda_output.append(f"  Ventana: {n_ventana}")
+            if self.log_filter_checkbox.isChecked():
+                self.eda_output.append("  Dominio: log(ρa) sobre malla uniforme en log(AB/2)")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al aplicar filtro:\n{str(e)}")
@@ -803,15 +882,17 @@ class SEVApp(QMainWindow):
             ax.plot(ab2, rhoa, 'o-', label='Datos Originales', color='blue', markersize=5)
 
             # Empalme en verde (si existe)
-            if empalme and self.empalme_data is not None:
-                empalme_ab2 = self.empalme_data['AB/2'].values
-                empalme_rhoa = self.empalme_data['pa (Ω*m)'].values
+            empalme_data = self.pipeline.output('empalme')
+            if empalme and empalme_data is not None:
+                empalme_ab2 = empalme_data['AB/2'].values
+                empalme_rhoa = empalme_data['pa (Ω*m)'].values
                 ax.plot(empalme_ab2, empalme_rhoa, 's-', label='Datos Empalmados', color='green', markersize=6)
             
             # Suavizado en rojo (usa AB/2 del DataFrame suavizado)
-            if smoothed and hasattr(self, 'smoothed_data_df') and self.smoothed_data_df is not None:
-                smooth_ab2 = self.smoothed_data_df['AB/2'].values
-                smooth_rhoa = self.smoothed_data_df['pa (Ω*m)'].values
+            smoothed_data = self.pipeline.output('smoothing')
+            if smoothed and smoothed_data is not None:
+                smooth_ab2 = smoothed_data['AB/2'].values
+                smooth_rhoa = smoothed_data['pa (Ω*m)'].values
                 ax.plot(smooth_ab2, smooth_rhoa, '^-', label='Datos Suavizados', color='red', markersize=5)
             
             ax.set_xscale('log')
@@ -827,6 +908,9 @@ class SEVApp(QMainWindow):
         """Realizar análisis estadístico completo."""
         if self.data is not None:
             try:
+                import seaborn as sns
+                from scipy.fft import fft, fftfreq
+                
                 resistivity = self.data['pa (Ω*m)'].values
                 
                 mean = np.mean(resistivity)
@@ -922,6 +1006,120 @@ class SEVApp(QMainWindow):
             self.inversion_figure.tight_layout(pad=2.0, w_pad=3.0)
             self.inversion_canvas.draw()
 
+    def _get_inversion_data(self):
+        """Datos a invertir: salida del pipeline (Suavizado > Empalme > Originales)."""
+        data = self.pipeline.run(self.data)
+        labels = {'smoothing': 'SUAVIZADOS', 'empalme': 'EMPALMADOS'}
+        self.eda_output.append(f"\n📊 Usando datos {labels.get(self.pipeline.last_stage(), 'ORIGINALES')} "
+                               f"para inversión")
+        return data
+
+    def select_layer_count(self):
+        """Elegir el número de capas por BIC invirtiendo 2..N capas en paralelo."""
+        if self.data is None:
+            QMessageBox.warning(self, "Advertencia", "Cargue datos primero.")
+            return
+        
+        try:
+            data_to_use = self._get_inversion_data()
+            ab2 = data_to_use['AB/2'].values
+            mn2 = data_to_use['MN/2'].values if 'MN/2' in data_to_use.columns else None
+            rhoa = data_to_use['pa (Ω*m)'].values
+            
+            self.eda_output.append("🔢 Seleccionando número de capas (BIC)...")
+            selection = select_layer_count(ab2, mn2, rhoa, layer_range=(2, 6), criterion='bic',
+                                           pool=default_pool())
+            if not selection['success']:
+                QMessageBox.critical(self, "Error", f"Error en selección de capas:\n{selection['error']}")
+                return
+            
+            for row in selection['ranking']:
+                self.eda_output.append(f"  {row['n_layers']} capas: BIC={row['bic']:.1f}  "
+                                       f"AIC={row['aic']:.1f}  Chi²={row['chi2']:.3f}")
+            self.eda_output.append(f"✅ Número de capas recomendado: {selection['best_n_layers']}")
+            
+            self.layer_spin.setValue(selection['best_n_layers'])
+            self.invert_model()
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error en selección de capas:\n{str(e)}")
+            self.eda_output.append(f"❌ Error: {str(e)}")
+
+    def estimate_uncertainty(self):
+        """Estimar la incertidumbre del modelo de capas por Monte Carlo."""
+        if self.data is None:
+            QMessageBox.warning(self, "Advertencia", "Cargue datos primero.")
+            return
+        
+        try:
+            data_to_use = self._get_inversion_data()
+            ab2 = data_to_use['AB/2'].values
+            mn2 = data_to_use['MN/2'].values if 'MN/2' in data_to_use.columns else None
+            rhoa = data_to_use['pa (Ω*m)'].values
+            n_layers = self.layer_spin.value()
+            
+            self.eda_output.append(f"📏 Incertidumbre Monte Carlo ({n_layers} capas, 200 realizaciones)...")
+            result = monte_carlo_uncertainty(ab2, mn2, rhoa, n_layers, n_realizations=200)
+            if not result['success']:
+                QMessageBox.critical(self, "Error", f"Error en incertidumbre:\n{result['error']}")
+                return
+            
+            # Percentiles 16, 50 y 84 (índices 1, 2 y 3 de DEFAULT_PERCENTILES)
+            for i in range(n_layers):
+                p16, p50, p84 = result['resistivities'][1:4, i]
+                line = f"  Capa {i + 1}: ρ={p50:.1f} Ω·m [{p16:.1f} - {p84:.1f}]"
+                if i < n_layers - 1:
+                    d16, d50, d84 = result['depths'][1:4, i]
+                    line += f"  base={d50:.2f} m [{d16:.2f} - {d84:.2f}]"
+                self.eda_output.append(line)
+            self.eda_output.append(f"✅ Convergieron {result['converged'].mean() * 100:.0f}% de las realizaciones")
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error en incertidumbre:\n{str(e)}")
+            self.eda_output.append(f"❌ Error: {str(e)}")
+
+    def _begin_inversion_control(self):
+        """
+        Crear el callback de progreso y el testigo de cancelación de una inversión.
+        
+        La inversión corre en el hilo de la interfaz y el callback atiende
+        eventos para el botón Detener: mientras dura se desactivan los demás
+        controles, para que ninguna acción inicie otra operación que
+        sobrescriba el testigo o los resultados de la inversión en curso.
+        """
+        self._cancel_token = CancelToken()
+        controls = (self.findChildren(QAbstractButton) + self.findChildren(QComboBox)
+                    + self.findChildren(QAbstractSpinBox) + self.findChildren(QAction))
+        self._locked_controls = [(control, control.isEnabled()) for control in controls
+                                 if control is not self.stop_button]
+        for control, _ in self._locked_controls:
+            control.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        
+        def on_iteration(iteration, chi2, model):
+            self.statusBar().showMessage(f"Iteración {iteration}: χ² = {chi2:.3f}")
+            # La inversión corre en el hilo de la interfaz: atender el botón Detener
+            QApplication.processEvents()
+            return False
+        
+        return on_iteration, self._cancel_token
+
+    def _end_inversion_control(self):
+        """Desactivar el botón Detener y reactivar los controles al terminar la inversión."""
+        self._cancel_token = None
+        self.stop_button.setEnabled(False)
+        # Los controles activados al mostrar el resultado (p. ej. Suavizar) se conservan
+        for control, was_enabled in getattr(self, '_locked_controls', []):
+            control.setEnabled(was_enabled or control.isEnabled())
+        self._locked_controls = []
+        self.statusBar().clearMessage()
+
+    def stop_inversion(self):
+        """Cancelar la inversión en curso."""
+        if getattr(self, '_cancel_token', None) is not None:
+            self._cancel_token.cancel()
+            self.eda_output.append("⏹ Cancelando inversión...")
+
     def invert_model(self):
         """Realizar la inversión de resistividad."""
         if self.data is None:
@@ -929,22 +1127,10 @@ class SEVApp(QMainWindow):
             return
         
         try:
-            # Determinar qué datos usar: PRIORIDAD → Suavizado > Empalme > Originales
-            if hasattr(self, 'smoothed_data_df') and self.smoothed_data_df is not None:
-                # Usar datos suavizados (ya procesados con empalme)
-                data_to_use = self.smoothed_data_df
-                self.eda_output.append("\n📊 Usando datos SUAVIZADOS para inversión")
-            elif self.empalme_data is not None:
-                # Usar datos del empalme
-                data_to_use = self.empalme_data
-                self.eda_output.append("\n📊 Usando datos EMPALMADOS para inversión")
-            else:
-                # Usar datos originales
-                data_to_use = self.data
-                self.eda_output.append("\n📊 Usando datos ORIGINALES para inversión")
+            data_to_use = self._get_inversion_data()
             
             ab2 = data_to_use['AB/2'].values
-            mn2 = data_to_use['MN/2'].values if 'MN/2' in data_to_use.columns else np.ones_like(ab2)
+            mn2 = data_to_use['MN/2'].values if 'MN/2' in data_to_use.columns else None
             rhoa = data_to_use['pa (Ω*m)'].values
 
             n_layers = self.layer_spin.value()
@@ -956,25 +1142,38 @@ class SEVApp(QMainWindow):
             self.eda_output.append(f"  Lambda: {lambda_val}")
             self.eda_output.append(f"  Factor: {lambda_factor}")
 
-            if PYGIMLI_AVAILABLE:
-                self._invert_with_pygimli(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor)
+            callback, cancel_token = self._begin_inversion_control()
+            if self.robust_checkbox.isChecked():
+                self._invert_robust(ab2, rhoa, n_layers, mn2=mn2,
+                                    callback=callback, cancel_token=cancel_token)
+            elif PYGIMLI_AVAILABLE:
+                self._invert_with_pygimli(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor,
+                                          callback=callback, cancel_token=cancel_token)
             else:
-                self._invert_simple(ab2, rhoa, n_layers)
+                self._invert_simple(ab2, rhoa, n_layers, mn2=mn2,
+                                    callback=callback, cancel_token=cancel_token)
                 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error en inversión:\n{str(e)}")
             self.eda_output.append(f"❌ Error: {str(e)}")
+        finally:
+            self._end_inversion_control()
 
-    def _invert_with_pygimli(self, ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor):
+    def _invert_with_pygimli(self, ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor,
+                             callback=None, cancel_token=None):
         """Inversión con PyGIMLi - usando módulo de inversión."""
         # Usar función modularizada
-        result = invert_pygimli_discrete(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor)
+        result = invert_pygimli_discrete(ab2, mn2, rhoa, n_layers, lambda_val, lambda_factor,
+                                         callback=callback, cancel_token=cancel_token)
         
+        if result.get('cancelled'):
+            self.eda_output.append("⏹ Inversión cancelada")
+            return
         if not result['success']:
             raise Exception(result.get('error', 'Error desconocido en inversión'))
         
-        # Extraer resultados
-        ves = result['ves_manager']
+        # Extraer resultados ('ves_manager' no existe si el resultado viene de la caché)
+        ves = result.get('ves_manager')
         thickness = result['thickness']
         depths = result['depths']
         resistivities = result['resistivities']
@@ -985,8 +1184,13 @@ class SEVApp(QMainWindow):
         self.inversion_figure.clear()
         
         ax1 = self.inversion_figure.add_subplot(121)
-        ves.showData(rhoa, ab2=ab2, ax=ax1, label="Observados", color="C0", marker="o")
-        ves.showData(result['response'], ab2=ab2, ax=ax1, label="Ajustados", color="C1")
+        if ves is not None:
+            ves.showData(rhoa, ab2=ab2, ax=ax1, label="Observados", color="C0", marker="o")
+            ves.showData(result['response'], ab2=ab2, ax=ax1, label="Ajustados", color="C1")
+        else:
+            ax1.plot(rhoa, ab2, 'o', color="C0", label="Observados")
+            ax1.plot(result['response'], ab2, '-', color="C1", label="Ajustados")
+            ax1.invert_yaxis()
         ax1.set_xscale("log")
         ax1.set_yscale("log")
         ax1.set_title("Ajuste del Modelo", fontweight='bold')
@@ -1049,12 +1253,16 @@ class SEVApp(QMainWindow):
         self.update_model_table(thickness, depths, resistivities)
         self.table_tabs.setTabText(1, f"{self.current_file}-inversión")
         
-        self.eda_output.append(f"✅ Inversión completada (PyGIMLi)")
+        source = " - caché" if result.get('cached') else ""
+        self.eda_output.append(f"✅ Inversión completada (PyGIMLi{source})")
         self.eda_output.append(f"  Chi²: {chi2:.4f}")
+        if 'stop_reason' in result:
+            self.eda_output.append(f"  Criterio de parada: {result['stop_reason']}")
         self.eda_output.append(f"  RMS: {np.sqrt(chi2):.4f}")
         
-        # Activar botón de suavizado
+        # Activar botones de suavizado y equivalencias
         self.smooth_button.setEnabled(True)
+        self.equivalence_button.setEnabled(True)
         
         # Guardar datos necesarios para suavizado posterior (incluye modelo discreto)
         self._last_inversion_data = {
@@ -1068,14 +1276,46 @@ class SEVApp(QMainWindow):
             'discrete_response': result['response']
         }
 
-    def _invert_simple(self, ab2, rhoa, n_layers):
+    def _invert_simple(self, ab2, rhoa, n_layers, mn2=None, callback=None, cancel_token=None):
         """Inversión simple sin PyGIMLi - usando módulo de inversión."""
         # Usar función modularizada
-        result = invert_simple_discrete(ab2, rhoa, n_layers)
+        result = invert_simple_discrete(ab2, rhoa, n_layers, mn2=mn2, callback=callback,
+                                        cancel_token=cancel_token)
         
+        if result.get('cancelled'):
+            self.eda_output.append("⏹ Inversión cancelada")
+            return
         if not result['success']:
             raise Exception(result.get('error', 'Error desconocido en inversión'))
         
+        self._show_discrete_result(ab2, mn2, rhoa, result, "método simple")
+
+    def _invert_robust(self, ab2, rhoa, n_layers, mn2=None, callback=None, cancel_token=None):
+        """Inversión robusta (Huber/IRLS) que marca los datos anómalos."""
+        result = invert_robust(ab2, mn2, rhoa, n_layers, norm='huber', callback=callback,
+                               cancel_token=cancel_token)
+        
+        if result.get('cancelled'):
+            self.eda_output.append("⏹ Inversión cancelada")
+            return
+        if not result['success']:
+            raise Exception(result.get('error', 'Error desconocido en inversión'))
+        
+        self._show_discrete_result(ab2, mn2, rhoa, result, "robusta Huber")
+        
+        outliers = result['outliers']
+        if np.any(outliers):
+            ax1 = self.inversion_figure.axes[0]
+            ax1.loglog(ab2[outliers], rhoa[outliers], 'x', color='red', markersize=10,
+                       markeredgewidth=2, label='Anómalos')
+            ax1.legend()
+            self.inversion_canvas.draw()
+            flagged = ", ".join(f"{value:g}" for value in ab2[outliers])
+            self.eda_output.append(f"  ⚠️ Datos anómalos (AB/2): {flagged}")
+        self.eda_output.append(f"  Chi² sin ponderar: {result['chi2_l2']:.4f}")
+
+    def _show_discrete_result(self, ab2, mn2, rhoa, result, label):
+        """Graficar y registrar un modelo discreto calculado sin PyGIMLi."""
         thickness = result['thickness']
         resistivities = result['resistivities']
         depths = result['depths']
@@ -1084,10 +1324,11 @@ class SEVApp(QMainWindow):
         self.inversion_figure.clear()
         
         ax1 = self.inversion_figure.add_subplot(121)
-        ax1.loglog(ab2, rhoa, 'o-', label='Observados', markersize=6)
+        ax1.loglog(ab2, rhoa, 'o', label='Observados', color='C0', markersize=6)
+        ax1.loglog(ab2, result['response'], '-', label='Ajustados', color='C1', linewidth=2)
         ax1.set_xlabel("AB/2 (m)")
         ax1.set_ylabel("Resistividad aparente (Ω*m)")
-        ax1.set_title("Datos Observados", fontweight='bold')
+        ax1.set_title("Ajuste del Modelo", fontweight='bold')
         ax1.legend()
         ax1.grid(True, which='both', ls='--', alpha=0.3)
         
@@ -1108,22 +1349,97 @@ class SEVApp(QMainWindow):
         self.update_model_table(thickness, depths, resistivities)
         self.table_tabs.setTabText(1, f"{self.current_file}-inversión")
         
-        self.eda_output.append("✅ Inversión completada (método simple)")
-        self.eda_output.append("⚠️ Instale PyGIMLi para mejores resultados")
+        self.eda_output.append(f"✅ Inversión completada ({label})")
+        self.eda_output.append(f"  Chi²: {result['chi2']:.4f}")
+        if 'stop_reason' in result:
+            self.eda_output.append(f"  Criterio de parada: {result['stop_reason']}")
+        
+        # El suavizado usa la inversión Occam nativa cuando no hay PyGIMLi
+        self.smooth_button.setEnabled(True)
+        self.equivalence_button.setEnabled(True)
+        self._last_inversion_data = {
+            'ab2': ab2,
+            'mn2': mn2,
+            'rhoa': rhoa,
+            'max_depth': np.max(ab2) / 3,
+            'discrete_thickness': thickness,
+            'discrete_depths': depths,
+            'discrete_resistivities': resistivities,
+            'discrete_response': result['response']
+        }
+
+    def explore_model_equivalence(self):
+        """Rangos de parámetros y de S/T compatibles con el último modelo discreto."""
+        if not getattr(self, '_last_inversion_data', None):
+            QMessageBox.warning(self, "Advertencia", "Primero debe invertir un modelo.")
+            return
+        
+        try:
+            data = self._last_inversion_data
+            model = {'thickness': data['discrete_thickness'],
+                     'resistivities': data['discrete_resistivities']}
+            
+            self.eda_output.append("\n🔀 Explorando dominio de equivalencia (χ² ≤ óptimo + 10%)...")
+            result = explore_equivalence(data['ab2'], data['mn2'], data['rhoa'], model)
+            if not result['success']:
+                QMessageBox.critical(self, "Error", f"Error en equivalencias:\n{result['error']}")
+                return
+            
+            n_layers = result['resistivities'].shape[1]
+            for i in range(n_layers):
+                rho_min, rho_max = result['resistivities'][:, i]
+                line = f"  Capa {i + 1}: ρ {rho_min:.1f} - {rho_max:.1f} Ω·m"
+                if i < n_layers - 1:
+                    h_min, h_max = result['thickness'][:, i]
+                    s_min, s_max = result['conductance'][:, i]
+                    t_min, t_max = result['transverse_resistance'][:, i]
+                    line += (f"  h {h_min:.2f} - {h_max:.2f} m  S {s_min:.3g} - {s_max:.3g} S"
+                             f"  T {t_min:.3g} - {t_max:.3g} Ω·m²  [{result['equivalence_type'][i]}]")
+                self.eda_output.append(line)
+            self.eda_output.append(f"✅ {result['n_models']} modelos equivalentes "
+                                   f"(aceptación {result['acceptance'] * 100:.1f}%)")
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error en equivalencias:\n{str(e)}")
+            self.eda_output.append(f"❌ Error: {str(e)}")
+
+    def sweep_smoothing_lambda(self):
+        """Elegir λ del suavizado con un barrido (curva L) y aplicar el suavizado."""
+        if not getattr(self, '_last_inversion_data', None):
+            QMessageBox.warning(self, "Advertencia", "Primero debe invertir un modelo.")
+            return
         
-        # No activar suavizado para método simple (requiere PyGIMLi)
-        self.smooth_button.setEnabled(False)
+        try:
+            smooth_order = 1 if "Primera" in self.smooth_order_combo.currentText() else 2
+            data = self._last_inversion_data
+            
+            self.eda_output.append("\n📈 Barrido de λ (curva L)...")
+            sweep = lambda_sweep(data['ab2'], data['mn2'], data['rhoa'], data['max_depth'],
+                                 smooth_order=smooth_order, n_layers=self.smooth_layers_spin.value())
+            if not sweep['success']:
+                QMessageBox.critical(self, "Error", f"Error en barrido de λ:\n{sweep['error']}")
+                return
+            
+            for lam, chi2, rough in zip(sweep['lambdas'], sweep['chi2'], sweep['roughness']):
+                marker = "  ◀" if lam == sweep['best_lambda'] else ""
+                self.eda_output.append(f"  λ={lam:8.2f}  χ²={chi2:8.3f}  rugosidad={rough:8.3f}{marker}")
+            self.eda_output.append(f"✅ λ elegido: {sweep['best_lambda']:.2f}")
+            
+            self.lambda_spin.setValue(int(round(np.clip(sweep['best_lambda'],
+                                                        self.lambda_spin.minimum(),
+                                                        self.lambda_spin.maximum()))))
+            self.smooth_inverted_model()
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error en barrido de λ:\n{str(e)}")
+            self.eda_output.append(f"❌ Error: {str(e)}")
 
     def smooth_inverted_model(self):
         """Suavizar el modelo invertido usando 1ra o 2da derivada."""
-        if not hasattr(self, '_last_inversion_data'):
+        if not getattr(self, '_last_inversion_data', None):
             QMessageBox.warning(self, "Advertencia", "Primero debe invertir un modelo.")
             return
         
-        if not PYGIMLI_AVAILABLE:
-            QMessageBox.warning(self, "Advertencia", "El suavizado requiere PyGIMLi.")
-            return
-        
         try:
             # Obtener parámetros
             smooth_order = 1 if "Primera" in self.smooth_order_combo.currentText() else 2
@@ -1141,9 +1457,17 @@ class SEVApp(QMainWindow):
             self.eda_output.append(f"  Capas: {n_layers}")
             self.eda_output.append(f"  Profundidad máxima: {max_depth:.2f} m")
             
-            # Llamar función de suavizado
-            result = invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val, smooth_order, n_layers)
+            # Llamar función de suavizado (cancelable con el botón Detener)
+            callback, cancel_token = self._begin_inversion_control()
+            try:
+                result = invert_smooth_model(ab2, mn2, rhoa, max_depth, lambda_val, smooth_order, n_layers,
+                                             callback=callback, cancel_token=cancel_token)
+            finally:
+                self._end_inversion_control()
             
+            if result.get('cancelled'):
+                self.eda_output.append("⏹ Suavizado cancelado")
+                return
             if not result['success']:
                 QMessageBox.critical(self, "Error", f"Error en suavizado:\n{result['error']}")
                 return
@@ -1266,6 +1590,8 @@ class SEVApp(QMainWindow):
             self.eda_output.append(f"✅ Suavizado completado")
             self.eda_output.append(f"  Chi²: {result['chi2']:.4f}")
             self.eda_output.append(f"  RRMS: {result['rrms']:.2f}%")
+            if 'stop_reason' in result:
+                self.eda_output.append(f"  Criterio de parada: {result['stop_reason']}")
             self.eda_output.append(f"  Profundidad alcanzada: {result['max_depth_achieved']:.2f} m")
             
         except Exception as e:
@@ -1306,6 +1632,96 @@ class SEVApp(QMainWindow):
     # GRÁFICO 2D
     # ============================================================================
 
+    def invert_profile_lci(self):
+        """Inversión conjunta lateralmente restringida (LCI) de los modelos guardados."""
+        models = [model for model in self.saved_models if "rhoa" in model]
+        
+        if len(models) < 2:
+            QMessageBox.warning(
+                self, "Advertencia",
+                "Se necesitan al menos 2 modelos guardados con sus datos para la inversión conjunta.\n"
+                "(Los modelos cargados desde archivo no incluyen los datos de campo.)"
+            )
+            return
+        
+        try:
+            n_layers = self.layer_spin.value()
+            self.eda_output.append(f"\n🔗 Inversión conjunta LCI de {len(models)} SEV ({n_layers} capas)...")
+            
+            result = invert_profile_lci(
+                [(model["ab2"], model["mn2"], model["rhoa"]) for model in models],
+                [model["x_position"] for model in models],
+                n_layers
+            )
+            if not result['success']:
+                QMessageBox.critical(self, "Error", f"Error en inversión conjunta:\n{result['error']}")
+                return
+            
+            # Reemplazar los modelos individuales por los de la inversión conjunta
+            for model, depths, resistivities, chi2 in zip(models, result['depths'],
+                                                         result['resistivities'], result['chi2']):
+                model["depths"] = depths
+                model["resistivity"] = resistivities
+                model["model_type"] = "LCI"
+                self.eda_output.append(f"  SEV X={model['x_position']:.1f} m: Chi²={chi2:.3f}")
+            
+            self.eda_output.append(f"✅ Inversión conjunta completada ({result['n_iter']} iteraciones)")
+            self.eda_output.append(f"  Chi² total: {result['chi2_total']:.4f}")
+            
+            self.generate_2d_plot()
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error en inversión conjunta:\n{str(e)}")
+            self.eda_output.append(f"❌ Error: {str(e)}")
+
+    def invert_profile_sequential(self):
+        """Reinvertir los modelos guardados en orden de X con arranque en caliente."""
+        models = [model for model in self.saved_models if "rhoa" in model]
+        
+        if len(models) < 2:
+            QMessageBox.warning(
+                self, "Advertencia",
+                "Se necesitan al menos 2 modelos guardados con sus datos para la inversión secuencial."
+            )
+            return
+        
+        try:
+            n_layers = self.layer_spin.value()
+            method = 'pygimli' if PYGIMLI_AVAILABLE else 'gauss_newton'
+            self.eda_output.append(f"\n⏩ Inversión secuencial de {len(models)} SEV ({method})...")
+            
+            result = invert_profile_sequential(
+                [(model["ab2"], model["mn2"], model["rhoa"]) for model in models],
+                [model["x_position"] for model in models],
+                n_layers,
+                method=method,
+                compare_cold=(method == 'gauss_newton'),
+                lam=self.lambda_spin.value(),
+                lam_factor=self.lambda_factor_spin.value()
+            )
+            if not result['success']:
+                QMessageBox.critical(self, "Error", f"Error en inversión secuencial:\n{result['error']}")
+                return
+            
+            for model, inversion in zip(models, result['results']):
+                if not inversion['success']:
+                    self.eda_output.append(f"  ❌ SEV X={model['x_position']:.1f} m: {inversion.get('error')}")
+                    continue
+                model["depths"] = inversion['depths']
+                model["resistivity"] = inversion['resistivities']
+                model["model_type"] = "Secuencial"
+            
+            self.eda_output.append(f"✅ Inversión secuencial completada ({int(result['n_iter'].clip(0).sum())} iteraciones)")
+            if result['iterations_saved'] is not None:
+                self.eda_output.append(f"  Iteraciones ahorradas: {result['iterations_saved']} "
+                                       f"(desde cero: {int(result['n_iter_cold'].clip(0).sum())})")
+            
+            self.generate_2d_plot()
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error en inversión secuencial:\n{str(e)}")
+            self.eda_output.append(f"❌ Error: {str(e)}")
+
     def generate_2d_plot(self):
         """Generar gráfico 2D interpolado con múltiples modelos."""
         total_models = len(self.saved_models)
@@ -1390,6 +1806,7 @@ class SEVApp(QMainWindow):
             interpolation_method = self.interpolation_combo.currentText()
             self.eda_output.append(f"  Interpolación: {interpolation_method}")
             
+            from scipy.interpolate import griddata
             grid_z = griddata(
                 points=(all_x_positions, all_depths),
                 values=all_resistivities,
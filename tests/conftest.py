@@ -0,0 +1,6 @@
+"""Configuración de pytest: los módulos de VESPY se importan desde src/."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,66 @@
+"""Pruebas de la caché de resultados en disco (inversion/cache.py)."""
+
+import os
+
+import numpy as np
+
+from inversion import cache as cache_module
+from inversion.cache import ResultCache
+
+
+AB2 = np.logspace(0, 2, 10)
+RHOA = np.linspace(10, 100, 10)
+
+
+def result(n=10):
+    return {'success': True, 'resistivities': np.arange(n, dtype=float), 'chi2': 1.5,
+            'stop_reason': 'converged', 'ves_manager': object()}
+
+
+def test_key_depends_on_data_and_parameters():
+    key = ResultCache.make_key('pygimli_discrete', AB2, None, RHOA, n_layers=3, lam=20)
+    assert key == ResultCache.make_key('pygimli_discrete', AB2.copy(), None, RHOA, lam=20, n_layers=3)
+    assert key != ResultCache.make_key('pygimli_discrete', AB2, None, RHOA, n_layers=4, lam=20)
+    assert key != ResultCache.make_key('pygimli_discrete', AB2, AB2 / 10, RHOA, n_layers=3, lam=20)
+    assert key != ResultCache.make_key('pygimli_smooth', AB2, None, RHOA, n_layers=3, lam=20)
+
+
+def test_put_and_get(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.make_key('pygimli_discrete', AB2, None, RHOA, n_layers=3)
+    assert cache.get(key) is None
+
+    cache.put(key, result())
+    cache.put('fallido', {'success': False, 'error': 'x'})
+    hit = cache.get(key)
+    assert hit['cached'] and hit['success']
+    assert hit['chi2'] == 1.5 and hit['stop_reason'] == 'converged'
+    np.testing.assert_array_equal(hit['resistivities'], np.arange(10))
+    assert 'ves_manager' not in hit
+    assert cache.get('fallido') is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for i, key in enumerate('abc'):
+        cache.put(key, result(1000))
+        os.utime(cache._path(key), (i, i))
+    cache.get('a')  # el acierto renueva la fecha de 'a'
+
+    cache.max_bytes = 2.5 * os.path.getsize(cache._path('a'))
+    cache.put('d', result(1000))
+    # Caben dos resultados: se conservan 'a' (leído) y 'd' (nuevo)
+    assert cache.get('b') is None and cache.get('c') is None
+    assert cache.get('a') is not None and cache.get('d') is not None
+
+
+def test_empty_directory_disables_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('VESPY_CACHE_DIR', '')
+    monkeypatch.setattr(cache_module, '_default_cache', None)
+
+    cache = cache_module.default_cache()
+    assert not cache.enabled
+    cache.put('a', result())
+    assert cache.get('a') is None
+    assert os.listdir(tmp_path) == []
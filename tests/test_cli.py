@@ -0,0 +1,54 @@
+"""Pruebas del procesamiento por lotes (cli.py)."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cli import detect_columns, main
+from inversion.forward import schlumberger_forward
+
+
+@pytest.mark.parametrize('columns, expected', [
+    (['AB/2', 'MN/2', 'pa (Ω*m)'], {'AB/2': 'AB/2', 'MN/2': 'MN/2', 'pa (Ω*m)': 'pa (Ω*m)'}),
+    (['AB/2 (m)', 'Pasos', 'Rhoa (ohm-m)'], {'AB/2 (m)': 'AB/2', 'Rhoa (ohm-m)': 'pa (Ω*m)'}),
+    (['ab', 'Spacing', 'ρa'], {'ab': 'AB/2', 'ρa': 'pa (Ω*m)'})
+])
+def test_detect_columns_matches_whole_tokens(columns, expected):
+    assert detect_columns(columns) == expected
+
+
+@pytest.mark.parametrize('columns', [['AB/2', 'Pasos'], ['AB/2', 'pa', 'Rhoa']])
+def test_detect_columns_rejects_missing_or_ambiguous(columns):
+    with pytest.raises(ValueError):
+        detect_columns(columns)
+
+
+def test_batch_run_exports_results(tmp_path):
+    ab2 = np.logspace(0, 2, 15)
+    for name, thickness in (('sev_a', 3.0), ('sev_b', 8.0)):
+        rhoa = schlumberger_forward(ab2, None, [thickness], [100.0, 10.0])
+        pd.DataFrame({'AB/2': ab2, 'pa (Ω*m)': rhoa}).to_csv(tmp_path / f"{name}.csv", index=False)
+    pd.DataFrame({'AB/2': ab2, 'Pasos': ab2}).to_csv(tmp_path / "sin_rhoa.csv", index=False)
+
+    output = tmp_path / 'salida'
+    code = main([str(tmp_path), '-o', str(output), '--capas', '2', '--metodo', 'gauss_newton',
+                 '--workers', '1'])
+
+    assert code == 2  # sin_rhoa.csv falla sin adivinar la columna
+    summary = pd.read_csv(output / 'resumen.csv').set_index('sondeo')
+    assert summary.loc[['sev_a', 'sev_b'], 'exito'].all()
+    assert not summary.loc['sin_rhoa', 'exito']
+    assert os.path.exists(output / 'sev_a_modelo.csv')
+
+
+def test_no_cache_flag_disables_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('VESPY_CACHE_DIR', str(tmp_path / 'cache'))
+    ab2 = np.logspace(0, 2, 15)
+    rhoa = schlumberger_forward(ab2, None, [3.0], [100.0, 10.0])
+    pd.DataFrame({'AB/2': ab2, 'pa (Ω*m)': rhoa}).to_csv(tmp_path / 'sev.csv', index=False)
+
+    assert main([str(tmp_path / 'sev.csv'), '-o', str(tmp_path / 'salida'), '--metodo', 'simple',
+                 '--workers', '1', '--sin-cache']) == 0
+    assert os.environ['VESPY_CACHE_DIR'] == ''
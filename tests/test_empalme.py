@@ -0,0 +1,39 @@
+"""Pruebas del empalme por segmentos MN/2 (calculos/empalme.py)."""
+
+import numpy as np
+import pandas as pd
+
+from calculos.empalme import empalmar_segmentos, factores_segmentos
+
+
+def stepped_sounding(step=1.2):
+    """Dos segmentos MN/2 con solape en AB/2 = 10 y 15; el segundo medido ×step."""
+    ab2 = np.array([1.0, 2.0, 5.0, 10.0, 15.0, 10.0, 15.0, 30.0, 60.0])
+    mn2 = np.array([0.5] * 5 + [5.0] * 4)
+    true = 100.0 * ab2**-0.3
+    rhoa = np.where(mn2 == 5.0, true * step, true)
+    return pd.DataFrame({'AB/2': ab2, 'MN/2': mn2, 'pa (Ω*m)': rhoa}), ab2, true
+
+
+def test_factors_remove_known_step():
+    data, _, _ = stepped_sounding(1.2)
+    factors = factores_segmentos(data, 'AB/2', 'pa (Ω*m)', 'MN/2')
+    np.testing.assert_allclose(factors['factor'], [1.0, 1 / 1.2])
+    np.testing.assert_array_equal(factors['n_solape'], [0, 2])
+
+
+def test_stitched_curve_is_continuous():
+    data, ab2, true = stepped_sounding(1.2)
+    result = empalmar_segmentos(data, 'AB/2', 'pa (Ω*m)', 'MN/2')
+    expected = pd.Series(true, index=ab2).groupby(level=0).mean()
+    np.testing.assert_allclose(result['AB/2'], expected.index)
+    np.testing.assert_allclose(result['pa (Ω*m)'], expected.values)
+
+
+def test_non_positive_readings_are_dropped():
+    data, _, _ = stepped_sounding(1.2)
+    data.loc[len(data)] = [100.0, 5.0, 0.0]
+    data.loc[len(data)] = [120.0, 5.0, -3.0]
+    result = empalmar_segmentos(data, 'AB/2', 'pa (Ω*m)', 'MN/2')
+    assert not np.isin(result['AB/2'], [100.0, 120.0]).any()
+    assert (result['pa (Ω*m)'] > 0).all()
@@ -0,0 +1,23 @@
+"""Pruebas de la exploración de equivalencias (inversion/equivalence.py)."""
+
+import numpy as np
+import pandas as pd
+
+from inversion.equivalence import explore_equivalence
+from inversion.forward import schlumberger_forward
+from inversion.inversion import VESInverter
+
+
+def test_accepts_ves_inverter_result():
+    ab2 = np.logspace(0, 2.5, 20)
+    rhoa = schlumberger_forward(ab2, None, [2.0, 10.0], [50.0, 5.0, 200.0])
+    data = pd.DataFrame({'AB/2': ab2, 'pa (Ω*m)': rhoa})
+
+    # Resultado con 'thicknesses' (listas, capa semi-infinita como inf)
+    model = VESInverter().invert(data, num_layers=3, method='simple')
+    assert model['success']
+
+    result = explore_equivalence(ab2, None, rhoa, model, n_samples=2000, n_rounds=2, seed=0)
+    assert result['success'], result.get('error')
+    assert result['models'].shape[1] == 5
+    assert np.all(np.isfinite(result['models']))
@@ -0,0 +1,69 @@
+"""Pruebas del modelado directo Schlumberger nativo (inversion/forward.py)."""
+
+import numpy as np
+import pytest
+
+from inversion.forward import forward_batch, forward_geometry, forward_jacobian, schlumberger_forward
+
+
+AB2 = np.logspace(0, 3, 25)
+
+
+def image_series(ab2, mn2, thickness, rho1, rho2, n_terms=2000):
+    """ρa de dos capas por el método de imágenes (solución de referencia)."""
+    k = (rho2 - rho1) / (rho2 + rho1)
+    n = np.arange(1, n_terms + 1)
+
+    def potential(r):
+        r = np.asarray(r, dtype=float)[:, None]
+        return rho1 * (1 / r[:, 0] + 2 * np.sum(k**n / np.sqrt(r**2 + (2 * n * thickness)**2), axis=1))
+
+    return (ab2**2 - mn2**2) / (2 * mn2) * (potential(ab2 - mn2) - potential(ab2 + mn2))
+
+
+@pytest.mark.parametrize('rho', [1.0, 37.5, 5000.0])
+def test_half_space_returns_true_resistivity(rho):
+    rhoa = schlumberger_forward(AB2, AB2 / 10, [5.0, 20.0], [rho, rho, rho])
+    np.testing.assert_allclose(rhoa, rho, rtol=1e-6)
+
+
+@pytest.mark.parametrize('rho1, rho2', [(100.0, 10.0), (10.0, 100.0), (50.0, 2000.0)])
+def test_two_layers_match_image_series(rho1, rho2):
+    mn2 = AB2 / 10
+    rhoa = schlumberger_forward(AB2, mn2, [8.0], [rho1, rho2])
+    np.testing.assert_allclose(rhoa, image_series(AB2, mn2, 8.0, rho1, rho2), rtol=1e-4)
+
+
+def test_batch_matches_single_models():
+    models = np.array([[3.0, 12.0, 80.0, 15.0, 300.0],
+                       [1.0, 40.0, 10.0, 200.0, 20.0]])
+    batch = forward_batch(AB2, None, models)
+    for model, row in zip(models, batch):
+        np.testing.assert_allclose(row, schlumberger_forward(AB2, None, model[:2], model[2:]), rtol=1e-12)
+
+
+def test_jacobian_matches_finite_differences():
+    model = np.array([3.0, 12.0, 80.0, 15.0, 300.0])
+    response, jacobian = forward_jacobian(AB2, None, model)
+
+    step = 1e-6
+    numeric = np.empty_like(jacobian)
+    for j in range(len(model)):
+        up, down = model.copy(), model.copy()
+        up[j] *= np.exp(step)
+        down[j] *= np.exp(-step)
+        numeric[:, j] = (np.log(forward_batch(AB2, None, up[None])[0])
+                         - np.log(forward_batch(AB2, None, down[None])[0])) / (2 * step)
+
+    np.testing.assert_allclose(response, schlumberger_forward(AB2, None, model[:2], model[2:]), rtol=1e-12)
+    np.testing.assert_allclose(jacobian, numeric, atol=1e-6)
+
+
+def test_geometry_and_responses_are_memoized():
+    geometry = forward_geometry(AB2.copy(), AB2 / 10)
+    assert forward_geometry(AB2.copy(), AB2 / 10) is geometry
+
+    first = geometry.response([5.0], [100.0, 10.0])
+    first[:] = 0.0
+    second = geometry.response([5.0], [100.0, 10.0])
+    np.testing.assert_allclose(second, schlumberger_forward(AB2, AB2 / 10, [5.0], [100.0, 10.0]))
@@ -0,0 +1,26 @@
+"""Pruebas de la inversión Levenberg-Marquardt nativa (inversion/gauss_newton.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.gauss_newton import invert_gauss_newton, levenberg_marquardt
+
+
+AB2 = np.logspace(0, 2.5, 25)
+TRUE_MODEL = np.array([2.0, 8.0, 100.0, 10.0, 300.0])
+RHOA = schlumberger_forward(AB2, None, TRUE_MODEL[:2], TRUE_MODEL[2:])
+
+
+def test_recovers_three_layer_model():
+    result = invert_gauss_newton(AB2, None, RHOA, 3)
+    assert result['success']
+    assert result['stop_reason'] == 'converged'
+    np.testing.assert_allclose(result['thickness'], TRUE_MODEL[:2], rtol=1e-3)
+    np.testing.assert_allclose(result['resistivities'], TRUE_MODEL[2:], rtol=1e-3)
+
+
+def test_batch_rows_converge_independently():
+    starts = np.array([[1.0, 5.0, 50.0, 50.0, 50.0], [5.0, 20.0, 200.0, 5.0, 500.0]])
+    result = levenberg_marquardt(AB2, None, RHOA, starts)
+    assert result['converged'].all()
+    np.testing.assert_allclose(result['models'], [TRUE_MODEL] * 2, rtol=1e-2)
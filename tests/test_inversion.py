@@ -0,0 +1,189 @@
+"""Pruebas de las funciones de inversión (inversion/inversion.py)."""
+
+import sys
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inversion import inversion as inversion_module
+from inversion.cache import ResultCache
+from inversion.control import CancelToken, StoppingCriteria
+from inversion.forward import schlumberger_forward
+from inversion.inversion import (VESInverter, extract_inversion_arrays, invert_discrete, invert_pygimli_discrete,
+                                 invert_simple_discrete, invert_smooth_model)
+
+
+AB2 = np.logspace(-0.3, 2, 20)
+RHOA = schlumberger_forward(AB2, None, [3.0], [100.0, 20.0])
+
+
+def test_missing_mn2_uses_ideal_schlumberger():
+    data = pd.DataFrame({'AB/2': AB2, 'pa (Ω*m)': RHOA})
+    ab2, mn2, rhoa = extract_inversion_arrays(data)
+    assert mn2 is None
+
+    # AB/2 ≤ 1 m: un MN/2 = 1 m supuesto haría fallar la inversión
+    result = invert_smooth_model(ab2, mn2, rhoa, max_depth=20, n_layers=15, use_cache=False)
+    assert result['success'], result.get('error')
+
+
+def test_robust_honours_control_options():
+    calls = []
+
+    def callback(iteration, chi2, model):
+        calls.append(iteration)
+        return True
+
+    result = invert_discrete(AB2, None, RHOA, 2, method='robust', callback=callback)
+    assert result['success']
+    assert calls == [1]
+    assert result['stop_reason'] == 'callback'
+
+    token = CancelToken()
+    token.cancel()
+    result = invert_discrete(AB2, None, RHOA, 2, method='robust', cancel_token=token)
+    assert result.get('cancelled')
+
+
+class FakeInversion:
+    """Sustituto de pg.Inversion: solo lo que usa invert_pygimli_discrete."""
+
+    def __init__(self):
+        self.post_step = None
+        self.response = RHOA
+        self.iterations = 0
+
+    def setPostStep(self, post_step):
+        self.post_step = post_step
+
+    def chi2(self):
+        return 1.0
+
+    @property
+    def inv(self):
+        return self
+
+    def iter(self):
+        return self.iterations
+
+
+class FakeManager:
+    """Sustituto de VESManager que cuenta las inversiones ejecutadas."""
+
+    runs = 0
+
+    def __init__(self):
+        self.inv = FakeInversion()
+
+    def invert(self, rhoa, error, maxIter, **kwargs):
+        FakeManager.runs += 1
+        model = np.array([3.0, 100.0, 20.0])
+        for iteration in range(1, maxIter + 1):
+            self.inv.iterations = iteration
+            self.inv.model = model
+            if self.inv.post_step is not None:
+                self.inv.post_step(iteration, self.inv)
+        return model
+
+
+@pytest.fixture
+def fake_pygimli(monkeypatch):
+    """Módulos pygimli mínimos con FakeManager como VESManager."""
+    ves = types.ModuleType('pygimli.physics.ves')
+    ves.VESManager = FakeManager
+    physics = types.ModuleType('pygimli.physics')
+    physics.ves = ves
+    pygimli = types.ModuleType('pygimli')
+    pygimli.physics = physics
+    for name, module in (('pygimli', pygimli), ('pygimli.physics', physics), ('pygimli.physics.ves', ves)):
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setattr(FakeManager, 'runs', 0)
+    return ves
+
+
+def test_pygimli_cache_key_and_early_stop(tmp_path, monkeypatch, fake_pygimli):
+    monkeypatch.setattr(inversion_module, 'default_cache', lambda: ResultCache(str(tmp_path)))
+
+    def run(**kwargs):
+        result = invert_pygimli_discrete(AB2, None, RHOA, 2, 20, 0.8, **kwargs)
+        assert result['success'], result.get('error')
+        return result
+
+    run(max_iter=3)
+    run(max_iter=3)
+    assert FakeManager.runs == 1
+    run(max_iter=5)
+    assert FakeManager.runs == 2
+
+    # Detenido por el callback: no se guarda ni se sirve desde la caché
+    assert run(max_iter=8, callback=lambda *args: True)['stop_reason'] == 'callback'
+    assert run(max_iter=8)['stop_reason'] == 'max_iter'
+    assert FakeManager.runs == 4
+
+
+def test_pygimli_unknown_iteration_count(monkeypatch, fake_pygimli):
+    monkeypatch.setattr(FakeInversion, 'iter', None)  # el número de iteraciones no se puede leer
+
+    result = invert_pygimli_discrete(AB2, None, RHOA, 2, 20, 0.8, use_cache=False, max_iter=3)
+    assert result['success'], result.get('error')
+    assert result['n_iter'] is None
+    assert result['stop_reason'] == 'unknown'
+
+
+def test_reused_manager_drops_previous_callback(monkeypatch, fake_pygimli):
+    monkeypatch.setattr(inversion_module, '_reusable_managers', {})
+
+    result = invert_pygimli_discrete(AB2, None, RHOA, 2, 20, 0.8, use_cache=False, max_iter=4,
+                                     callback=lambda *args: True)
+    assert result['stop_reason'] == 'callback'
+    result = invert_pygimli_discrete(AB2, None, RHOA, 2, 20, 0.8, use_cache=False, max_iter=4)
+    assert result['stop_reason'] == 'max_iter'
+    assert len(inversion_module._reusable_managers) == 1
+
+
+def test_smooth_operator_reused_per_table(monkeypatch, fake_pygimli):
+    fake_pygimli.VESRhoModelling = lambda **kwargs: object()
+    monkeypatch.setattr(inversion_module, '_reusable_operators', OrderedDict())
+
+    thk = np.ones(5)
+    first = inversion_module._smooth_operator(thk, AB2, AB2 / 10)
+    assert inversion_module._smooth_operator(thk.copy(), AB2.copy(), AB2 / 10) is first
+    assert inversion_module._smooth_operator(thk * 2, AB2, AB2 / 10) is not first
+
+
+def test_simple_discrete_accepts_stopping():
+    result = invert_simple_discrete(AB2, RHOA, 2, stopping=StoppingCriteria(target_chi2=1e12))
+    assert result['success']
+    assert result['stop_reason'] == 'target_chi2'
+
+
+def test_ves_inverter_callback_and_cancel():
+    data = pd.DataFrame({'AB/2': AB2, 'pa (Ω*m)': RHOA})
+    iterations = []
+    result = VESInverter().invert(data, num_layers=2, method='simple',
+                                  callback=lambda i, chi2, model: iterations.append(i) or i == 2)
+    assert result['stop_reason'] == 'callback'
+    assert iterations == [1, 2]
+
+    token = CancelToken()
+    token.cancel()
+    result = VESInverter().invert(data, num_layers=2, method='gauss_newton', cancel_token=token)
+    assert result.get('cancelled')
+
+
+def test_ves_inverter_rejects_unknown_method():
+    data = pd.DataFrame({'AB/2': AB2, 'pa (Ω*m)': RHOA})
+    with pytest.raises(ValueError):
+        VESInverter().invert(data, method='occam')
+
+
+def test_invert_many_in_parallel_matches_serial():
+    soundings = [pd.DataFrame({'AB/2': AB2, 'pa (Ω*m)': RHOA * scale}) for scale in (1.0, 2.0, 0.5)]
+    serial = VESInverter().invert_many(soundings, workers=1, num_layers=2, method='gauss_newton')
+    parallel = VESInverter().invert_many(soundings, workers=2, num_layers=2, method='gauss_newton')
+    for one, other in zip(serial, parallel):
+        assert one['success'] and other['success']
+        np.testing.assert_allclose(one['resistivities'], other['resistivities'])
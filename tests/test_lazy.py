@@ -0,0 +1,19 @@
+"""Pruebas de las importaciones diferidas (utils/lazy.py)."""
+
+import sys
+
+from utils.lazy import is_available, lazy_import
+
+
+def test_module_is_imported_on_first_attribute(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    module = lazy_import('colorsys')
+    assert 'colorsys' not in sys.modules
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert 'colorsys' in sys.modules
+
+
+def test_availability_does_not_import():
+    assert is_available('numpy')
+    assert not is_available('paquete_que_no_existe')
+    assert not is_available('')
@@ -0,0 +1,19 @@
+"""Pruebas de la inversión lateralmente restringida (inversion/lci.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.lci import invert_profile_lci
+
+
+AB2 = np.logspace(0, 2.5, 25)
+
+
+def test_identical_soundings_give_identical_true_models():
+    rhoa = schlumberger_forward(AB2, None, [2.0, 8.0], [100.0, 10.0, 300.0])
+    result = invert_profile_lci([(AB2, None, rhoa)] * 3, [0.0, 10.0, 20.0], 3)
+    assert result['success']
+    for name in ('thickness', 'resistivities'):
+        np.testing.assert_allclose(result[name], result[name][:1].repeat(3, axis=0))
+    np.testing.assert_allclose(result['resistivities'][0], [100.0, 10.0, 300.0], rtol=1e-3)
+    np.testing.assert_allclose(result['thickness'][0], [2.0, 8.0], rtol=1e-3)
@@ -0,0 +1,29 @@
+"""Pruebas del muestreo bayesiano MCMC (inversion/mcmc.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.mcmc import sample_posterior
+
+
+AB2 = np.logspace(0, 2.5, 25)
+TRUE_RHO = np.array([100.0, 10.0, 300.0])
+RHOA = schlumberger_forward(AB2, None, [2.0, 8.0], TRUE_RHO)
+
+
+def test_posterior_brackets_true_model():
+    result = sample_posterior(AB2, None, RHOA, 3, n_steps=300, seed=0)
+    assert result['success']
+    low, high = result['resistivities'][0], result['resistivities'][-1]
+    assert np.all(low < TRUE_RHO) and np.all(TRUE_RHO < high)
+    assert np.all((result['acceptance'] > 0.1) & (result['acceptance'] < 0.9))
+
+
+def test_checkpoint_resume_matches_uninterrupted_run(tmp_path):
+    checkpoint = str(tmp_path / 'chain.npz')
+    full = sample_posterior(AB2, None, RHOA, 3, n_steps=60, seed=3)
+    sample_posterior(AB2, None, RHOA, 3, n_steps=30, seed=3, checkpoint=checkpoint,
+                     checkpoint_every=10)
+    resumed = sample_posterior(AB2, None, RHOA, 3, n_steps=60, seed=3, checkpoint=checkpoint,
+                               checkpoint_every=10)
+    np.testing.assert_array_equal(resumed['chain'], full['chain'])
@@ -0,0 +1,16 @@
+"""Pruebas de la selección del número de capas (inversion/model_selection.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.model_selection import select_layer_count
+
+
+def test_bic_picks_three_layers_for_three_layer_model():
+    ab2 = np.logspace(0, 2.5, 25)
+    rhoa = schlumberger_forward(ab2, None, [2.0, 8.0], [100.0, 10.0, 300.0])
+    noisy = rhoa * np.exp(0.02 * np.random.default_rng(0).standard_normal(ab2.size))
+    result = select_layer_count(ab2, None, noisy, layer_range=(2, 5), workers=1, error=0.02)
+    assert result['success']
+    assert result['best_n_layers'] == 3
+    assert [r['n_layers'] for r in result['ranking']][0] == 3
@@ -0,0 +1,28 @@
+"""Pruebas de la inversión suave Occam y del barrido de λ (inversion/occam.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.occam import invert_occam, lambda_sweep
+
+
+AB2 = np.logspace(0, 2.5, 25)
+RHOA = schlumberger_forward(AB2, None, [5.0], [100.0, 10.0])
+
+
+def test_occam_reaches_target_misfit_and_recovers_layers():
+    result = invert_occam(AB2, None, RHOA, max_depth=30, lambda_val=20, n_layers=20)
+    assert result['success']
+    assert result['stop_reason'] == 'target_chi2'
+    assert result['chi2'] <= 1.0
+    np.testing.assert_allclose(result['resistivities'][0], 100.0, rtol=0.1)
+    np.testing.assert_allclose(result['resistivities'][-1], 10.0, rtol=0.1)
+
+
+def test_lambda_sweep_trades_misfit_for_roughness():
+    lambdas = [1, 10, 100, 1000]
+    result = lambda_sweep(AB2, None, RHOA, 30, lambdas=lambdas, workers=1, n_layers=20)
+    assert result['success']
+    assert result['best_lambda'] in lambdas
+    assert np.all(np.diff(result['phi_d']) > 0)
+    assert np.all(np.diff(result['roughness']) < 0)
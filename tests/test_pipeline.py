@@ -0,0 +1,41 @@
+"""Pruebas del pipeline de preprocesamiento (calculos/pipeline.py)."""
+
+import numpy as np
+import pandas as pd
+
+from calculos.pipeline import Pipeline
+from inversion.forward import schlumberger_forward
+
+
+def sounding():
+    ab2 = np.logspace(0, 2, 15)
+    mn2 = np.where(ab2 < 10, 0.5, 5.0)
+    rhoa = schlumberger_forward(ab2, mn2, [4.0], [80.0, 15.0])
+    return pd.DataFrame({'AB/2': ab2, 'MN/2': mn2, 'pa (Ω*m)': rhoa})
+
+
+def test_stage_cache_reuses_outputs():
+    data = sounding()
+    pipeline = Pipeline().configure('smoothing', enabled=True, window_size=3)
+
+    first = pipeline.run(data)
+    assert pipeline.computed == ['clean', 'smoothing']
+    second = pipeline.run(data)
+    assert pipeline.computed == []
+    pd.testing.assert_frame_equal(first, second)
+
+    # Solo cambia la clave de la etapa modificada
+    pipeline.configure('smoothing', window_size=5)
+    pipeline.run(data)
+    assert pipeline.computed == ['smoothing']
+
+
+def test_outliers_and_smoothing_keep_mn2():
+    data = sounding()
+    data.loc[7, 'pa (Ω*m)'] *= 1e4
+    pipeline = Pipeline().configure('outliers', enabled=True).configure('smoothing', enabled=True)
+
+    result = pipeline.run(data)
+    assert len(result) == len(data) - 1
+    assert 'MN/2' in result.columns
+    np.testing.assert_array_equal(result['MN/2'], data['MN/2'].drop(index=7))
@@ -0,0 +1,27 @@
+"""Pruebas del pool persistente de procesos (inversion/pool.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.inversion import invert_discrete
+from inversion.pool import WorkerPool
+
+
+AB2 = np.logspace(0, 2.5, 20)
+
+
+def test_warm_starts_every_worker():
+    with WorkerPool(workers=2) as pool:
+        assert len(pool.warm()) == 2
+
+
+def test_map_matches_serial_inversions():
+    soundings = [(AB2, None, schlumberger_forward(AB2, None, [h], [100.0, 10.0]))
+                 for h in (2.0, 5.0, 10.0)]
+    with WorkerPool(workers=2) as pool:
+        results = pool.map('discrete', soundings, n_layers=2)
+
+    for (ab2, mn2, rhoa), result in zip(soundings, results):
+        expected = invert_discrete(ab2, mn2, rhoa, 2)
+        np.testing.assert_allclose(result['resistivities'], expected['resistivities'])
+        np.testing.assert_allclose(result['thickness'], expected['thickness'])
@@ -0,0 +1,19 @@
+"""Pruebas de la inversión secuencial de perfiles (inversion/profile.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.profile import invert_profile_sequential
+
+
+AB2 = np.logspace(0, 2.5, 25)
+
+
+def test_warm_start_saves_iterations_on_repeated_soundings():
+    rhoa = schlumberger_forward(AB2, None, [2.0, 8.0], [100.0, 10.0, 300.0])
+    result = invert_profile_sequential([(AB2, None, rhoa)] * 3, [0.0, 10.0, 20.0], 3,
+                                       compare_cold=True)
+    assert result['success']
+    assert result['n_iter'][1] < result['n_iter_cold'][1]
+    assert result['iterations_saved'] == sum(result['n_iter_cold']) - sum(result['n_iter'])
+    np.testing.assert_allclose(result['results'][-1]['resistivities'], [100.0, 10.0, 300.0], rtol=1e-3)
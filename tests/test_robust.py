@@ -0,0 +1,26 @@
+"""Pruebas de la inversión robusta IRLS (inversion/robust.py)."""
+
+import numpy as np
+import pytest
+
+from inversion.forward import schlumberger_forward
+from inversion.gauss_newton import invert_gauss_newton
+from inversion.robust import invert_robust
+
+
+AB2 = np.logspace(0, 2.5, 25)
+TRUE_RHO = np.array([100.0, 10.0, 300.0])
+
+
+@pytest.mark.parametrize('norm', ['huber', 'l1'])
+def test_outlier_is_flagged_and_downweighted(norm):
+    rhoa = schlumberger_forward(AB2, None, [2.0, 8.0], TRUE_RHO)
+    rhoa[12] *= 3.0
+    robust = invert_robust(AB2, None, rhoa, 3, norm=norm)
+    assert robust['success']
+    assert np.flatnonzero(robust['outliers']).tolist() == [12]
+
+    least_squares = invert_gauss_newton(AB2, None, rhoa, 3)
+    robust_error = np.abs(np.log(robust['resistivities'] / TRUE_RHO)).max()
+    l2_error = np.abs(np.log(least_squares['resistivities'] / TRUE_RHO)).max()
+    assert robust_error < l2_error
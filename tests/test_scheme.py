@@ -0,0 +1,27 @@
+"""Pruebas de la geometría del esquema Schlumberger (inversion/scheme.py)."""
+
+import numpy as np
+
+from inversion.scheme import default_mn2, schlumberger_electrodes
+
+
+def test_shared_electrodes_are_created_once():
+    ab2 = np.array([1.0, 2.0, 5.0, 5.0, 10.0])
+    mn2 = np.array([0.5, 0.5, 0.5, 2.0, 2.0])
+    positions, indices, _ = schlumberger_electrodes(ab2, mn2)
+    assert len(positions) == len(np.unique(np.concatenate([ab2, -ab2, mn2, -mn2])))
+    np.testing.assert_allclose(positions[indices], np.stack([-ab2, ab2, -mn2, mn2]))
+
+
+def test_geometric_factor_matches_schlumberger_formula():
+    ab2 = np.array([1.5, 3.0, 10.0, 100.0])
+    mn2 = np.array([0.5, 0.5, 2.0, 10.0])
+    _, _, k = schlumberger_electrodes(ab2, mn2)
+    np.testing.assert_allclose(k, np.pi * (ab2**2 - mn2**2) / (2 * mn2))
+
+
+def test_default_mn2_is_inside_current_electrodes():
+    ab2 = np.logspace(0, 3, 10)
+    np.testing.assert_allclose(default_mn2(ab2), ab2 * 0.05)
+    _, _, k = schlumberger_electrodes(ab2)
+    assert np.all(k > 0)
@@ -0,0 +1,54 @@
+"""Pruebas del suavizado de curvas (calculos/suavizado.py)."""
+
+import numpy as np
+import pytest
+
+from calculos.suavizado import moving_average, smooth_log_resampled
+
+
+def loop_moving_average(data, window_size):
+    """Implementación original con bucle (referencia)."""
+    result = np.zeros_like(data)
+    half_window = window_size // 2
+    for i in range(len(data)):
+        start = max(0, i - half_window)
+        end = min(len(data), i + half_window + 1)
+        result[i] = np.mean(data[start:end])
+    return result
+
+
+@pytest.mark.parametrize('n', [1, 2, 5, 17, 200])
+@pytest.mark.parametrize('window_size', [1, 2, 3, 5, 8, 11, 25])
+def test_moving_average_matches_loop(n, window_size):
+    data = np.random.default_rng(n).lognormal(3, 2, n)
+    np.testing.assert_array_equal(moving_average(data, window_size),
+                                  loop_moving_average(data, window_size))
+
+
+def test_moving_average_keeps_nan_local():
+    data = np.arange(1.0, 9.0)
+    data[2] = np.nan
+    expected = [1.5, np.nan, np.nan, np.nan, 5, 6, 7, 7.5]
+    np.testing.assert_array_equal(moving_average(data, 3), expected)
+    np.testing.assert_array_equal(moving_average(data, 3), loop_moving_average(data, 3))
+
+
+def test_moving_average_rows():
+    data = np.random.default_rng(0).normal(size=(4, 30))
+    np.testing.assert_array_equal(moving_average(data, 5),
+                                  [loop_moving_average(row, 5) for row in data])
+
+
+@pytest.mark.parametrize('n_points', [None, 40])
+def test_log_resampled_savgol_keeps_power_law(n_points):
+    ab2 = np.array([1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 10.0, 15.0, 25.0, 40.0, 60.0, 100.0])
+    rhoa = 50.0 * ab2**0.4
+    smoothed = smooth_log_resampled(ab2, rhoa, 'savgol', window_size=5, n_points=n_points)
+    np.testing.assert_allclose(smoothed, rhoa, rtol=1e-10)
+
+
+def test_log_resampled_rows_match_single_curves():
+    ab2 = np.logspace(0, 2, 15)
+    rhoa = np.random.default_rng(1).lognormal(3, 0.5, (3, 15))
+    np.testing.assert_allclose(smooth_log_resampled(ab2, rhoa, window_size=5),
+                               [smooth_log_resampled(ab2, row, window_size=5) for row in rhoa])
@@ -0,0 +1,25 @@
+"""Pruebas de la incertidumbre Monte Carlo (inversion/uncertainty.py)."""
+
+import numpy as np
+
+from inversion.forward import schlumberger_forward
+from inversion.uncertainty import monte_carlo_uncertainty
+
+
+AB2 = np.logspace(0, 2.5, 25)
+TRUE_RHO = np.array([100.0, 10.0, 300.0])
+RHOA = schlumberger_forward(AB2, None, [2.0, 8.0], TRUE_RHO)
+
+
+def test_percentiles_bracket_true_model():
+    result = monte_carlo_uncertainty(AB2, None, RHOA, 3, n_realizations=30, workers=1, seed=1)
+    assert result['success']
+    low, high = result['resistivities'][0], result['resistivities'][-1]
+    assert np.all(low < TRUE_RHO) and np.all(TRUE_RHO < high)
+    assert np.all(np.diff(result['resistivities'], axis=0) >= 0)
+
+
+def test_seed_makes_runs_reproducible():
+    first = monte_carlo_uncertainty(AB2, None, RHOA, 3, n_realizations=10, workers=1, seed=7)
+    second = monte_carlo_uncertainty(AB2, None, RHOA, 3, n_realizations=10, workers=1, seed=7)
+    np.testing.assert_array_equal(first['resistivities'], second['resistivities'])